@@ -3,17 +3,21 @@
 
 import streamlit as st
 import pandas as pd
-import gspread
 import hashlib
 import re
 import requests
-from gspread_dataframe import get_as_dataframe, set_with_dataframe
-from google.oauth2.service_account import Credentials
+from gspread_dataframe import set_with_dataframe
 from datetime import datetime, date
 import calendar
 import pytz
 from math import ceil
 
+from salao.base import base_bruta
+from salao.parsers import parse_datas
+from salao.abas import ler_abas, ler_coluna_como_aba_inteira
+from salao.sheets import versao_planilha
+from salao import fila, metadados, telemetria
+
 # =============================
 # CONFIG BÁSICA
 # =============================
@@ -90,40 +94,35 @@ def tg_send(text: str, chat_id: str | None = None) -> bool:
 # =============================
 # CONEXÃO SHEETS
 # =============================
-@st.cache_resource
-def _conn():
-    info = st.secrets["GCP_SERVICE_ACCOUNT"]
-    scopes = ["https://spreadsheets.google.com/feeds","https://www.googleapis.com/auth/drive"]
-    cred = Credentials.from_service_account_info(info, scopes=scopes)
-    cli = gspread.authorize(cred)
-    return cli.open_by_key(SHEET_ID)
-
 def _ws(title:str):
-    sh=_conn()
-    try:
-        return sh.worksheet(title)
-    except gspread.exceptions.WorksheetNotFound:
-        return sh.add_worksheet(title=title, rows=2000, cols=50)
+    return metadados.garantir_aba(title, linhas=2000, colunas=50)   # sem chamada se a aba já existe
 
-def _read_df(title:str)->pd.DataFrame:
-    ws=_ws(title)
-    df=get_as_dataframe(ws).fillna("")
+def _limpar_df(df:pd.DataFrame)->pd.DataFrame:
+    df=df.fillna("")
     df.columns=[str(c).strip() for c in df.columns]
     df=df.dropna(how="all").replace({pd.NA:""})
     return df
 
+def _read_dfs(*titles:str)->dict:
+    """Lê as abas numa chamada só (salao/abas.py); aba que não existe vem vazia."""
+    return {t: _limpar_df(df) for t, df in ler_abas(list(titles)).items()}
+
 def _write_df(title:str, df:pd.DataFrame):
     ws=_ws(title); ws.clear()
     set_with_dataframe(ws, df, include_index=False, include_column_header=True)
+    metadados.anotar_cabecalho(title, [str(c) for c in df.columns])
+    versao_planilha.clear()  # próxima leitura das abas confere a nova versão
+
+def _append_df(title:str, novos:pd.DataFrame, colunas:list|None=None):
+    """Acrescenta só as linhas novas no fim da aba, pela fila de escrita (não apaga nem reescreve a aba)."""
+    _ws(title)
+    headers=metadados.garantir_colunas(title, list(dict.fromkeys([*(colunas or []), *novos.columns])))
+    fila.anexar(title, novos.reindex(columns=headers).fillna("").values.tolist())
 
 # =============================
 # CONFIG (% por serviço) — persistência
 # =============================
-def _read_config()->dict:
-    try:
-        df=_read_df(ABA_CONFIG)
-    except Exception:
-        df=pd.DataFrame(columns=["Serviço","PercentualPadrao"])
+def _read_config(df:pd.DataFrame)->dict:
     if "Serviço" not in df.columns or "PercentualPadrao" not in df.columns:
         df=pd.DataFrame(columns=["Serviço","PercentualPadrao"])
     df["Serviço"]=df["Serviço"].astype(str).str.strip()
@@ -144,17 +143,11 @@ def _write_config(perc_map:dict):
 # HELPERS
 # =============================
 def br_now(): return datetime.now(pytz.timezone(TZ))
-def parse_br_date(s:str):
-    s=(s or "").strip()
-    for fmt in ("%d/%m/%Y","%d-%m-%Y","%Y-%m-%d"):
-        try: return datetime.strptime(s, fmt)
-        except: pass
-    return None
 def to_br_date(dt:datetime): return dt.strftime("%d/%m/%Y")
 def competencia_from_date(dt:datetime|None):
     return dt.strftime("%m/%Y") if dt else ""
-def competencia_from_data_str(s:str):
-    return competencia_from_date(parse_br_date(s))
+def competencia_col(col:pd.Series)->pd.Series:
+    return parse_datas(col).dt.strftime("%m/%Y").fillna("")
 def s_lower(s): return s.astype(str).str.strip().str.lower()
 def garantir_colunas(df: pd.DataFrame, cols: list[str]) -> pd.DataFrame:
     df = df.copy()
@@ -172,6 +165,15 @@ def make_refid(row:pd.Series)->str:
         str(row.get("Combo","")).strip(),
     ])
     return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+def _valor_refid(base:pd.DataFrame)->pd.Series:
+    """
+    'Valor' como o get_as_dataframe(...).fillna("") entregava (o RefID dos já pagos depende disso):
+    lido com FORMULA e tipado como na aba inteira pelo salao/abas.py, não do snapshot, que vem formatado.
+    """
+    v=ler_coluna_como_aba_inteira(ABA_DADOS, "Valor", base["SheetRow"])
+    if v is None:
+        return pd.Series("", index=base.index)
+    return pd.Series(v.to_numpy(), index=base.index)
 def arredonda_para_cima_mult5(v:float)->float:
     try: v=float(v)
     except: return 0.0
@@ -193,11 +195,16 @@ def last_day_of_month_from_comp(comp_str: str) -> str:
 # UI
 # =============================
 st.set_page_config(layout="wide")
+telemetria.pagina("11_Comissoes_Daniela")
+fila.status_sidebar()
 st.title(f"💇‍♀️ Comissão — {FUNCIONARIA}")
 
-base=_read_df(ABA_DADOS)
+base=base_bruta()
+if "Valor" in base.columns:
+    base["Valor"]=_valor_refid(base)
 base=garantir_colunas(base, COLS_OFICIAIS).copy()
-PERC_SALVOS=_read_config()
+ABAS=_read_dfs(ABA_CONFIG, ABA_COMISSOES_CACHE)   # config + cache de pagos: 1 chamada
+PERC_SALVOS=_read_config(ABAS[ABA_CONFIG])
 
 colA,colB,colC=st.columns([1,1,1])
 with colA:
@@ -219,11 +226,11 @@ dfv=base[s_lower(base["Funcionário"])==FUNCIONARIA.lower()].copy()
 if not incluir_produtos:
     dfv=dfv[s_lower(dfv["Tipo"])=="serviço"].copy()
 
-dfv["_dt_serv"]=dfv["Data"].apply(parse_br_date)
+dfv["_dt_serv"]=parse_datas(dfv["Data"])
 dfv["RefID"]=dfv.apply(make_refid, axis=1)
 
 # cache de pagos
-cache=_read_df(ABA_COMISSOES_CACHE)
+cache=ABAS[ABA_COMISSOES_CACHE]
 cache_cols=["RefID","Funcionario","PagoEm","TerçaPagamento","ValorComissao","Competencia","Observacao"]
 cache=garantir_colunas(cache, cache_cols)
 ja_pagos=set(cache[s_lower(cache["Funcionario"])==FUNCIONARIA.lower()]["RefID"].astype(str).tolist())
@@ -231,11 +238,12 @@ ja_pagos=set(cache[s_lower(cache["Funcionario"])==FUNCIONARIA.lower()]["RefID"].
 # separa fiado e não fiado
 hoje=br_now()
 df_fiados = dfv[(s_lower(dfv["StatusFiado"])!="") | (s_lower(dfv["IDLancFiado"])!="")]
-df_fiados["_dt_pagto"]=df_fiados["DataPagamento"].apply(parse_br_date)
+df_fiados["_dt_pagto"]=parse_datas(df_fiados["DataPagamento"])
 
 nao_fiado = dfv[(s_lower(dfv["StatusFiado"])=="") | (s_lower(dfv["StatusFiado"])=="nao")].copy()
-fiado_lib = df_fiados[(df_fiados["_dt_pagto"].notna()) & (df_fiados["_dt_pagto"]<=hoje)].copy()
-fiado_pend= df_fiados[(df_fiados["_dt_pagto"].isna())  | (df_fiados["_dt_pagto"]>hoje)].copy()
+hoje_local=hoje.replace(tzinfo=None)  # _dt_pagto não tem fuso
+fiado_lib = df_fiados[(df_fiados["_dt_pagto"].notna()) & (df_fiados["_dt_pagto"]<=hoje_local)].copy()
+fiado_pend= df_fiados[(df_fiados["_dt_pagto"].isna())  | (df_fiados["_dt_pagto"]>hoje_local)].copy()
 
 if ja_pagos:
     nao_fiado = nao_fiado[~nao_fiado["RefID"].isin(ja_pagos)].copy()
@@ -250,16 +258,14 @@ def montar_valor_base(df:pd.DataFrame)->pd.DataFrame:
         return df
     df=df.copy()
     df["Valor_num"]=pd.to_numeric(df["Valor"], errors="coerce").fillna(0.0)
-    df["Competência"]=df["Data"].apply(competencia_from_data_str)
+    df["Competência"]=competencia_col(df["Data"])
     df["Valor_base_comissao"]=df["Valor_num"].apply(arredonda_para_cima_mult5)
     # Competência para lançamento da DESPESA:
     # - Não fiado: usa mês de Data (atendimento)
     # - Fiado liberado: usa mês de DataPagamento
     if "DataPagamento" in df.columns:
-        df["CompetênciaPagto"] = df.apply(
-            lambda r: competencia_from_data_str(r.get("DataPagamento")) if str(r.get("DataPagamento","")).strip() else competencia_from_data_str(r.get("Data","")),
-            axis=1
-        )
+        tem_pagto = df["DataPagamento"].astype(str).str.strip().ne("")
+        df["CompetênciaPagto"] = competencia_col(df["DataPagamento"]).where(tem_pagto, df["Competência"])
     else:
         df["CompetênciaPagto"] = df["Competência"]
     return df
@@ -436,15 +442,10 @@ if st.button("✅ Registrar comissão (1 linha por MÊS/Competência), lançar e
                         "Competencia": r.get("Competência",""),
                         "Observacao": f'{r.get("Cliente","")} | {r.get("Serviço","")} | {r.get("Data","")}',
                     })
-            cache_df=_read_df(ABA_COMISSOES_CACHE)
-            cache_df=garantir_colunas(cache_df, ["RefID","Funcionario","PagoEm","TerçaPagamento","ValorComissao","Competencia","Observacao"])
-            cache_upd=pd.concat([cache_df[["RefID","Funcionario","PagoEm","TerçaPagamento","ValorComissao","Competencia","Observacao"]], pd.DataFrame(novos_cache)], ignore_index=True)
-            _write_df(ABA_COMISSOES_CACHE, cache_upd)
+            _append_df(ABA_COMISSOES_CACHE, pd.DataFrame(novos_cache),
+                       ["RefID","Funcionario","PagoEm","TerçaPagamento","ValorComissao","Competencia","Observacao"])
 
         # 1) DESPESAS DO SALÃO FEMININO (1 linha por MÊS/Competência de pagamento)
-        despesas_df=_read_df(ABA_DESPESAS_SALAO)
-        despesas_df=garantir_colunas(despesas_df, COLS_DESPESAS_FIX)
-
         pagaveis=[]
         # Não fiado: competência de DESPESA = mês da Data do atendimento
         if grid_nao_fiado is not None and not grid_nao_fiado.empty:
@@ -481,11 +482,7 @@ if st.button("✅ Registrar comissão (1 linha por MÊS/Competência), lançar e
                 })
                 total_lancado += val
 
-            despesas_final=pd.concat([despesas_df, pd.DataFrame(linhas)], ignore_index=True)
-            colunas_finais=[c for c in COLS_DESPESAS_FIX if c in despesas_final.columns] + \
-                           [c for c in despesas_final.columns if c not in COLS_DESPESAS_FIX]
-            despesas_final=despesas_final[colunas_finais]
-            _write_df(ABA_DESPESAS_SALAO, despesas_final)
+            _append_df(ABA_DESPESAS_SALAO, pd.DataFrame(linhas), COLS_DESPESAS_FIX)
             linhas_adicionadas=len(linhas)
 
         # 2) Persiste últimos % por serviço
@@ -14,17 +14,21 @@
 
 import streamlit as st
 import pandas as pd
-import gspread
 import io, textwrap, re
 import plotly.express as px
-from google.oauth2.service_account import Credentials
-from gspread_dataframe import get_as_dataframe
 from gspread.utils import rowcol_to_a1
 from gspread.exceptions import APIError
 from datetime import datetime, date
 import pytz
 import numpy as np
 
+from salao.base import (
+    snapshot, invalidar as invalidar_base, faixas_contiguas, excluir_linhas,
+    remapear_exclusao, ajustar_local,
+)
+from salao import fila, metadados, telemetria
+from salao.indices import contar_visitas
+
 # =========================
 # CONFIG
 # =========================
@@ -57,21 +61,9 @@ def _to_bool(x):
     s = str(x).strip().lower()
     return s in ("1", "true", "verdadeiro", "sim", "ok", "y", "yes")
 
-@st.cache_resource(show_spinner=False)
-def _conectar_sheets():
-    info = st.secrets["GCP_SERVICE_ACCOUNT"]
-    creds = Credentials.from_service_account_info(
-        info,
-        scopes=[
-            "https://www.googleapis.com/auth/spreadsheets",
-            "https://www.googleapis.com/auth/drive",
-        ],
-    )
-    return gspread.authorize(creds)
-
 # ---------- helpers Sheets ----------
 def _headers_and_indices(ws):
-    headers = ws.row_values(1)
+    headers = metadados.cabecalho(ws.title)  # guardado no processo (salao/metadados.py), sem chamada
     norms = [_norm_col(h) for h in headers]
     idxs = [i for i, n in enumerate(norms) if n == "conferido"]  # 0-based
     chosen = idxs[-1] if idxs else None  # última ocorrência
@@ -95,6 +87,7 @@ def _ensure_conferido_column(ws, create_if_missing: bool = False):
     try:
         col = len(headers) + 1
         ws.update_cell(1, col, "Conferido")
+        metadados.anotar_cabecalho(ws.title, [*headers, "Conferido"])
         return col
     except APIError:
         st.warning("Sem permissão para criar a coluna 'Conferido' (somente leitura).")
@@ -103,86 +96,92 @@ def _ensure_conferido_column(ws, create_if_missing: bool = False):
         st.warning(f"Não foi possível criar a coluna 'Conferido': {e}")
         return None
 
-def _fetch_conferido_map(ws):
-    """
-    Lê a ÚLTIMA coluna 'Conferido' diretamente do Sheets e devolve {SheetRow:int -> bool}.
-    NUNCA tenta criar a coluna aqui (evita erro em cache).
-    """
-    col_conf = _ensure_conferido_column(ws, create_if_missing=False)
-    if not col_conf:
-        return {}  # sem coluna, sem conferidos
-
-    # Captura letras da coluna (suporta AA, AB...)
-    a1 = rowcol_to_a1(1, col_conf)  # e.g. 'W1' / 'AA1'
-    col_letters = "".join(ch for ch in a1 if ch.isalpha())
-
-    rng = f"{col_letters}2:{col_letters}"  # coluna inteira a partir da linha 2
-    vals = ws.get(rng, value_render_option="UNFORMATTED_VALUE")
-
-    m = {}
-    rownum = 2
-    for row in vals:
-        v = row[0] if row else ""
-        if isinstance(v, (bool, np.bool_)):
-            b = bool(v)
-        elif isinstance(v, (int, float)) and not pd.isna(v):
-            b = float(v) != 0.0
-        else:
-            s = str(v).strip().lower()
-            b = s in ("1", "true", "verdadeiro", "sim", "ok", "y", "yes")
-        m[rownum] = b
-        rownum += 1
-    return m
-
 def _update_conferido(ws, updates):
     """
-    Atualiza a coluna 'Conferido' linha a linha. Se não houver coluna ou sem permissão,
-    informa e não tenta escrever.
+    Atualiza a coluna 'Conferido' em UMA chamada (batch_update), juntando linhas seguidas
+    numa faixa só. Se o lote for recusado, tenta faixa a faixa e informa quais falharam.
+    Se não houver coluna ou sem permissão, informa e não tenta escrever.
+    Retorna a lista de faixas (ini, fim) que não foram gravadas.
     """
     if not updates:
-        return
+        return []
 
     col_conf = _ensure_conferido_column(ws, create_if_missing=True)
     if not col_conf:
         st.error("Sem permissão para atualizar 'Conferido' (planilha em somente leitura).")
-        return
+        return []
+
+    valor_por_linha = {int(u["row"]): ("TRUE" if u["value"] else "FALSE") for u in updates}
+    data = []
+    for ini, fim in faixas_contiguas(valor_por_linha):
+        data.append({
+            "range": f"{rowcol_to_a1(ini, col_conf)}:{rowcol_to_a1(fim, col_conf)}",
+            "values": [[valor_por_linha[r]] for r in range(ini, fim + 1)],
+            "faixa": (ini, fim),
+        })
+
+    try:
+        ws.batch_update([{"range": d["range"], "values": d["values"]} for d in data],
+                        value_input_option="USER_ENTERED")
+        return []
+    except Exception as e:
+        erro_lote = e
 
-    for u in updates:
+    # lote recusado (ex.: faixa protegida): grava faixa a faixa para salvar o que der
+    falhas = []
+    for d in data:
         try:
-            row = int(u["row"])
-            val = "TRUE" if u["value"] else "FALSE"
-            ws.update_cell(row, col_conf, val)
+            ws.update(values=d["values"], range_name=d["range"], value_input_option="USER_ENTERED")
         except APIError:
-            st.error("O Google Sheets não permitiu gravar 'Conferido' (verifique permissões/proteções).")
-            break
+            falhas.append(d["faixa"])
+            st.error(f"O Google Sheets não permitiu gravar 'Conferido' nas linhas {d['faixa'][0]}–{d['faixa'][1]} "
+                     "(verifique permissões/proteções).")
         except Exception as e:
-            st.warning(f"Falha ao atualizar linha {u.get('row')}: {e}")
+            falhas.append(d["faixa"])
+            st.warning(f"Falha ao atualizar linhas {d['faixa'][0]}–{d['faixa'][1]}: {e}")
+    if falhas and len(falhas) == len(data):
+        st.warning(f"Nenhuma faixa gravada ({erro_lote}).")
+    return falhas
 
 def _delete_rows(ws, rows):
-    for r in sorted(set(rows), reverse=True):
-        try:
-            ws.delete_rows(int(r))
-        except APIError:
-            st.error(f"Sheets bloqueou exclusão da linha {r} (verifique permissões/proteções).")
-            break
-        except Exception as e:
-            st.warning(f"Falha ao excluir linha {r}: {e}")
+    """
+    Exclui as linhas numa única chamada (deleteDimension por faixa contígua), com a fila de escrita
+    parada: as correções ainda na fila (ex.: pagamento de fiado) são renumeradas para as novas linhas.
+    Retorna as linhas efetivamente excluídas.
+    """
+    if not rows:
+        return []
+    try:
+        with fila.pausada():
+            faixas = excluir_linhas(ws, rows)
+            fila.remapear_exclusao(ws.title, [r for ini, fim in faixas for r in range(ini, fim + 1)])
+    except APIError:
+        st.error("Sheets bloqueou a exclusão das linhas (verifique permissões/proteções).")
+        return []
+    except Exception as e:
+        st.warning(f"Falha ao excluir linhas: {e}")
+        return []
+    return [r for ini, fim in faixas for r in range(ini, fim + 1)]
+
+def _ajustar_base_local(versao, conferidos: dict, excluidas: list):
+    """Reflete no snapshot o que foi gravado (Conferido/exclusões), sem recarregar a base."""
+    def alterar(df):
+        if conferidos:
+            linhas = df["SheetRow"].map(conferidos)
+            df["ConferidoFlag"] = linhas.fillna(df["ConferidoFlag"]).astype(bool)
+        if excluidas:
+            df = remapear_exclusao(df, excluidas)
+        return df
+    ajustar_local(alterar, versao)
 
 # ---------- leitura base ----------
-@st.cache_data(ttl=60, show_spinner=False)
 def carregar_base():
-    gc = _conectar_sheets()
-    sh = gc.open_by_key(SHEET_ID)
-    ws = sh.worksheet(ABA_DADOS)
-
-    df = get_as_dataframe(ws, evaluate_formulas=True, header=0)
-    df = df.dropna(how="all")
-    if df is None or df.empty:
+    """Base a partir do snapshot compartilhado (salao/base.py): SheetRow e 'Conferido' já vêm prontos."""
+    snap = snapshot()
+    df = snap.df.copy()
+    if df.empty:
         return pd.DataFrame()
 
-    df["SheetRow"] = df.index + 2
-    df.columns = [str(c).strip() for c in df.columns]
-
     base_cols = ["Data", "Serviço", "Valor", "Conta", "Cliente", "Combo",
                  "Funcionário", "Fase", "Hora Chegada", "Hora Início",
                  "Hora Saída", "Hora Saída do Salão", "Tipo"]
@@ -195,40 +194,17 @@ def carregar_base():
         if col not in df.columns: df[col] = ""
         df[col] = df[col].astype(str).fillna("").str.strip()
 
-    # datas
-    def parse_data(x):
-        if pd.isna(x): return None
-        if isinstance(x, (datetime, pd.Timestamp)): return x.date()
-        s = str(x).strip()
-        for fmt in ("%d/%m/%Y", "%d-%m-%Y", "%Y-%m-%d", "%d/%m/%y"):
-            try:
-                return datetime.strptime(s, fmt).date()
-            except Exception:
-                pass
-        return None
-    df["Data_norm"] = df["Data"].apply(parse_data)
+    # datas (já convertidas no snapshot: salao/parsers.parse_datas)
+    df["Data_norm"] = df["Dia"]
 
     # valores
-    def parse_valor(v):
-        if pd.isna(v): return 0.0
-        s = str(v).strip().replace("R$", "").replace(" ", "")
-        if "," in s and "." in s:
-            s = s.replace(".", "").replace(",", ".")
-        else:
-            s = s.replace(",", ".")
-        try:
-            return float(s)
-        except Exception:
-            return 0.0
-    df["Valor_num"] = df["Valor"].apply(parse_valor)
+    df["Valor_num"] = df["ValorNum"]   # já convertido no snapshot (salao/parsers.coerce_valor)
 
-    # 'Conferido' direto da coluna correta do Sheets (modo leitura; não cria se faltar)
-    conferido_map = _fetch_conferido_map(ws)
-    df["Conferido"] = df["SheetRow"].map(lambda r: bool(conferido_map.get(int(r), False))).astype(bool)
+    # 'Conferido' da ÚLTIMA coluna com esse nome (lido junto com a base, sem criar se faltar)
+    df["Conferido"] = df["ConferidoFlag"].astype(bool)
 
     # debug
-    headers = ws.row_values(1)
-    conf_sources = [h for h in headers if _norm_col(h) == "conferido"]
+    conf_sources = [h for h in snap.cabecalho if _norm_col(h) == "conferido"]
     df.attrs["__conferido_sources__"] = conf_sources or []
 
     return df
@@ -238,19 +214,21 @@ def filtrar_por_dia(df, dia):
     if df.empty or dia is None: return df.iloc[0:0]
     return df[df["Data_norm"] == dia].copy()
 
-def contar_atendimentos_dia(df):
-    if df.empty: return 0
-    d0 = df["Data_norm"].dropna()
-    if d0.empty: return 0
-    dia = d0.iloc[0]
+def contar_atendimentos_dia(dia, funcionario=None, linhas: int = 0):
+    """
+    Clientes atendidos em `dia` (só as visitas com serviço da `funcionario`, se informada).
+    Antes de DATA_CORRETA cada linha era 1 atendimento: vale `linhas` (nº de linhas do dia).
+    """
+    if dia is None: return 0
     if dia < DATA_CORRETA:
-        return len(df)  # antes da regra, cada linha = 1 atendimento
-    # depois da regra, 1 por Cliente+Data
-    return df.groupby(["Cliente", "Data_norm"]).ngroups
+        return linhas
+    # depois da regra, 1 por Cliente+Data (tabela de visitas do snapshot: salao/indices.py)
+    return contar_visitas(dia, funcionario)
 
-def kpis(df):
+def kpis(df, funcionario=None):
     if df.empty: return 0, 0, 0.0, 0.0
-    clientes = contar_atendimentos_dia(df)
+    d0 = df["Data_norm"].dropna()
+    clientes = contar_atendimentos_dia(d0.iloc[0] if not d0.empty else None, funcionario, len(df))
     servicos = len(df)
     receita = float(df["Valor_num"].sum())
     ticket = (receita / clientes) if clientes > 0 else 0.0
@@ -301,12 +279,13 @@ def card(label, val):
 # UI
 # =========================
 st.set_page_config(page_title="Atendimentos por Dia (Feminino)", page_icon="📅", layout="wide")
+telemetria.pagina("12_Atendimentos_Por_Dia")
 st.title("📅 Atendimentos por Dia — Feminino")
 st.caption("KPIs do dia, comparativo por funcionária, conferência e exportação para Mobills.")
 
 # ===== Sidebar =====
 if st.sidebar.button("🔄 Recarregar dados agora"):
-    st.cache_data.clear()
+    st.cache_data.clear(); invalidar_base()
     st.rerun()
 
 st.sidebar.markdown("### Percentual de comissão por funcionária")
@@ -357,7 +336,7 @@ cli, srv, rec, tkt = kpis(df_dia)
 total_comissoes = 0.0
 for func in FUNCIONARIAS:
     df_f = df_dia[df_dia["Funcionário"].astype(str).str.casefold() == func.casefold()]
-    _, _, rec_f, _ = kpis(df_f)
+    _, _, rec_f, _ = kpis(df_f, func)
     total_comissoes += rec_f * (comissoes_pct.get(func, 0.0) / 100.0)
 
 receita_salao_pos = rec - total_comissoes
@@ -378,7 +357,7 @@ st.subheader("📊 Por Funcionária (dia selecionado)")
 cols = st.columns(len(FUNCIONARIAS))
 for i, func in enumerate(FUNCIONARIAS):
     df_f = df_dia[df_dia["Funcionário"].astype(str).str.casefold() == func.casefold()]
-    cli_f, srv_f, rec_f, tkt_f = kpis(df_f)
+    cli_f, srv_f, rec_f, tkt_f = kpis(df_f, func)
     com_pct = comissoes_pct.get(func, 0.0)
     com_val = rec_f * (com_pct / 100.0)
     with cols[i]:
@@ -395,7 +374,7 @@ for i, func in enumerate(FUNCIONARIAS):
 df_comp = []
 for func in FUNCIONARIAS:
     df_f = df_dia[df_dia["Funcionário"].astype(str).str.casefold() == func.casefold()]
-    cli_f, srv_f, _, _ = kpis(df_f)
+    cli_f, srv_f, _, _ = kpis(df_f, func)
     df_comp.append({"Funcionária": func, "Clientes": cli_f, "Serviços": srv_f})
 df_comp = pd.DataFrame(df_comp)
 
@@ -440,15 +419,15 @@ edited = st.data_editor(
 
 if st.button("✅ Aplicar mudanças (gravar no Sheets)", type="primary"):
     try:
-        gc = _conectar_sheets()
-        sh = gc.open_by_key(SHEET_ID)
-        ws = sh.worksheet(ABA_DADOS)
+        ws = metadados.worksheet(ABA_DADOS)
 
         # checagem de escrita: tentamos garantir/descobrir a coluna (criando se faltar)
         can_write_col = _ensure_conferido_column(ws, create_if_missing=True)
         if not can_write_col:
             st.error("Sem permissão para escrever no Sheets (somente leitura).")
         else:
+            versao = snapshot(revalidar=True).versao
+
             # Atualiza 'Conferido'
             orig_by_row = df_conf.set_index("SheetRow")["Conferido"].apply(_to_bool).to_dict()
             updates = []
@@ -458,15 +437,17 @@ if st.button("✅ Aplicar mudanças (gravar no Sheets)", type="primary"):
                 old_val = bool(_to_bool(orig_by_row.get(rownum, False)))
                 if new_val != old_val:
                     updates.append({"row": rownum, "value": new_val})
-            _update_conferido(ws, updates)
+            falhas = _update_conferido(ws, updates)
+            linhas_falha = {r for ini, fim in falhas for r in range(ini, fim + 1)}
+            conferidos = {u["row"]: u["value"] for u in updates if u["row"] not in linhas_falha}
 
             # Exclui marcados (isso também exige permissão de editor)
             rows_to_delete = [int(r["SheetRow"]) for _, r in edited.iterrows() if bool(_to_bool(r["Excluir"]))]
-            if rows_to_delete:
-                _delete_rows(ws, rows_to_delete)
+            excluidas = _delete_rows(ws, rows_to_delete)
 
+            # SheetRow/Conferido ajustados no snapshot em memória (sem reler a base)
+            _ajustar_base_local(versao, conferidos, excluidas)
             st.success("Alterações aplicadas com sucesso!")
-            st.cache_data.clear()
             st.rerun()
 
     except APIError:
@@ -592,18 +573,18 @@ else:
     st.markdown("#### Pós-exportação")
     if st.button("✅ Marcar exportados como Conferidos no Sheets"):
         try:
-            gc = _conectar_sheets()
-            sh = gc.open_by_key(SHEET_ID)
-            ws = sh.worksheet(ABA_DADOS)
+            ws = metadados.worksheet(ABA_DADOS)
 
             can_write_col = _ensure_conferido_column(ws, create_if_missing=True)
             if not can_write_col:
                 st.error("Sem permissão para escrever no Sheets (somente leitura).")
             else:
+                versao = snapshot(revalidar=True).versao
                 updates = [{"row": int(r), "value": True} for r in df_export_base["SheetRow"].tolist()]
-                _update_conferido(ws, updates)
-                st.success(f"Marcados {len(updates)} registros como Conferidos.")
-                st.cache_data.clear()
+                falhas = _update_conferido(ws, updates)
+                linhas_falha = {r for ini, fim in falhas for r in range(ini, fim + 1)}
+                _ajustar_base_local(versao, {u["row"]: True for u in updates if u["row"] not in linhas_falha}, [])
+                st.success(f"Marcados {len(updates) - len(linhas_falha)} registros como Conferidos.")
                 st.rerun()
 
         except APIError:
@@ -1,22 +1,23 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-import gspread
 from gspread_dataframe import get_as_dataframe
-from google.oauth2.service_account import Credentials
 import unicodedata
 
+from salao.base import base_analitica
+from salao.busca import filtro_nomes
+from salao.clientes import COL_CHAVE, chaves_clientes
+from salao.indices import clientes_por
+from salao import metadados, telemetria
+
 st.set_page_config(layout="wide")
+telemetria.pagina("1_Clientes")
 st.title("🧍‍♀️ Clientes (Feminino) - Receita Total")
 
 # === CONFIG GOOGLE SHEETS ===
 SHEET_ID = "1qtOF1I7Ap4By2388ySThoVlZHbI3rAJv_haEcil0IUE"
 
-# Possíveis nomes das guias (variações)
-BASE_ALVOS = [
-    "base de dados feminino", "base de dados - feminino",
-    "base de dados (feminino)", "base de dados feminino "
-]
+# Possíveis nomes da guia de status (variações)
 STATUS_ALVOS = [
     "clientes_status_feminino", "clientes status feminino",
     "clientes_status feminino", "status_feminino"
@@ -32,34 +33,6 @@ def norm(s: str) -> str:
     s = unicodedata.normalize("NFKD", s).encode("ASCII", "ignore").decode("ASCII")
     return " ".join(s.lower().strip().split())
 
-def parse_valor_qualquer(v):
-    """Converte 'R$ 1.234,56', '1.234,56', '25,00', '25.00', '25.0' ou número em float (sem inflar)."""
-    if pd.isna(v): return 0.0
-    if isinstance(v, (int, float)):
-        return float(v)
-
-    s = str(v).strip().replace("\u00A0", "")
-    s = s.replace("R$", "").replace("r$", "").replace(" ", "")
-
-    tem_virg = "," in s
-    tem_ponto = "." in s
-
-    if tem_virg and tem_ponto:
-        # PT-BR: milhar '.' e decimal ','
-        s = s.replace(".", "").replace(",", ".")
-    elif tem_virg and not tem_ponto:
-        # Só vírgula -> decimal
-        s = s.replace(",", ".")
-    else:
-        # Só ponto (ou nenhum) -> ponto é decimal
-        pass
-
-    try:
-        return float(s)
-    except Exception:
-        x = pd.to_numeric(s, errors="coerce")
-        return float(x) if pd.notna(x) else 0.0
-
 def achar_col(df, nomes):
     alvo = [n.strip().lower() for n in nomes]
     for c in df.columns:
@@ -67,18 +40,17 @@ def achar_col(df, nomes):
             return c
     return None
 
-def find_worksheet(planilha, alvos_norm):
-    wss = planilha.worksheets()
-    titulos = [ws.title for ws in wss]
+def find_worksheet(alvos_norm):
+    titulos = metadados.titulos()   # guardados no processo (salao/metadados.py), sem chamada
     titulos_norm = [norm(t) for t in titulos]
     # 1) match exato
-    for ws, tnorm in zip(wss, titulos_norm):
+    for t, tnorm in zip(titulos, titulos_norm):
         if tnorm in alvos_norm:
-            return ws
+            return metadados.worksheet(t)
     # 2) contém
-    for ws, tnorm in zip(wss, titulos_norm):
+    for t, tnorm in zip(titulos, titulos_norm):
         if any(a in tnorm for a in alvos_norm):
-            return ws
+            return metadados.worksheet(t)
     st.error("❌ Não encontrei a aba feminina. Guias disponíveis:\n- " + "\n- ".join(titulos))
     st.stop()
 
@@ -91,30 +63,12 @@ def excel_col_letter(idx1_based: int) -> str:
         s = chr(65 + r) + s
     return s
 
-# === Conexão ===
-@st.cache_resource
-def conectar_sheets():
-    info = st.secrets["GCP_SERVICE_ACCOUNT"]
-    escopo = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-    credenciais = Credentials.from_service_account_info(info, scopes=escopo)
-    cliente = gspread.authorize(credenciais)
-    return cliente.open_by_key(SHEET_ID)
-
-# === Carregar dados Feminino ===
-@st.cache_data(ttl=300)  # evita base antiga por muito tempo
+# === Carregar dados Feminino (snapshot compartilhado: salao/base.py) ===
 def carregar_dados():
-    planilha = conectar_sheets()
-    ws = find_worksheet(planilha, [norm(x) for x in BASE_ALVOS])
-    df = get_as_dataframe(ws).dropna(how="all")
-    df.columns = [col.strip() for col in df.columns]
-
+    df = base_analitica()
     if "Data" not in df.columns:
         st.error("❌ Coluna 'Data' não encontrada na aba feminina."); st.stop()
 
-    df["Data"] = pd.to_datetime(df["Data"], errors="coerce", dayfirst=True)
-    df = df.dropna(subset=["Data"])
-    df["Ano"] = df["Data"].dt.year.astype(int)
-
     col_serv = achar_col(df, ["Serviço", "Servico"])
     if col_serv and col_serv != "Serviço":
         df.rename(columns={col_serv: "Serviço"}, inplace=True)
@@ -131,16 +85,13 @@ def carregar_dados():
     if col_cli and col_cli != "Cliente":
         df.rename(columns={col_cli: "Cliente"}, inplace=True)
 
-    df["Cliente"] = df["Cliente"].astype(str).str.strip()
-    df["ValorNum"] = df["Valor"].apply(parse_valor_qualquer)
     return df
 
 @st.cache_data(ttl=300)  # idem
 def carregar_status_df():
     """Lê a planilha de status (para indicadores na tela)."""
     try:
-        planilha = conectar_sheets()
-        ws = find_worksheet(planilha, [norm(x) for x in STATUS_ALVOS])
+        ws = find_worksheet([norm(x) for x in STATUS_ALVOS])
         df = get_as_dataframe(ws).dropna(how="all")
         df.columns = [c.strip() for c in df.columns]
         col_cli = achar_col(df, ["Cliente"]); col_sta = achar_col(df, ["Status"])
@@ -157,13 +108,12 @@ def carregar_status_df():
 def atualizar_status_clientes_batch(status_map_norm: dict) -> int:
     """
     Atualiza a coluna 'Status' da aba FEMININO em uma única chamada,
-    comparando clientes por nome normalizado (sem acento/caixa/espaços).
+    comparando clientes pela chave canônica (salao/clientes.py: sem acento/caixa/espaços).
     Não altera linhas cujo Status atual seja 'Ignorado' (case-insensitive).
-    status_map_norm: { norm(nome_cliente) : "Ativo"/"Inativo" }
+    status_map_norm: { ClienteKey : "Ativo"/"Inativo" }
     Retorna a quantidade de linhas alteradas.
     """
-    planilha = conectar_sheets()
-    ws = find_worksheet(planilha, [norm(x) for x in STATUS_ALVOS])
+    ws = find_worksheet([norm(x) for x in STATUS_ALVOS])
 
     vals = ws.get_all_values()   # [[Cliente, Status, ...], ...]
     if not vals:
@@ -180,8 +130,8 @@ def atualizar_status_clientes_batch(status_map_norm: dict) -> int:
     novos_status = []
     alterados = 0
 
-    for row in linhas:
-        nome_raw = (row[cli_idx0] if cli_idx0 < len(row) else "").strip()
+    chaves = chaves_clientes([(row[cli_idx0] if cli_idx0 < len(row) else "") for row in linhas])
+    for row, alvo_norm in zip(linhas, chaves):
         atual    = (row[sta_idx0] if sta_idx0 < len(row) else "").strip()
 
         # mantém "Ignorado"
@@ -189,7 +139,6 @@ def atualizar_status_clientes_batch(status_map_norm: dict) -> int:
             novos_status.append([atual])
             continue
 
-        alvo_norm = norm(nome_raw)
         novo = status_map_norm.get(alvo_norm, atual) or atual
 
         if novo != atual:
@@ -225,12 +174,13 @@ if "_status_auto_ok_fem" not in st.session_state:
 if not st.session_state["_status_auto_ok_fem"]:
     try:
         # Base completa para cálculo do último atendimento (sem filtro de ano)
-        df_full = df.copy()
+        df_full = df
         hoje = pd.Timestamp.today().normalize()
 
-        ultimos = df_full.groupby("Cliente")["Data"].max().reset_index()
+        ultimos = df_full.groupby("Cliente", observed=True)["Data"].max().reset_index()
         ultimos["DiasDesde"] = (hoje - ultimos["Data"]).dt.days
         ultimos["StatusNovo"] = ultimos["DiasDesde"].apply(lambda x: "Inativo" if x > 90 else "Ativo")
+        ultimos[COL_CHAVE] = chaves_clientes(ultimos["Cliente"])
 
         # NÃO mexer nos "Ignorado"
         ignorados_set = set()
@@ -244,7 +194,7 @@ if not st.session_state["_status_auto_ok_fem"]:
         for _, r in ultimos.iterrows():
             if r["Cliente"] in ignorados_set:
                 continue
-            status_map_norm[norm(r["Cliente"])] = r["StatusNovo"]
+            status_map_norm[r[COL_CHAVE]] = r["StatusNovo"]
 
         # aplica atualização em lote
         alterados = atualizar_status_clientes_batch(status_map_norm)
@@ -299,13 +249,13 @@ else:
     mask_fiado_full = pd.Series(False, index=df.index)
 
 if ano_escolhido == "Todos":
-    df_base = df.copy()
+    df_base = df
 else:
-    df_base = df[df["Ano"] == ano_escolhido].copy()
+    df_base = df[df["Ano"] == ano_escolhido]
 
 mask_fiado = mask_fiado_full.loc[df_base.index]
-df_receita = df_base[~mask_fiado].copy()
-df_fiado = df_base[mask_fiado].copy()
+df_receita = df_base[~mask_fiado]
+df_fiado = df_base[mask_fiado]
 
 # =============================
 # Indicadores
@@ -325,14 +275,21 @@ c4.metric("🚩 Inativas", inativos)
 
 # Limpa nomes genéricos
 ban = {"boliviano", "brasileiro", "menino", "menino boliviano"}
-for _df in (df_base, df_receita, df_fiado):
-    _df.drop(_df[_df["Cliente"].astype(str).str.lower().str.strip().isin(ban)].index, inplace=True)
+# sem inplace: com "Todos", df_base é o próprio df (base compartilhada, sem cópia)
+df_base, df_receita, df_fiado = [
+    _df.drop(_df[_df["Cliente"].astype(str).str.lower().str.strip().isin(ban)].index)
+    for _df in (df_base, df_receita, df_fiado)
+]
+
+# Totais por cliente do cubo (salao/indices.py): Receita = sem fiado; Fiado em R$; LinhasFiado = registros
+por_cliente = clientes_por(None if ano_escolhido == "Todos" else ano_escolhido)
+por_cliente = por_cliente[~por_cliente["Cliente"].str.lower().str.strip().isin(ban)]
 
 # =============================
 # Receita total por cliente (ano filtrado)
 # =============================
-ranking = (df_receita.groupby("Cliente")["ValorNum"].sum()
-           .reset_index().rename(columns={"ValorNum": "Valor"})
+ranking = (por_cliente.loc[por_cliente["Linhas"] > por_cliente["LinhasFiado"], ["Cliente", "Receita"]]
+           .rename(columns={"Receita": "Valor"})
            .sort_values("Valor", ascending=False))
 ranking["Valor Formatado"] = ranking["Valor"].apply(
     lambda x: f"R$ {x:,.2f}".replace(",", "v").replace(".", ",").replace("v", ".")
@@ -341,8 +298,7 @@ ranking["Valor Formatado"] = ranking["Valor"].apply(
 st.subheader("📟 Receita total por cliente (Feminino)")
 busca = st.text_input("🔎 Filtrar por nome").strip()
 if busca:
-    busca_norm = norm(busca)
-    rank_view = ranking[ranking["Cliente"].apply(lambda n: busca_norm in norm(n))]
+    rank_view = ranking[filtro_nomes(ranking["Cliente"], busca)]   # índice de busca (salao/busca.py)
 else:
     rank_view = ranking
 st.dataframe(rank_view[["Cliente", "Valor Formatado"]], use_container_width=True)
@@ -364,12 +320,10 @@ st.plotly_chart(fig_top, use_container_width=True)
 # =============================
 st.subheader("🗓️ Resultado por cliente por ano (sem fiado)")
 
-df_sem_fiado = df[~mask_fiado_full].copy()
-df_sem_fiado = df_sem_fiado[~df_sem_fiado["Cliente"].astype(str).str.lower().str.strip().isin(ban)]
-
-tabela_cliente_ano = (df_sem_fiado
-    .groupby(["Cliente", "Ano"])["ValorNum"].sum()
-    .reset_index()
+tabela_cliente_ano = clientes_por(por=["Ano"])
+tabela_cliente_ano = (tabela_cliente_ano[(tabela_cliente_ano["Linhas"] > tabela_cliente_ano["LinhasFiado"])
+                                         & ~tabela_cliente_ano["Cliente"].str.lower().str.strip().isin(ban)]
+    .rename(columns={"Receita": "ValorNum"})[["Cliente", "Ano", "ValorNum"]]
     .sort_values(["Cliente", "Ano"]))
 
 pivot_cliente_ano = tabela_cliente_ano.pivot(index="Cliente", columns="Ano", values="ValorNum").fillna(0.0)
@@ -410,7 +364,7 @@ if not ranking.empty:
         servicos = df_hist["Serviço"].nunique() if "Serviço" in df_hist.columns else 0
         media = df_val.groupby("Data")["ValorNum"].sum().mean()
         media = 0 if pd.isna(media) else media
-        servicos_detalhados = (df_hist["Serviço"].value_counts().rename("Quantidade")
+        servicos_detalhados = (df_hist["Serviço"].value_counts().loc[lambda s: s > 0].rename("Quantidade")
                                if "Serviço" in df_hist.columns else pd.Series(dtype=int))
         return pd.Series({
             "Total Receita": f"R$ {total:,.2f}".replace(",", "v").replace(".", ",").replace("v", "."),
@@ -428,15 +382,16 @@ if not ranking.empty:
 # Fiados (respeita filtro de ano)
 # =============================
 st.markdown("### 💳 Fiados — Resumo e Detalhes (Feminino)")
-total_fiado = df_fiado["ValorNum"].sum()
+com_fiado = por_cliente[por_cliente["LinhasFiado"] > 0]
+total_fiado = com_fiado["Fiado"].sum()
 colf1, colf2, colf3 = st.columns(3)
 colf1.metric("💸 Total em fiado (aberto)", f"R$ {total_fiado:,.2f}".replace(",", "v").replace(".", ",").replace("v", "."))
-colf2.metric("👤 Clientes com fiado", int(df_fiado["Cliente"].nunique()))
-colf3.metric("🧾 Registros de fiado", int(len(df_fiado)))
+colf2.metric("👤 Clientes com fiado", int(len(com_fiado)))
+colf3.metric("🧾 Registros de fiado", int(com_fiado["LinhasFiado"].sum()))
 
 if not df_fiado.empty:
-    top_fiado = (df_fiado.groupby("Cliente")["ValorNum"].sum()
-                 .reset_index().sort_values("ValorNum", ascending=False).head(10))
+    top_fiado = (com_fiado.rename(columns={"Fiado": "ValorNum"})[["Cliente", "ValorNum"]]
+                 .sort_values("ValorNum", ascending=False).head(10))
     top_fiado["Valor Formatado"] = top_fiado["ValorNum"].apply(
         lambda x: f"R$ {x:,.2f}".replace(",", "v").replace(".", ",").replace("v", ".")
     )
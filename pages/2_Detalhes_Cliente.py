@@ -3,26 +3,21 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 from babel.dates import format_date
-import gspread
-from gspread_dataframe import get_as_dataframe
-from google.oauth2.service_account import Credentials
-import unicodedata
+
+from salao.base import base_analitica
+from salao.busca import buscar, seletor_cliente
+from salao.clientes import COL_CHAVE, chave_cliente
+from salao.indices import visitas as tabela_visitas
+from salao import fotos, telemetria
 
 st.set_page_config(layout="wide")
+telemetria.pagina("2_Detalhes_Cliente")
 st.title("💅 Detalhes da Cliente (Feminino)")
 
 # ========================
 # CONFIG DA PLANILHA
 # ========================
 SHEET_ID = "1qtOF1I7Ap4By2388ySThoVlZHbI3rAJv_haEcil0IUE"
-BASE_ALVOS = [
-    "base de dados feminino", "base de dados - feminino",
-    "base de dados (feminino)", "base de dados feminino "
-]
-STATUS_ALVOS = [
-    "clientes_status_feminino", "clientes status feminino",
-    "clientes_status feminino", "status_feminino"
-]
 
 # Logo padrão quando não houver foto válida
 FOTO_PADRAO = "https://res.cloudinary.com/db8ipmete/image/upload/v1752463905/Logo_sal%C3%A3o_kz9y9c.png"
@@ -30,32 +25,9 @@ FOTO_PADRAO = "https://res.cloudinary.com/db8ipmete/image/upload/v1752463905/Log
 # ========================
 # UTILS
 # ========================
-def parse_valor(v):
-    if pd.isna(v): return 0.0
-    if isinstance(v, (int, float)): return float(v)
-    s = str(v).strip().replace("\u00A0", "")
-    s = s.replace("R$", "").replace("r$", "").replace(" ", "")
-    tem_virg = "," in s
-    tem_ponto = "." in s
-    if tem_virg and tem_ponto:
-        s = s.replace(".", "").replace(",", ".")
-    elif tem_virg and not tem_ponto:
-        s = s.replace(",", ".")
-    try:
-        return float(s)
-    except Exception:
-        x = pd.to_numeric(s, errors="coerce")
-        return float(x) if pd.notna(x) else 0.0
-
 def moeda(v):
     return f"R$ {float(v):,.2f}".replace(",", "v").replace(".", ",").replace("v", ".")
 
-def norm_ws(s: str) -> str:
-    if s is None: return ""
-    s = str(s)
-    s = unicodedata.normalize("NFKD", s).encode("ASCII", "ignore").decode("ASCII")
-    return " ".join(s.lower().strip().split())
-
 def achar_col(df, nomes):
     alvo = [n.strip().lower() for n in nomes]
     for c in df.columns:
@@ -63,71 +35,32 @@ def achar_col(df, nomes):
             return c
     return None
 
-def find_worksheet(sh, alvos_norm):
-    wss = sh.worksheets()
-    titulos = [ws.title for ws in wss]
-    tnorms  = [norm_ws(t) for t in titulos]
-    for ws, t in zip(wss, tnorms):
-        if t in alvos_norm:  # match exato
-            return ws
-    for ws, t in zip(wss, tnorms):
-        if any(a in t for a in alvos_norm):  # contém
-            return ws
-    st.error("❌ Não encontrei a aba feminina. Guias disponíveis:\n- " + "\n- ".join(titulos))
-    st.stop()
-
-# ========================
-# CONEXÃO (usa secret correto, com fallback)
-# ========================
-@st.cache_resource
-def conectar_sheets():
-    # Usa a mesma chave das outras páginas: GCP_SERVICE_ACCOUNT
-    info = st.secrets.get("GCP_SERVICE_ACCOUNT") or st.secrets.get("gcp_service_account")
-    if not info:
-        st.error("Credenciais não encontradas em st.secrets['GCP_SERVICE_ACCOUNT'].")
-        st.stop()
-    scopes = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-    cred = Credentials.from_service_account_info(info, scopes=scopes)
-    return gspread.authorize(cred).open_by_key(SHEET_ID)
-
 # ========================
-# CARREGAR DADOS (via export CSV por gid para ser rápido)
+# CARREGAR DADOS (snapshot compartilhado: salao/base.py)
 # ========================
-@st.cache_data(ttl=300)
 def carregar_dados():
-    sh = conectar_sheets()
-    ws = find_worksheet(sh, [norm_ws(x) for x in BASE_ALVOS])
-    gid = ws.id
-    csv_url = f"https://docs.google.com/spreadsheets/d/{SHEET_ID}/export?format=csv&gid={gid}"
-    df = pd.read_csv(csv_url)
-
-    df.columns = [c.strip() for c in df.columns]
+    df = base_analitica()
 
     if "Data" not in df.columns:
         st.error("A aba feminina precisa ter a coluna 'Data'."); st.stop()
-    df["Data"] = pd.to_datetime(df["Data"], errors="coerce", dayfirst=True)
-    df = df.dropna(subset=["Data"]).copy()
-    df["Ano"] = df["Data"].dt.year.astype(int)
-    df["MesNum"] = df["Data"].dt.month
-    df["MesNome"] = df["Data"].dt.to_period("M").dt.to_timestamp().apply(
-        lambda x: format_date(x, "MMMM", locale="pt_BR").title()
-    )
+    df["MesNum"] = df["Mês"]
+    nomes_mes = {m: format_date(pd.Timestamp(2000, m, 1), "MMMM", locale="pt_BR").title()
+                 for m in df["MesNum"].unique()}
+    df["MesNome"] = df["MesNum"].map(nomes_mes)
 
     if "Serviço" not in df.columns and "Servico" in df.columns:
         df.rename(columns={"Servico": "Serviço"}, inplace=True)
 
     if "Valor" not in df.columns:
         st.error("A aba feminina precisa ter a coluna 'Valor'."); st.stop()
-    df["ValorNum"] = df["Valor"].apply(parse_valor)
 
     if "Conta" not in df.columns:
         df["Conta"] = "Indefinido"
-    df["Conta"] = df["Conta"].fillna("Indefinido").astype(str).str.strip().str.title()
+    df["Conta"] = df["Conta"].astype(str).replace("", "Indefinido").str.strip().str.title()
 
     if "Cliente" not in df.columns:
         st.error("A aba feminina precisa ter a coluna 'Cliente'."); st.stop()
-    df["ClienteRaw"]   = df["Cliente"].astype(str)
-    df["ClienteKey"]   = df["ClienteRaw"].str.strip().str.lower()
+    df["ClienteRaw"]   = df["Cliente"].astype(str)   # ClienteKey já vem da base (salao/clientes.py)
     df["ClienteLabel"] = df["ClienteRaw"].str.strip().str.title()
 
     # Foto na própria base (opcional)
@@ -140,28 +73,7 @@ def carregar_dados():
 
     return df, col_foto_base
 
-@st.cache_data(ttl=300)
-def carregar_status():
-    """Tenta carregar uma aba de status com coluna de foto."""
-    try:
-        sh = conectar_sheets()
-        ws = find_worksheet(sh, [norm_ws(x) for x in STATUS_ALVOS])
-        df = get_as_dataframe(ws).dropna(how="all")
-        df.columns = [c.strip() for c in df.columns]
-        if "Cliente" not in df.columns:
-            return pd.DataFrame()
-        df["ClienteKey"] = df["Cliente"].astype(str).str.strip().str.lower()
-        possiveis_col_foto = ["Foto", "Imagem", "Link Imagem", "Link", "URL", "Foto URL", "Imagem URL", "Foto_Url"]
-        col_foto = achar_col(df, possiveis_col_foto)
-        if not col_foto:
-            return pd.DataFrame()
-        df["FotoURL"] = df[col_foto].astype(str).str.strip()
-        return df[["ClienteKey", "FotoURL"]].dropna()
-    except Exception:
-        return pd.DataFrame()
-
 df, col_foto_base = carregar_dados()
-df_status = carregar_status()
 
 # ========================
 # SELECT DE CLIENTE
@@ -170,20 +82,19 @@ labels_por_key = (
     df.drop_duplicates("ClienteKey")[["ClienteKey", "ClienteLabel"]]
       .set_index("ClienteKey")["ClienteLabel"].to_dict()
 )
-opcoes_keys = sorted(labels_por_key.keys(), key=lambda k: labels_por_key[k])
 
 pre = st.session_state.get("cliente")
-pre_key = str(pre).strip().lower() if pre else None
-if pre_key not in labels_por_key:
-    pre_key = None
+if chave_cliente(pre) not in labels_por_key:
+    pre = None
 
+# busca pelo índice de clientes (salao/busca.py): sem termo, vem quem foi atendida por último
 st.subheader("👤 Cliente")
-cliente_key = st.selectbox(
-    "Cliente",
-    options=opcoes_keys,
-    index=(opcoes_keys.index(pre_key) if pre_key in opcoes_keys else 0) if opcoes_keys else None,
-    format_func=lambda k: labels_por_key.get(k, k.title()),
-)
+escolha = seletor_cliente("Cliente", key="detalhes_cliente", 
+                         padrao=pre or next(iter(buscar("", 1)["Cliente"]), None))
+cliente_key = chave_cliente(escolha)
+if cliente_key not in labels_por_key:
+    st.info("Escolha uma cliente com atendimento registrado.")
+    st.stop()
 cliente_label = labels_por_key.get(cliente_key, cliente_key.title())
 dados_cli_all = df[df["ClienteKey"] == cliente_key].copy()
 
@@ -196,10 +107,7 @@ def url_valida(u: str) -> bool:
     if s.lower() in {"nan", "none", "null", "0"}: return False
     return s.lower().startswith(("http://", "https://"))
 
-foto_url = None
-if not df_status.empty:
-    mapa_foto = dict(zip(df_status["ClienteKey"], df_status["FotoURL"]))
-    foto_url = mapa_foto.get(cliente_key)
+foto_url = fotos.mapa().get(cliente_key)   # aba de status, mapa compartilhado (salao/fotos.py)
 
 if (not url_valida(foto_url)) and col_foto_base:
     serie = dados_cli_all[col_foto_base].dropna().astype(str).str.strip()
@@ -254,8 +162,16 @@ if mes_sel != "Todos":
 # ========================
 col1, col2, col3, col4 = st.columns(4)
 total = float(dados_cli["ValorNum"].sum())
-visitas = int(dados_cli["Data"].dt.date.nunique())
-ticket_medio = dados_cli.groupby(dados_cli["Data"].dt.date)["ValorNum"].sum().mean()
+# visitas da tabela Cliente×Dia (salao/indices.py); grafias diferentes da mesma chave no mesmo dia = 1 visita
+vis_cli = tabela_visitas()
+vis_cli = vis_cli[vis_cli[COL_CHAVE] == cliente_key]
+if ano_sel != "Todos":
+    vis_cli = vis_cli[vis_cli["Ano"] == ano_sel]
+if mes_sel != "Todos":
+    vis_cli = vis_cli[vis_cli["Mês"] == int(meses_ordem.loc[meses_ordem["MesNome"] == mes_sel, "MesNum"].iloc[0])]
+por_dia = vis_cli.groupby("Dia")["Valor"].sum()
+visitas = int(len(por_dia))
+ticket_medio = por_dia.mean()
 ticket_medio = 0.0 if pd.isna(ticket_medio) else float(ticket_medio)
 fiado_total = float(dados_cli[dados_cli["Conta"].str.lower()=="fiado"]["ValorNum"].sum())
 
@@ -299,7 +215,7 @@ else:
     # ========================
     if "Serviço" in dados_cli.columns:
         serv = (
-            dados_cli.groupby("Serviço")["ValorNum"].sum()
+            dados_cli.groupby("Serviço", observed=True)["ValorNum"].sum()
             .reset_index().sort_values("ValorNum", ascending=False)
         )
         serv["Valor"] = serv["ValorNum"].apply(moeda)
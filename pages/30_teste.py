@@ -2,16 +2,18 @@
 # -*- coding: utf-8 -*-
 import streamlit as st
 import pandas as pd
-import gspread
-from google.oauth2.service_account import Credentials
-from gspread_dataframe import get_as_dataframe, set_with_dataframe
-from gspread.utils import rowcol_to_a1
 from datetime import datetime, date, timedelta
 import pytz
 import unicodedata
 import requests
 from collections import Counter
 
+from salao.base import anexar_linhas, base_bruta, snapshot
+from salao.busca import seletor_cliente
+from salao.clientes import chave_cliente
+from salao.indices import ja_existe, linhas_cliente
+from salao import fila, formatos, fotos, telemetria
+
 # =========================
 # CONFIG
 # =========================
@@ -19,7 +21,6 @@ SHEET_ID = "1qtOF1I7Ap4By2388ySThoVlZHbI3rAJv_haEcil0IUE"
 
 # >>> Abas FEMININO <<<
 ABA_DADOS = "Base de Dados Feminino"
-STATUS_ABA = "clientes_status_feminino"
 
 TZ = "America/Sao_Paulo"
 REL_MULT = 1.5
@@ -103,10 +104,6 @@ def _norm(s: str) -> str:
     return "".join(ch for ch in s if unicodedata.category(ch) != "Mn")
 
 
-def _canon(s: str) -> str:
-    s = _norm(s)
-    return "".join(ch for ch in s if ch.isalnum())
-
 
 def _norm_key(s: str) -> str:
     return unicodedata.normalize("NFKC", str(s).strip()).casefold()
@@ -179,58 +176,8 @@ def _fmt_brl(v: float) -> str:
 # =========================
 # SHEETS
 # =========================
-@st.cache_resource
-def conectar_sheets():
-    info = st.secrets["GCP_SERVICE_ACCOUNT"]
-    escopo = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-    credenciais = Credentials.from_service_account_info(info, scopes=escopo)
-    cliente = gspread.authorize(credenciais)
-    return cliente.open_by_key(SHEET_ID)
-
-
-def ler_cabecalho(aba):
-    try:
-        headers = aba.row_values(1)
-        return [h.strip() for h in headers] if headers else []
-    except Exception:
-        return []
-
-
-def _cmap(ws):
-    headers = ler_cabecalho(ws)
-    cmap = {}
-    for i, h in enumerate(headers):
-        k = _norm_key(h)
-        if k and k not in cmap:
-            cmap[k] = i + 1
-    return cmap
 
-
-def format_extras_numeric(ws):
-    cmap = _cmap(ws)
-
-    def fmt(name, ntype, pattern):
-        c = cmap.get(_norm_key(name))
-        if not c:
-            return
-        a1_from = rowcol_to_a1(2, c)
-        a1_to = rowcol_to_a1(50000, c)
-        try:
-            ws.format(f"{a1_from}:{a1_to}", {"numberFormat": {"type": ntype, "pattern": pattern}})
-        except Exception:
-            pass
-
-    fmt("ValorBrutoRecebido", "NUMBER", "0.00")
-    fmt("ValorLiquidoRecebido", "NUMBER", "0.00")
-    fmt("TaxaCartaoValor", "NUMBER", "0.00")
-    fmt("TaxaCartaoPct", "PERCENT", "0.00%")
-
-
-def carregar_base():
-    aba = conectar_sheets().worksheet(ABA_DADOS)
-    df = get_as_dataframe(aba).dropna(how="all")
-    df.columns = [str(c).strip() for c in df.columns]
-    df = df.loc[:, ~pd.Index(df.columns).duplicated(keep="first")]
+def _completar(df: pd.DataFrame) -> pd.DataFrame:
     for c in [*COLS_OFICIAIS, *COLS_FIADO, *COLS_PAG_EXTRAS]:
         if c not in df.columns:
             df[c] = ""
@@ -238,80 +185,58 @@ def carregar_base():
     df["Período"] = df["Período"].astype(str).str.strip().replace(norm)
     df.loc[~df["Período"].isin(["Manhã", "Tarde", "Noite"]), "Período"] = ""
     df["Combo"] = df["Combo"].fillna("")
-    return df, aba
-
-
-def salvar_base(df_final: pd.DataFrame):
-    aba = conectar_sheets().worksheet(ABA_DADOS)
-    headers_existentes = ler_cabecalho(aba) or [*COLS_OFICIAIS, *COLS_FIADO, *COLS_PAG_EXTRAS]
-    colunas_alvo = list(dict.fromkeys([*headers_existentes, *COLS_OFICIAIS, *COLS_FIADO, *COLS_PAG_EXTRAS]))
-    for c in colunas_alvo:
-        if c not in df_final.columns:
-            df_final[c] = ""
-    df_final = df_final[colunas_alvo]
-    aba.clear()
-    set_with_dataframe(aba, df_final, include_index=False, include_column_header=True)
+    return df
+
+def carregar_base():
+    """Base a partir do snapshot compartilhado (salao/base.py)."""
+    return _completar(base_bruta())
+
+def historico_cliente(cliente: str, snap=None, novas: list[dict] | None = None) -> pd.DataFrame:
+    """
+    Só as linhas do cliente (índice ClienteKey -> linhas do snapshot, sem varrer a base),
+    mais as `novas` dele que acabaram de ir para a fila de escrita.
+    """
+    d = linhas_cliente(cliente, snap=snap)
+    extra = [n for n in (novas or []) if chave_cliente(n.get("Cliente", "")) == chave_cliente(cliente)]
+    if extra:
+        d = pd.concat([d, pd.DataFrame(extra)], ignore_index=True)
+    return _completar(d)
+
+
+def _formatar_extras(_pedido):
     try:
-        format_extras_numeric(aba)
+        formatos.aplicar(ABA_DADOS)  # 1 batchUpdate, só se o formato ainda não foi aplicado
     except Exception:
         pass
 
+def salvar_base(novas: list[dict], ao_gravar=None):
+    """
+    Acrescenta só as linhas novas no fim da base (não reescreve o histórico).
+    Vai pela fila de escrita (salao/fila.py): volta na hora com o Pedido pendente;
+    o formato das colunas extras e ao_gravar(pedido) (ex.: cards) rodam depois que a gravação terminar.
+    """
+    def _gravado(pedido):
+        _formatar_extras(pedido)
+        if ao_gravar:
+            ao_gravar(pedido)
+    return anexar_linhas(novas, [*COLS_OFICIAIS, *COLS_FIADO, *COLS_PAG_EXTRAS],
+                         em_fila=True, ao_gravar=_gravado)
+
+def avisar_pendente(msg: str, com_card: bool = True):
+    st.info(f"⏳ {msg} — enviado para gravação na planilha."
+            + (" O card sai no Telegram assim que a gravação for confirmada." if com_card else "")
+            + " Erros de gravação aparecem na barra lateral.")
 
 # =========================
 # FOTOS (status sheet)
 # =========================
-FOTO_COL_CANDIDATES = [
-    "link_foto","foto","imagem","url_foto","foto_link","link","image",
-    "foto url","foto_url","link da foto","url","foto (url)"
-]
-
-@st.cache_data(show_spinner=False, ttl=120)
-def carregar_fotos_mapa():
-    try:
-        sh = conectar_sheets()
-        if STATUS_ABA not in [w.title for w in sh.worksheets()]:
-            return {}
-        ws = sh.worksheet(STATUS_ABA)
-        df = get_as_dataframe(ws).fillna("")
-        df.columns = [str(c).strip() for c in df.columns]
-        df = df.loc[:, ~pd.Index(df.columns).duplicated(keep="first")]
-        canon_map = {_canon(c): c for c in df.columns}
-        foto_col = None
-        for cand in FOTO_COL_CANDIDATES:
-            k = _canon(cand)
-            if k in canon_map:
-                foto_col = canon_map[k]; break
-        if not foto_col:
-            for c in df.columns:
-                cc = _canon(c)
-                if "foto" in cc and ("url" in cc or "link" in cc or "imagem" in cc or "image" in cc):
-                    foto_col = c; break
-        cli_col = None
-        for cand in ["cliente","nome","nome_cliente","cliente_nome","nome do cliente"]:
-            k = _canon(cand)
-            if k in canon_map:
-                cli_col = canon_map[k]; break
-        if not (foto_col and cli_col):
-            return {}
-        tmp = df[[cli_col, foto_col]].copy()
-        tmp.columns = ["Cliente", "Foto"]
-        tmp["k"] = tmp["Cliente"].astype(str).map(_norm)
-        return {r["k"]: str(r["Foto"]).strip() for _, r in tmp.iterrows() if str(r["Foto"]).strip()}
-    except Exception:
-        return {}
-
-
 def get_foto_url(nome: str, force_refresh: bool = False) -> str | None:
+    """Foto do mapa compartilhado (salao/fotos.py); force_refresh relê a aba de status."""
     if not nome:
         return None
     if force_refresh:
-        try:
-            carregar_fotos_mapa.clear()
-        except Exception:
-            pass
-    fotos = carregar_fotos_mapa()
-    url = fotos.get(_norm(nome))
-    return url if (url and url.strip()) else None
+        fotos.invalidar()
+    return fotos.foto_cliente(nome)
 
 
 # =========================
@@ -549,7 +474,10 @@ def make_card_caption_v2(
     return base
 
 
-def enviar_card(df_all, cliente, funcionario, data_str, servico=None, valor=None, combo=None, pct_func: float | None = None):
+def envios_card(df_all, cliente, funcionario, data_str, servico=None, valor=None, combo=None,
+                pct_func: float | None = None) -> list[tuple[str | None, str, str | None]]:
+    """Monta o card (foto, legenda, chat) de cada destino; quem envia é disparar_envios."""
+    # df_all: basta o histórico do cliente (historico_cliente); os filtros abaixo ficam pequenos
     if servico is None or valor is None:
         servico_label, valor_total, _, _, periodo_label, conta_label, fiado_status, venc = _resumo_do_dia(df_all, cliente, data_str)
     else:
@@ -585,27 +513,20 @@ def enviar_card(df_all, cliente, funcionario, data_str, servico=None, valor=None
     # - Meire: canal feminino + JP
     # - Outros: destino padrão
     if funcionario == "Daniela":
-        chat_d = _get_chat_id_dani()
-        if foto: tg_send_photo(foto, caption_base, chat_id=chat_d)
-        else:    tg_send(caption_base, chat_id=chat_d)
-        chat_jp = _get_chat_id_jp()
-        if foto: tg_send_photo(foto, caption_jp, chat_id=chat_jp)
-        else:    tg_send(caption_jp, chat_id=chat_jp)
-        return
-
+        return [(foto, caption_base, _get_chat_id_dani()), (foto, caption_jp, _get_chat_id_jp())]
     if funcionario == "Meire":
-        chat_fem = _get_chat_id_fem()
-        if foto: tg_send_photo(foto, caption_base, chat_id=chat_fem)
-        else:    tg_send(caption_base, chat_id=chat_fem)
-        chat_jp = _get_chat_id_jp()
-        if foto: tg_send_photo(foto, caption_jp, chat_id=chat_jp)
-        else:    tg_send(caption_jp, chat_id=chat_jp)
-        return
+        return [(foto, caption_base, _get_chat_id_fem()), (foto, caption_jp, _get_chat_id_jp())]
+    return [(foto, caption_base, _chat_id_por_func(funcionario))]
 
-    destino = _chat_id_por_func(funcionario)
-    if foto: tg_send_photo(foto, caption_base, chat_id=destino)
-    else:    tg_send(caption_base, chat_id=destino)
+def disparar_envios(envios: list[tuple[str | None, str, str | None]]):
+    """Manda os cards montados (pode rodar na thread da fila: não usa st.*)."""
+    for foto, caption, chat in envios:
+        if foto: tg_send_photo(foto, caption, chat_id=chat)
+        else:    tg_send(caption, chat_id=chat)
 
+def cards_ao_gravar(envios: list):
+    """ao_gravar para salvar_base: o card só sai depois que a linha está na planilha."""
+    return lambda _pedido: disparar_envios(envios)
 
 # =========================
 # VALORES DE SERVIÇO (exemplos)
@@ -638,21 +559,12 @@ def _preencher_fiado_vazio(linha: dict):
 
 
 def ja_existe_atendimento(cliente, data, servico, combo=""):
-    df, _ = carregar_base()
-    df["Combo"] = df["Combo"].fillna("")
-    servico_norm = _cap_first(servico)
-    df_serv_norm = df["Serviço"].astype(str).map(_cap_first)
-    f = (
-        (df["Cliente"].astype(str).str.strip() == cliente) &
-        (df["Data"].astype(str).str.strip() == data) &
-        (df_serv_norm == servico_norm) &
-        (df["Combo"].astype(str).str.strip() == str(combo).strip())
-    )
-    return not df[f].empty
+    # índice (Cliente, Data, Serviço, Combo) do snapshot: sem leitura no Sheets
+    return ja_existe(cliente, data, _cap_first(servico), combo)
 
 
-def sugestoes_do_cliente(df_all, cli, conta_default, periodo_default, funcionario_default):
-    d = df_all[df_all["Cliente"].astype(str).str.strip() == cli].copy()
+def sugestoes_do_cliente(cli, conta_default, periodo_default, funcionario_default):
+    d = historico_cliente(cli)
     if d.empty:
         return conta_default, periodo_default, funcionario_default
     d["_dt"] = pd.to_datetime(d["Data"], format=DATA_FMT, errors="coerce")
@@ -678,17 +590,19 @@ def sugestoes_do_cliente(df_all, cli, conta_default, periodo_default, funcionari
 # UI – Cabeçalho
 # =========================
 st.set_page_config(layout="wide", page_title="Adicionar Atendimento (Feminino)", page_icon="💇‍♀️")
+telemetria.pagina("30_teste")
+fila.status_sidebar()
 st.title("📅 Adicionar Atendimento (Feminino)")
 
 # =========================
 # DADOS BASE PARA SUGESTÕES
 # =========================
-df_existente, _ = carregar_base()
+df_existente = carregar_base()
 df_existente["_dt"] = pd.to_datetime(df_existente["Data"], format=DATA_FMT, errors="coerce")
 df_2025 = df_existente[df_existente["_dt"].dt.year == 2025]
 
-clientes_existentes = sorted(df_2025["Cliente"].dropna().unique())
-df_2025 = df_2025[df_2025["Serviço"].notna()].copy()
+clientes_existentes = sorted(c for c in df_2025["Cliente"].unique() if c)
+df_2025 = df_2025[df_2025["Serviço"].ne("")].copy()
 servicos_existentes = sorted(df_2025["Serviço"].str.strip().unique())
 contas_existentes = sorted([c for c in df_2025["Conta"].dropna().astype(str).str.strip().unique() if c])
 combos_existentes = sorted([c for c in df_2025["Combo"].dropna().astype(str).str.strip().unique() if c])
@@ -729,15 +643,18 @@ if not modo_lote:
     # Nome + botão refresh
     col_nome, col_refresh = st.columns([1, 0.25])
     with col_nome:
-        cliente = st.selectbox("Nome do Cliente", clientes_existentes)
+        cliente = seletor_cliente("Nome do Cliente", key="cliente_um")   # busca no índice (salao/busca.py)
     with col_refresh:
         if st.button("🔄 Atualizar foto"):
-            carregar_fotos_mapa.clear()
+            fotos.invalidar()
             st.toast("Fotos recarregadas.", icon="✅")
             st.rerun()
 
     novo_nome = st.text_input("Ou digite um novo nome de cliente")
     cliente = novo_nome if novo_nome else cliente
+    if not cliente:
+        st.info("Busque a cliente ou digite um nome novo.")
+        st.stop()
 
     # foto 200px
     foto_url = get_foto_url(cliente)
@@ -752,7 +669,7 @@ if not modo_lote:
     func_fallback = FUNCIONARIOS_FEM[0]  # Meire
 
     sug_conta, sug_periodo, sug_func = sugestoes_do_cliente(
-        df_existente, cliente,
+        cliente,
         conta_global or conta_fallback,
         periodo_global or periodo_fallback,
         funcionario_global or func_fallback
@@ -795,7 +712,7 @@ if not modo_lote:
     if funcionario == "Daniela":
         pct_func = st.number_input("Percentual da funcionária (Daniela) %", value=50.0, min_value=0.0, max_value=100.0, step=1.0)
 
-    ultimo = df_existente[df_existente["Cliente"] == cliente]
+    ultimo = historico_cliente(cliente)
     ultimo = ultimo.sort_values("Data", ascending=False).iloc[0] if not ultimo.empty else None
 
     combo = ""
@@ -853,7 +770,7 @@ if not modo_lote:
             if not registro_unico and duplicado:
                 st.warning("⚠️ Combo já registrado para este cliente e data.")
             else:
-                df_all, _ = carregar_base()
+                snap = snapshot()  # antes de salvar: as novas entram no card por fora
                 novas = []
                 usar_cartao_efetivo = (usar_cartao and not is_nao_cartao(conta) and not usar_fiado)
 
@@ -965,19 +882,17 @@ if not modo_lote:
                             novas[idx_ajuste]["TaxaCartaoValor"] = tsel
                             novas[idx_ajuste]["TaxaCartaoPct"] = round(psel, 4)
 
-                df_final = pd.concat([df_all, pd.DataFrame(novas)], ignore_index=True)
-                salvar_base(df_final)
-                st.session_state.combo_salvo = True
-                st.success(f"✅ Atendimento salvo com sucesso para {cliente} no dia {data}.")
-
-                # card
+                # card: montado agora, enviado quando a gravação terminar
                 valor_card = sum(float(n["Valor"]) for n in novas)
-                enviar_card(
-                    df_final, cliente, funcionario, data,
+                envios = envios_card(
+                    historico_cliente(cliente, snap, novas), cliente, funcionario, data,
                     servico=(combo.replace("+", " + ") if registro_unico else combo.replace("+", " + ")),
                     valor=valor_card, combo=combo,
                     pct_func=pct_func if funcionario == "Daniela" else None
                 )
+                salvar_base(novas, ao_gravar=cards_ao_gravar(envios))
+                st.session_state.combo_salvo = True
+                avisar_pendente(f"Atendimento de {cliente} no dia {data}")
 
     # ---------- SIMPLES ----------
     else:
@@ -1012,7 +927,7 @@ if not modo_lote:
             if ja_existe_atendimento(cliente, data, servico_norm):
                 st.warning("⚠️ Atendimento já registrado para este cliente, data e serviço.")
             else:
-                df_all, _ = carregar_base()
+                snap = snapshot()  # antes de salvar: as novas entram no card por fora
 
                 if usar_fiado:
                     # Fiado simples
@@ -1049,16 +964,14 @@ if not modo_lote:
                             "Tipo": tipo, "Período": periodo_opcao
                         })
 
-                df_final = pd.concat([df_all, pd.DataFrame([nova])], ignore_index=True)
-                salvar_base(df_final)
-                st.session_state.simples_salvo = True
-                st.success(f"✅ Atendimento salvo com sucesso para {cliente} no dia {data}.")
-
-                enviar_card(
-                    df_final, cliente, funcionario, data,
+                envios = envios_card(
+                    historico_cliente(cliente, snap, [nova]), cliente, funcionario, data,
                     servico=servico_norm, valor=float(nova["Valor"]), combo="",
                     pct_func=pct_func if funcionario == "Daniela" else None
                 )
+                salvar_base([nova], ao_gravar=cards_ao_gravar(envios))
+                st.session_state.simples_salvo = True
+                avisar_pendente(f"Atendimento de {cliente} no dia {data}")
 
 # =========================
 # MODO LOTE
@@ -1082,7 +995,7 @@ else:
                 st.image(f_url, width=200, caption=cli)
 
             sug_conta, sug_periodo, sug_func = sugestoes_do_cliente(
-                df_existente, cli, conta_global or "Carteira", periodo_global or "Manhã", funcionario_global or FUNCIONARIOS_FEM[0]
+                cli, conta_global or "Carteira", periodo_global or "Manhã", funcionario_global or FUNCIONARIOS_FEM[0]
             )
 
             tipo_at = st.radio(f"Tipo de atendimento para {cli}", ["Simples", "Combo"], horizontal=True, key=f"tipo_{_keyify(cli)}")
@@ -1248,7 +1161,7 @@ if combo_cli:
         if not lista_final:
             st.warning("Selecione ou informe ao menos um cliente.")
         else:
-            df_all, _ = carregar_base()
+            snap = snapshot()  # antes de salvar: as novas entram no card por fora
             novas, clientes_salvos = [], set()
             funcionario_por_cliente = {}
             pct_por_cliente = {}
@@ -1437,12 +1350,11 @@ if combo_cli:
             if not novas:
                 st.warning("Nenhuma linha válida para inserir.")
             else:
-                df_final = pd.concat([df_all, pd.DataFrame(novas)], ignore_index=True)
-                salvar_base(df_final)
-                st.success(f"✅ {len(novas)} linhas inseridas para {len(clientes_salvos)} cliente(s).")
-
+                envios = []
                 if enviar_cards:
                     for cli in sorted(clientes_salvos):
                         func_cli = funcionario_por_cliente.get(cli, FUNCIONARIOS_FEM[0])
                         pct = pct_por_cliente.get(cli) if func_cli == "Daniela" else None
-                        enviar_card(df_final, cli, func_cli, data, pct_func=pct)
+                        envios += envios_card(historico_cliente(cli, snap, novas), cli, func_cli, data, pct_func=pct)
+                salvar_base(novas, ao_gravar=cards_ao_gravar(envios) if envios else None)
+                avisar_pendente(f"{len(novas)} linhas de {len(clientes_salvos)} cliente(s)", com_card=bool(envios))
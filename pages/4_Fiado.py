@@ -6,14 +6,19 @@
 
 import streamlit as st
 import pandas as pd
-import gspread
 import requests
-from google.oauth2.service_account import Credentials
-from gspread_dataframe import get_as_dataframe
 from gspread.utils import rowcol_to_a1
 from datetime import date, datetime, timedelta
 from io import BytesIO
 import pytz, unicodedata
+import numpy as np
+
+from salao.base import COLS_DERIVADAS, anexar_linhas, base_bruta, invalidar as invalidar_base
+from salao.busca import seletor_cliente
+from salao.clientes import COL_CHAVE, chave_cliente, contem
+from salao.indices import baixar_fiados, dias_atraso, fiados_abertos, fiados_do_cliente, linhas_fiado, resumo_ids
+from salao.parsers import coerce_valor, so_dia
+from salao import fila, formatos, fotos, metadados, telemetria
 
 # =========================
 # TELEGRAM (com fallback)
@@ -84,37 +89,22 @@ def _norm_name(s: str) -> str:
 def chat_por_funcionario(funcionario: str) -> str:
     return _get_chat_id_fem() if _norm_name(funcionario) in FEMININO_FUNCS else _get_chat_id_jp()
 
-# =========================
-# FOTOS (clientes_status_feminino)
-# =========================
-STATUS_ABA = "clientes_status_feminino"
-FOTO_COL_CANDIDATES = ["link_foto", "foto", "imagem", "url_foto", "foto_link", "link", "image"]
+def envio_ao_gravar(foto: str | None, msg_html: str, destino: str | None):
+    """
+    ao_gravar da fila: a mensagem (e a cópia para JP) só sai depois que a gravação na planilha
+    terminar. Roda na thread da fila, então não usa st.*.
+    """
+    def _enviar(_pedido):
+        if foto: tg_send_photo(foto, msg_html, chat_id=destino)
+        else:    tg_send(msg_html, chat_id=destino)
+        if destino != _get_chat_id_jp():
+            if foto: tg_send_photo(foto, "🧾 <b>Cópia</b>\n" + msg_html, chat_id=_get_chat_id_jp())
+            else:    tg_send("🧾 <b>Cópia</b>\n" + msg_html, chat_id=_get_chat_id_jp())
+    return _enviar
 
-def _norm(s: str) -> str:
-    s = (s or "").strip().casefold()
-    s = unicodedata.normalize("NFD", s)
-    return "".join(ch for ch in s if unicodedata.category(ch) != "Mn")
-
-@st.cache_data(show_spinner=False)
-def carregar_fotos_mapa():
-    try:
-        sh = conectar_sheets()
-        if STATUS_ABA not in [w.title for w in sh.worksheets()]:
-            return {}
-        ws = sh.worksheet(STATUS_ABA)
-        df = get_as_dataframe(ws).fillna("")
-        df.columns = [str(c).strip() for c in df.columns]
-        df = df.loc[:, ~pd.Index(df.columns).duplicated(keep="first")]
-        cols_lower = {c.lower(): c for c in df.columns}
-        foto_col = next((cols_lower[c] for c in FOTO_COL_CANDIDATES if c in cols_lower), None)
-        cli_col  = next((cols_lower[c] for c in ["cliente","nome","nome_cliente"] if c in cols_lower), None)
-        if not (foto_col and cli_col): return {}
-        tmp = df[[cli_col, foto_col]].copy()
-        tmp.columns = ["Cliente", "Foto"]
-        tmp["k"] = tmp["Cliente"].astype(str).map(_norm)
-        return {r["k"]: str(r["Foto"]).strip() for _, r in tmp.iterrows() if str(r["Foto"]).strip()}
-    except Exception:
-        return {}
+def avisar_pendente(msg: str):
+    st.info(f"⏳ {msg} — enviado para gravação na planilha. A mensagem sai no Telegram assim que "
+            "a gravação for confirmada. Erros de gravação aparecem na barra lateral.")
 
 # =========================
 # UTILS
@@ -134,31 +124,23 @@ def _norm_key(s: str) -> str:
     return unicodedata.normalize("NFKC", str(s).strip()).casefold()
 
 def col_map(ws):
-    headers = ws.row_values(1); cmap = {}
-    for i, h in enumerate(headers):
-        k = _norm_key(h)
-        if k and k not in cmap: cmap[k] = i + 1
-    return cmap
+    return metadados.mapa_colunas(ws.title, _norm_key)  # cabeçalho guardado (salao/metadados.py), sem chamada
 
 def ensure_headers(ws, desired_headers):
-    headers = ws.row_values(1)
-    if not headers:
-        ws.append_row(desired_headers); return {h: i+1 for i, h in enumerate(desired_headers)}
-    missing = [h for h in desired_headers if h not in headers]
-    if missing:
-        ws.update('A1', [headers + missing]); headers = ws.row_values(1)
+    headers = metadados.garantir_colunas(ws.title, desired_headers)
     return {h: i+1 for i, h in enumerate(headers)}
 
 def append_rows_generic(ws, dicts, default_headers=None):
-    headers = ws.row_values(1)
+    headers = metadados.cabecalho(ws.title)
     if not headers:
         headers = default_headers or sorted({k for d in dicts for k in d.keys()}); ws.append_row(headers)
+        metadados.anotar_cabecalho(ws.title, headers)
     hdr_norm = [_norm_key(h) for h in headers]
     rows = []
     for d in dicts:
         d_norm = {_norm_key(k): v for k, v in d.items()}
         rows.append([d_norm.get(hn, "") for hn in hdr_norm])
-    if rows: ws.append_rows(rows, value_input_option="USER_ENTERED")
+    if rows: fila.anexar(ws.title, rows)  # fila de escrita: não trava a tela
 
 def contains_cartao(s: str) -> bool:
     KW = {"cart","cartao","cartão","credito","crédito","debito","débito","maquina","maquininha","pos",
@@ -182,7 +164,7 @@ def historico_cliente_por_ano(df_base: pd.DataFrame, cliente: str) -> dict[int,
     if df_base is None or df_base.empty or not cliente: return {}
     df = df_base.copy()
     df["__dt"] = pd.to_datetime(df["Data"], format="%d/%m/%Y", errors="coerce")
-    df["__valor"] = pd.to_numeric(df["Valor"], errors="coerce").fillna(0.0)
+    df["__valor"] = coerce_valor(df["Valor"])   # "30,00" / "R$ 1.234,56" (mesmo parser do ValorNum)
     df = df[(df["Cliente"].astype(str).str.strip() == str(cliente).strip()) & df["__dt"].notna()]
     if df.empty: return {}
     grp = df.groupby(df["__dt"].dt.year)["__valor"].sum().to_dict()
@@ -193,7 +175,7 @@ def breakdown_por_servico_no_ano(df_base: pd.DataFrame, cliente: str, ano: int,
         return pd.DataFrame(columns=["Serviço","Qtd","Total"]), 0, 0.0, 0, 0.0
     df = df_base.copy()
     df["__dt"] = pd.to_datetime(df["Data"], format="%d/%m/%Y", errors="coerce")
-    df["__valor"] = pd.to_numeric(df["Valor"], errors="coerce").fillna(0.0)
+    df["__valor"] = coerce_valor(df["Valor"])   # "30,00" / "R$ 1.234,56" (mesmo parser do ValorNum)
     df = df[(df["Cliente"].astype(str).str.strip() == str(cliente).strip()) & (df["__dt"].dt.year == ano)]
     if df.empty:
         return pd.DataFrame(columns=["Serviço","Qtd","Total"]), 0, 0.0, 0, 0.0
@@ -209,23 +191,19 @@ def breakdown_por_servico_no_ano(df_base: pd.DataFrame, cliente: str, ano: int,
     return top, total_qtd, total_val, outros_qtd, outros_val
 
 def format_extras_numeric(ws):
-    cmap = col_map(ws)
-    def fmt(name, ntype, pattern):
-        col = cmap.get(_norm_key(name))
-        if not col: return
-        a1_from = rowcol_to_a1(2, col); a1_to = rowcol_to_a1(50000, col)
-        try: ws.format(f"{a1_from}:{a1_to}", {"numberFormat": {"type": ntype, "pattern": pattern}})
-        except Exception: pass
-    fmt("ValorBrutoRecebido","NUMBER","0.00")
-    fmt("ValorLiquidoRecebido","NUMBER","0.00")
-    fmt("TaxaCartaoValor","NUMBER","0.00")
-    fmt("TaxaCartaoPct","PERCENT","0.00%")
+    """Formato numérico das colunas de pagamento: 1 batchUpdate, só quando ainda não aplicado (salao/formatos.py)."""
+    try:
+        formatos.aplicar(ws.title)
+    except Exception:
+        pass
 
 # =========================
 # APP / SHEETS (FEMININO)
 # =========================
 st.set_page_config(page_title="Fiado | Salão JP Feminino", page_icon="💅", layout="wide",
                    initial_sidebar_state="expanded")
+telemetria.pagina("4_Fiado")
+fila.status_sidebar()
 st.title("💳 Controle de Fiado — Feminino")
 
 SHEET_ID = "1qtOF1I7Ap4By2388ySThoVlZHbI3rAJv_haEcil0IUE"
@@ -258,63 +236,37 @@ COMISSAO_PERC_PADRAO = 0.50
 TAXAS_COLS = ["IDPagamento","Cliente","DataPag","Bandeira","Tipo","Parcelas","Bruto","Liquido","TaxaValor","TaxaPct","IDLancs"]
 PAGT_COLS  = ["IDPagamento","IDLancs","DataPagamento","Cliente","Forma","TotalLiquido","Obs","TotalBruto","TaxaValor","TaxaPct"]
 
-@st.cache_resource
-def conectar_sheets():
-    info = st.secrets["GCP_SERVICE_ACCOUNT"]
-    scopes = ["https://spreadsheets.google.com/feeds","https://www.googleapis.com/auth/drive"]
-    creds = Credentials.from_service_account_info(info, scopes=scopes)
-    gc = gspread.authorize(creds)
-    return gc.open_by_key(SHEET_ID)
-
-def garantir_aba(ss, nome, cols):
-    try:
-        ws = ss.worksheet(nome)
-    except gspread.WorksheetNotFound:
-        ws = ss.add_worksheet(title=nome, rows=200, cols=max(10, len(cols)))
-        ws.append_row(cols); return ws
-    if not ws.row_values(1): ws.append_row(cols)
-    return ws
-
-def read_base_raw(ss):
-    ws = garantir_aba(ss, ABA_BASE, BASE_COLS_ALL)
-    ensure_headers(ws, BASE_COLS_ALL)
-    df = get_as_dataframe(ws, evaluate_formulas=True, header=0)
-    df.columns = [str(c).strip() for c in df.columns]
-    df = df.loc[:, ~pd.Index(df.columns).duplicated(keep="first")]
+def garantir_aba(nome, cols):
+    return metadados.garantir_aba(nome, cols, linhas=200, colunas=max(10, len(cols)))
+
+def read_base_raw(revalidar: bool = False, linhas=None):
+    """
+    Base a partir do snapshot compartilhado (salao/base.py); vazios viram NaN como no get_as_dataframe.
+    linhas=[rótulos]: só essas linhas (ex.: as do índice de fiados em aberto).
+    """
+    df = base_bruta(revalidar)
+    if linhas is not None:
+        df = df.loc[linhas]
+    chave = df[COL_CHAVE]   # ClienteKey fica: buscas por cliente cruzam por ela
+    df = df.drop(columns=COLS_DERIVADAS)
+    df = df.replace("", np.nan)
     for c in BASE_COLS_ALL:
         if c not in df.columns: df[c] = ""
     df = df[[*BASE_COLS_ALL, *[c for c in df.columns if c not in BASE_COLS_ALL]]]
-    return df, ws
+    df[COL_CHAVE] = chave
+    return df
 
-def append_rows_base(ws, novas_dicts):
-    headers = ws.row_values(1)
-    if not headers: headers = BASE_COLS_ALL; ws.append_row(headers)
-    hdr_norm = [_norm_key(h) for h in headers]
-    rows = []
-    for d in novas_dicts:
-        d_norm = {_norm_key(k): v for k, v in d.items()}
-        rows.append([d_norm.get(hn, "") for hn in hdr_norm])
-    if rows: ws.append_rows(rows, value_input_option="USER_ENTERED")
-
-@st.cache_data
 def carregar_listas():
-    ss = conectar_sheets()
-    ws_base = garantir_aba(ss, ABA_BASE, BASE_COLS_ALL)
-    ensure_headers(ws_base, BASE_COLS_ALL)
-    df_list = get_as_dataframe(ws_base, evaluate_formulas=True, header=0).fillna("")
-    df_list.columns = [str(c).strip() for c in df_list.columns]
-    df_list = df_list.loc[:, ~pd.Index(df_list.columns).duplicated(keep="first")]
-    clientes = sorted([c for c in df_list.get("Cliente","").astype(str).str.strip().unique() if c])
+    df_list = base_bruta(colunas=["Combo", "Serviço", "Conta"])
     combos  = sorted([c for c in df_list.get("Combo","").astype(str).str.strip().unique() if c])
     servs   = sorted([s for s in df_list.get("Serviço","").astype(str).str.strip().unique() if s])
     contas_raw = [c for c in df_list.get("Conta","").astype(str).str.strip().unique() if c]
     base_contas = sorted([c for c in contas_raw if c.lower() != "fiado"])
     if "Nubank CNPJ" not in base_contas: base_contas.append("Nubank CNPJ")
-    return clientes, combos, servs, base_contas
+    return combos, servs, base_contas
 
 # ===== Caches
-clientes_exist, combos_exist, servs_exist, contas_exist = carregar_listas()
-FOTOS = carregar_fotos_mapa()
+combos_exist, servs_exist, contas_exist = carregar_listas()
 
 st.sidebar.header("Ações")
 acao = st.sidebar.radio("Escolha:", ["➕ Lançar fiado","💰 Registrar pagamento","📋 Em aberto & exportação"])
@@ -325,7 +277,7 @@ if acao == "➕ Lançar fiado":
 
     c1, c2 = st.columns(2)
     with c1:
-        cliente = st.selectbox("Cliente", options=[""] + clientes_exist, index=0)
+        cliente = seletor_cliente("Cliente", key="fiado_cliente", vazio="") or ""   # salao/busca.py
         if not cliente:
             cliente = st.text_input("Ou digite o nome do cliente", "")
         combo_str = st.selectbox("Combo (use '+')", [""] + combos_exist)
@@ -372,23 +324,9 @@ if acao == "➕ Lançar fiado":
                     "ValorBrutoRecebido":"", "ValorLiquidoRecebido":"", "TaxaCartaoValor":"", "TaxaCartaoPct":"",
                     "FormaPagDetalhe":"", "PagamentoID":""
                 })
-            ss = conectar_sheets()
-            ws_base = garantir_aba(ss, ABA_BASE, BASE_COLS_ALL)
-            ensure_headers(ws_base, BASE_COLS_ALL)
-            append_rows_base(ws_base, novas)
-
-            total = float(pd.to_numeric(pd.DataFrame(novas)["Valor"], errors="coerce").fillna(0).sum())
-            ws_l = garantir_aba(ss, ABA_LANC, ["IDLanc","Data","Cliente","Combo","Servicos","Total","Venc","Func","Fase","Tipo","Periodo"])
-            append_rows_generic(ws_l, [{
-                "IDLanc": idl, "Data": data_str, "Cliente": cliente, "Combo": combo_str,
-                "Servicos": "+".join(servicos), "Total": total, "Venc": venc_str, "Func": funcionario,
-                "Fase": fase, "Tipo": tipo, "Periodo": periodo
-            }])
-
-            st.success(f"Fiado criado para **{cliente}** — ID: {idl}.")
-            st.cache_data.clear()
+            total = float(coerce_valor(pd.DataFrame(novas)["Valor"]).sum())
 
-            # Envio: Feminino + cópia para JP
+            # Envio (Feminino + cópia para JP): montado agora, sai quando as linhas estiverem na base
             total_fmt = _fmt_brl(total)
             servicos_txt = combo_str.strip() if (combo_str and combo_str.strip()) else ("+".join(servicos) if servicos else "-")
             msg_html = (
@@ -400,39 +338,40 @@ if acao == "➕ Lançar fiado":
                 f"⏳ Vencimento: {venc_str or '-'}\n"
                 f"🆔 ID: <code>{idl}</code>"
             )
-            foto = FOTOS.get(_norm(cliente))
-            destino = chat_por_funcionario(funcionario)
-            if foto: tg_send_photo(foto, msg_html, chat_id=destino)
-            else:    tg_send(msg_html, chat_id=destino)
-            if destino != _get_chat_id_jp():
-                if foto: tg_send_photo(foto, "🧾 <b>Cópia</b>\n" + msg_html, chat_id=_get_chat_id_jp())
-                else:    tg_send("🧾 <b>Cópia</b>\n" + msg_html, chat_id=_get_chat_id_jp())
+            envio = envio_ao_gravar(fotos.foto_cliente(cliente), msg_html, chat_por_funcionario(funcionario))
+            anexar_linhas(novas, BASE_COLS_ALL, em_fila=True, ao_gravar=envio)  # só append, pela fila de escrita
+
+            ws_l = garantir_aba(ABA_LANC, ["IDLanc","Data","Cliente","Combo","Servicos","Total","Venc","Func","Fase","Tipo","Periodo"])
+            append_rows_generic(ws_l, [{
+                "IDLanc": idl, "Data": data_str, "Cliente": cliente, "Combo": combo_str,
+                "Servicos": "+".join(servicos), "Total": total, "Venc": venc_str, "Func": funcionario,
+                "Fase": fase, "Tipo": tipo, "Periodo": periodo
+            }])
+
+            avisar_pendente(f"Fiado de **{cliente}** (ID: {idl})")
+            st.cache_data.clear()
 
 # ---------- 2) Registrar pagamento ----------
 elif acao == "💰 Registrar pagamento":
     st.subheader("💰 Registrar pagamento — Feminino")
 
-    ss = conectar_sheets()
-    df_base_full, ws_base = read_base_raw(ss)
-
-    df_abertos = df_base_full[df_base_full.get("StatusFiado","") == "Em aberto"].copy()
-    clientes_abertos = sorted(df_abertos["Cliente"].dropna().astype(str).str.strip().unique().tolist())
+    # fiados em aberto: índice do snapshot (salao/indices.py), nada de varrer a base inteira
+    abertos = fiados_abertos()
+    clientes_abertos = sorted(abertos.linhas["Cliente"].loc[lambda s: s.ne("")].unique().tolist())
 
     colc1, colc2 = st.columns([1, 1])
     with colc1:
-        cliente_sel = st.selectbox("Cliente com fiado em aberto", options=[""] + clientes_abertos, index=0)
+        cliente_sel = seletor_cliente("Cliente com fiado em aberto", key="fiado_pagto_cliente",
+                                      nomes=clientes_abertos, vazio="") or ""
 
-    def ultima_forma_pagto_cliente(df_base, cliente):
-        if df_base.empty or not cliente: return None
-        df = df_base[(df_base["Cliente"] == cliente) & (df_base["Conta"].str.lower() != "fiado")].copy()
+    def ultima_forma_pagto_cliente(cliente):
+        if not cliente: return None
+        df = base_bruta(colunas=[COL_CHAVE, "Conta", "DataDT"])
+        df = df[(df[COL_CHAVE] == chave_cliente(cliente)) & (df["Conta"].astype(str).str.lower() != "fiado")]
         if df.empty: return None
-        try:
-            df["__d"] = pd.to_datetime(df["Data"], format=DATA_FMT, errors="coerce")
-            df = df.sort_values("__d", ascending=False)
-        except Exception: pass
-        return str(df.iloc[0]["Conta"]) if not df.empty else None
+        return str(df.sort_values("DataDT", ascending=False, kind="stable").iloc[0]["Conta"])
 
-    ultima = ultima_forma_pagto_cliente(df_base_full, cliente_sel) if cliente_sel else None
+    ultima = ultima_forma_pagto_cliente(cliente_sel) if cliente_sel else None
     lista_contas_default = ["Pix","Dinheiro","Cartão","Transferência","Pagseguro","Mercado Pago","Nubank CNPJ",
                             "SumUp","Cielo","Stone","Getnet","Outro"]
     contas_exist2 = sorted(set([*lista_contas_default]))
@@ -446,33 +385,14 @@ elif acao == "💰 Registrar pagamento":
     linhas_label_map, linhas_indices_sel = {}, []
 
     if cliente_sel:
-        grupo_cli = df_abertos[df_abertos["Cliente"].astype(str).str.strip() == str(cliente_sel).strip()].copy()
-
         if modo_sel.startswith("Por ID"):
-            grupo_cli["Data"]  = pd.to_datetime(grupo_cli["Data"], format=DATA_FMT, errors="coerce").dt.strftime(DATA_FMT)
-            grupo_cli["Valor"] = pd.to_numeric(grupo_cli["Valor"], errors="coerce").fillna(0)
-
-            def atraso_max(idval):
-                v = grupo_cli.loc[grupo_cli["IDLancFiado"] == idval, "VencimentoFiado"].dropna().astype(str)
-                try:
-                    vdt = pd.to_datetime(v.iloc[0], format=DATA_FMT, errors="coerce").date() if not v.empty else None
-                except Exception:
-                    vdt = None
-                if vdt:
-                    d = (date.today() - vdt).days
-                    return d if d > 0 else 0
-                return 0
-
-            resumo_ids = (
-                grupo_cli.groupby("IDLancFiado", as_index=False)
-                .agg(Data=("Data","min"), ValorTotal=("Valor","sum"), Qtde=("Serviço","count"), Combo=("Combo","first"))
-            )
-            for _, r in resumo_ids.iterrows():
-                atraso = atraso_max(r["IDLancFiado"])
-                badge = "Em dia" if atraso <= 0 else f"{int(atraso)}d atraso"
-                rotulo = f"{r['IDLancFiado']} • {r['Data']} • {int(r['Qtde'])} serv. • R$ {r['ValorTotal']:.2f} • {badge}"
-                if pd.notna(r["Combo"]) and str(r["Combo"]).strip(): rotulo += f" • {r['Combo']}"
-                ids_opcoes.append((r["IDLancFiado"], rotulo))
+            ids_cli = fiados_do_cliente(cliente_sel)
+            for idl, r in zip(ids_cli.index, ids_cli.itertuples(index=False)):
+                badge = "Em dia" if r.DiasAtraso <= 0 else f"{int(r.DiasAtraso)}d atraso"
+                data_txt = r.DataDT.strftime(DATA_FMT) if pd.notna(r.DataDT) else "-"
+                rotulo = f"{idl} • {data_txt} • {int(r.Qtde)} serv. • R$ {r.ValorTotal:.2f} • {badge}"
+                if r.Combo: rotulo += f" • {r.Combo}"
+                ids_opcoes.append((idl, rotulo))
 
             ids_valores = [i[0] for i in ids_opcoes]
             labels_id = {i: l for i, l in ids_opcoes}
@@ -484,13 +404,10 @@ elif acao == "💰 Registrar pagamento":
                 format_func=lambda x: labels_id.get(x, x),
             )
         else:
-            linhas_cli = grupo_cli.copy()
-            linhas_cli["IdxBase"] = linhas_cli.index
-            linhas_cli["DataFmt"] = pd.to_datetime(linhas_cli["Data"], format=DATA_FMT, errors="coerce").dt.strftime(DATA_FMT)
-            linhas_cli["ValorNum"] = pd.to_numeric(linhas_cli["Valor"], errors="coerce").fillna(0.0)
-            for _, r in linhas_cli.iterrows():
-                lbl = f"{r['IDLancFiado']} • {r['DataFmt'] or '-'} • {r['Serviço']} • R$ {r['ValorNum']:.2f} • {r['Funcionário']}"
-                linhas_label_map[int(r["IdxBase"])] = lbl
+            linhas_cli = linhas_fiado(cliente=cliente_sel)
+            datas = linhas_cli["DataDT"].dt.strftime(DATA_FMT).fillna("-")
+            for idx, r, data_txt in zip(linhas_cli.index, linhas_cli.itertuples(index=False), datas):
+                linhas_label_map[int(idx)] = f"{r.IDLancFiado} • {data_txt} • {r.Serviço} • R$ {r.Valor:.2f} • {r.Funcionário}"
             linhas_todas = list(linhas_label_map.keys())
             select_all_linhas = st.checkbox("Selecionar todas as linhas", value=False, disabled=not bool(linhas_todas))
             linhas_indices_sel = st.multiselect(
@@ -509,16 +426,16 @@ elif acao == "💰 Registrar pagamento":
     subset_preview = pd.DataFrame()
     if cliente_sel:
         if modo_sel.startswith("Por ID"):
-            subset_preview = df_abertos[df_abertos["IDLancFiado"].isin(id_selecionados)].copy()
+            subset_preview = linhas_fiado(ids=id_selecionados)
         else:
-            subset_preview = df_abertos[df_abertos.index.isin(linhas_indices_sel)].copy()
+            subset_preview = linhas_fiado(cliente=cliente_sel)
+            subset_preview = subset_preview[subset_preview.index.isin(linhas_indices_sel)]
 
     total_sel = 0.0
     valor_liquido_cartao = None
     bandeira_cartao = ""; tipo_cartao = "Crédito"; parcelas_cartao = 1
 
     if not subset_preview.empty:
-        subset_preview["Valor"] = pd.to_numeric(subset_preview["Valor"], errors="coerce").fillna(0)
         total_sel = float(subset_preview["Valor"].sum())
         st.info(f"Cliente: **{cliente_sel}** • Total bruto selecionado: **{_fmt_brl(total_sel)}**")
 
@@ -543,7 +460,8 @@ elif acao == "💰 Registrar pagamento":
 
     tem_sel = (bool(id_selecionados) if modo_sel.startswith("Por ID") else bool(linhas_indices_sel))
     if st.button("Registrar pagamento", use_container_width=True, disabled=not (cliente_sel and tem_sel and forma_pag)):
-        dfb, ws_base2 = read_base_raw(ss)
+        dfb = read_base_raw(revalidar=True)
+        ws_base2 = garantir_aba(ABA_BASE, BASE_COLS_ALL)
         ensure_headers(ws_base2, BASE_COLS_ALL); format_extras_numeric(ws_base2)
 
         mask = (dfb.get("IDLancFiado","").isin(id_selecionados)) if modo_sel.startswith("Por ID") else dfb.index.isin(linhas_indices_sel)
@@ -551,7 +469,7 @@ elif acao == "💰 Registrar pagamento":
             st.error("Nenhuma linha encontrada."); st.stop()
 
         subset_all = dfb[mask].copy()
-        subset_all["Valor"] = pd.to_numeric(subset_all["Valor"], errors="coerce").fillna(0)
+        subset_all["Valor"] = coerce_valor(subset_all["Valor"])   # mesmo parser do ValorNum: "30,00" não vira 0
         total_bruto = float(subset_all["Valor"].sum())
         data_pag_str = data_pag.strftime(DATA_FMT)
         id_pag = f"P-{datetime.now(TZ).strftime('%Y%m%d%H%M%S%f')[:-3]}"
@@ -579,11 +497,32 @@ elif acao == "💰 Registrar pagamento":
             for col, val in pairs.items():
                 c = headers_map.get(_norm_key(col))
                 if c: updates.append({"range": rowcol_to_a1(row_no, c), "values": [[val]]})
-        if updates: ws_base2.batch_update(updates, value_input_option="USER_ENTERED")
+        # Envio (Feminino + cópia JP): montado agora, sai quando a baixa estiver gravada na base
+        serv_txt = servicos_compactos_por_ids_parcial(subset_all)
+        ids_txt = ", ".join(sorted(set(subset_all["IDLancFiado"].astype(str))))
+        msg_html = (
+            "✅ <b>Fiado quitado (Feminino)</b>\n"
+            f"👤 Cliente: <b>{cliente_sel}</b>\n"
+            f"🧰 Serviço(s): <b>{serv_txt}</b>\n"
+            f"💳 Forma: <b>{forma_pag}</b>\n"
+            f"💵 Bruto: <b>{_fmt_brl(total_bruto)}</b>\n"
+            f"💵 Líquido: <b>{_fmt_brl(total_liquido)}</b>\n"
+            f"🧾 Taxa: <b>{_fmt_brl(taxa_total_valor)} ({_fmt_pct(taxa_total_pct)})</b>\n"
+            f"📅 Data pagto: {data_pag_str}\n"
+            f"🗂️ IDs: <code>{ids_txt}</code>\n"
+            f"📝 Obs: {obs or '-'}"
+        )
+        envio = envio_ao_gravar(fotos.foto_cliente(cliente_sel), msg_html, _get_chat_id_fem())
+
+        def _baixa_gravada(pedido):
+            invalidar_base()
+            envio(pedido)
+        if updates: fila.corrigir(ABA_BASE, updates, ao_gravar=_baixa_gravada)
+        baixar_fiados(subset_all.index)   # some do seletor já, sem esperar a gravação/releitura
 
         # logs extras
         if contains_cartao(forma_pag):
-            ws_taxas = garantir_aba(ss, ABA_TAXAS, TAXAS_COLS)
+            ws_taxas = garantir_aba(ABA_TAXAS, TAXAS_COLS)
             ensure_headers(ws_taxas, TAXAS_COLS)
             append_rows_generic(ws_taxas, [{
                 "IDPagamento": id_pag, "Cliente": cliente_sel, "DataPag": data_pag_str, "Bandeira": bandeira_cartao,
@@ -592,7 +531,7 @@ elif acao == "💰 Registrar pagamento":
                 "IDLancs": ";".join(sorted(set(subset_all["IDLancFiado"].astype(str))))
             }], default_headers=TAXAS_COLS)
 
-        ws_p = garantir_aba(ss, ABA_PAGT, PAGT_COLS)
+        ws_p = garantir_aba(ABA_PAGT, PAGT_COLS)
         ensure_headers(ws_p, PAGT_COLS)
         append_rows_generic(ws_p, [{
             "IDPagamento": id_pag, "IDLancs": ";".join(sorted(set(subset_all["IDLancFiado"].astype(str)))),
@@ -601,42 +540,18 @@ elif acao == "💰 Registrar pagamento":
             "TaxaValor": round(taxa_total_valor,2), "TaxaPct": round(taxa_total_pct,4),
         }], default_headers=PAGT_COLS)
 
-        st.success(f"Pagamento registrado para **{cliente_sel}**. Líquido: {_fmt_brl(total_liquido)} (bruto {_fmt_brl(total_bruto)}).")
+        avisar_pendente(f"Pagamento de **{cliente_sel}** — líquido {_fmt_brl(total_liquido)} (bruto {_fmt_brl(total_bruto)})")
         st.cache_data.clear()
 
-        # Envio: Feminino + cópia JP
-        serv_txt = servicos_compactos_por_ids_parcial(subset_all)
-        ids_txt = ", ".join(sorted(set(subset_all["IDLancFiado"].astype(str))))
-        msg_html = (
-            "✅ <b>Fiado quitado (Feminino)</b>\n"
-            f"👤 Cliente: <b>{cliente_sel}</b>\n"
-            f"🧰 Serviço(s): <b>{serv_txt}</b>\n"
-            f"💳 Forma: <b>{forma_pag}</b>\n"
-            f"💵 Bruto: <b>{_fmt_brl(total_bruto)}</b>\n"
-            f"💵 Líquido: <b>{_fmt_brl(total_liquido)}</b>\n"
-            f"🧾 Taxa: <b>{_fmt_brl(taxa_total_valor)} ({_fmt_pct(taxa_total_pct)})</b>\n"
-            f"📅 Data pagto: {data_pag_str}\n"
-            f"🗂️ IDs: <code>{ids_txt}</code>\n"
-            f"📝 Obs: {obs or '-'}"
-        )
-        foto = FOTOS.get(_norm(cliente_sel))
-        destino = _get_chat_id_fem()
-        if foto: tg_send_photo(foto, msg_html, chat_id=destino)
-        else:    tg_send(msg_html, chat_id=destino)
-        if destino != _get_chat_id_jp():
-            if foto: tg_send_photo(foto, "🧾 <b>Cópia</b>\n" + msg_html, chat_id=_get_chat_id_jp())
-            else:    tg_send("🧾 <b>Cópia</b>\n" + msg_html, chat_id=_get_chat_id_jp())
-
 # ---------- 3) Em aberto & exportação ----------
 else:
     st.subheader("📋 Fiados em aberto — Feminino (agrupados por ID)")
-    ss = conectar_sheets()
-    df_base_full, _ = read_base_raw(ss)
+    abertos = fiados_abertos()
 
-    if df_base_full.empty:
+    if base_bruta(colunas=["SheetRow"]).empty:
         st.info("Sem dados.")
     else:
-        em_aberto = df_base_full[df_base_full.get("StatusFiado","") == "Em aberto"].copy()
+        em_aberto = abertos.linhas
         if em_aberto.empty:
             st.success("Nenhum fiado em aberto 🎉")
         else:
@@ -644,30 +559,22 @@ else:
             with colf1:
                 filtro_cliente = st.text_input("Filtrar por cliente (opcional)", "")
                 if filtro_cliente.strip():
-                    em_aberto = em_aberto[
-                        em_aberto["Cliente"].astype(str).str.contains(filtro_cliente.strip(), case=False, na=False)
-                    ]
+                    em_aberto = em_aberto[contem(em_aberto[COL_CHAVE], filtro_cliente)]
             with colf2:
-                funcs = sorted(em_aberto["Funcionário"].dropna().astype(str).unique().tolist())
+                funcs = sorted(f for f in em_aberto["Funcionário"].unique() if f)
                 filtro_func = st.selectbox("Filtrar por funcionária (opcional)", [""] + funcs)
                 if filtro_func:
                     em_aberto = em_aberto[em_aberto["Funcionário"] == filtro_func]
 
-            hoje = date.today()
-            def parse_dt(x):
-                try: return datetime.strptime(str(x), DATA_FMT).date()
-                except Exception: return None
-            em_aberto["__venc"] = em_aberto["VencimentoFiado"].apply(parse_dt)
-            em_aberto["DiasAtraso"] = em_aberto["__venc"].apply(lambda d: (hoje - d).days if (d and hoje>d) else 0)
-            em_aberto["Situação"] = em_aberto["DiasAtraso"].apply(lambda n: "Em dia" if n<=0 else f"{int(n)}d atraso")
-
-            em_aberto["Valor"] = pd.to_numeric(em_aberto["Valor"], errors="coerce").fillna(0)
-            resumo = (
-                em_aberto.groupby(["IDLancFiado","Cliente"], as_index=False)
-                .agg(ValorTotal=("Valor","sum"), QtdeServicos=("Serviço","count"),
-                     Combo=("Combo","first"), MaxAtraso=("DiasAtraso","max"))
-            )
-            resumo["Situação"] = resumo["MaxAtraso"].apply(lambda n: "Em dia" if n<=0 else f"{int(n)}d atraso")
+            def situacao(dias: pd.Series) -> pd.Series:
+                return pd.Series(np.where(dias > 0, dias.astype(str) + "d atraso", "Em dia"), index=dias.index)
+
+            # sem filtro, o resumo por ID já vem pronto do índice; com filtro, resume só as linhas filtradas
+            filtrado = len(em_aberto) != len(abertos.linhas)
+            resumo = (resumo_ids(em_aberto) if filtrado else abertos.ids).rename(columns={"Qtde": "QtdeServicos"})
+            resumo["MaxAtraso"] = dias_atraso(resumo["Vencimento"])
+            resumo["Situação"] = situacao(resumo["MaxAtraso"])
+            resumo = resumo.rename_axis("IDLancFiado").reset_index()
 
             st.dataframe(
                 resumo.sort_values(["MaxAtraso","ValorTotal"], ascending=[False, False])[[
@@ -679,14 +586,20 @@ else:
             total = float(resumo["ValorTotal"].sum())
             st.metric("Total em aberto", _fmt_brl(total))
 
+            # exportação: linhas completas da base, só as que estão em aberto (e filtradas)
+            em_aberto = read_base_raw(linhas=em_aberto.index).assign(
+                Valor=em_aberto["Valor"], __venc=so_dia(em_aberto["Vencimento"]))
+            em_aberto["DiasAtraso"] = dias_atraso(abertos.linhas.loc[em_aberto.index, "Vencimento"])
+            em_aberto["Situação"] = situacao(em_aberto["DiasAtraso"])
+
             try:
                 from openpyxl import Workbook  # noqa
                 buf = BytesIO()
                 with pd.ExcelWriter(buf, engine="openpyxl") as w:
-                    em_aberto.sort_values(["Cliente","IDLancFiado","Data"]).to_excel(
+                    em_aberto.drop(columns=COL_CHAVE).sort_values(["Cliente","IDLancFiado","Data"]).to_excel(
                         w, index=False, sheet_name="Fiado_Em_Aberto_Fem"
                     )
                 st.download_button("⬇️ Exportar (Excel)", data=buf.getvalue(), file_name="fiado_em_aberto_feminino.xlsx")
             except Exception:
-                csv_bytes = em_aberto.sort_values(["Cliente","IDLancFiado","Data"]).to_csv(index=False).encode("utf-8-sig")
+                csv_bytes = em_aberto.drop(columns=COL_CHAVE).sort_values(["Cliente","IDLancFiado","Data"]).to_csv(index=False).encode("utf-8-sig")
                 st.download_button("⬇️ Exportar (CSV)", data=csv_bytes, file_name="fiado_em_aberto_feminino.csv")
@@ -3,12 +3,23 @@
 
 import streamlit as st
 import pandas as pd
-import gspread, json, os, pytz, unicodedata, requests, random, string, re
+import gspread, json, os, pytz, unicodedata, requests, random, string
 from google.oauth2.service_account import Credentials
 from gspread_dataframe import get_as_dataframe, set_with_dataframe
 from gspread.utils import rowcol_to_a1
 from datetime import datetime, date, time as dt_time
 
+from salao.base import anexar_linhas, base_bruta, snapshot
+from salao.busca import seletor_cliente
+from salao.clientes import chave_cliente, chaves_clientes
+from salao.indices import ja_existe, preco_servicos
+from salao.parsers import parse_datas
+from salao.sheets import autorizar
+from salao import fila, fotos, metadados, telemetria
+
+telemetria.pagina("5_Agendamento")
+fila.status_sidebar()
+
 # =========================
 # CONFIG
 # =========================
@@ -21,7 +32,6 @@ TZ = "America/Sao_Paulo"
 DATA_FMT = "%d/%m/%Y"; HORA_FMT = "%H:%M:%S"
 
 PHOTO_FALLBACK_URL = "https://res.cloudinary.com/db8ipmete/image/upload/v1752463905/Logo_sal%C3%A3o_kz9y9c.png"
-FOTO_COL_CANDIDATES = ["link_foto","foto","imagem","url_foto","foto_link","link","image","foto_url"]
 
 # Telegram
 TELEGRAM_TOKEN = st.secrets.get("TELEGRAM_TOKEN", "8257359388:AAGayJElTPT0pQadtamVf8LoL7R6EfWzFGE")
@@ -30,6 +40,7 @@ CHAT_ID_FEMININO = st.secrets.get("TELEGRAM_CHAT_ID_FEMININO", "-1002965378062")
 
 FUNCIONARIOS_FEM = ["Meire","Daniela"]
 FUNCIONARIO_PADRAO = "Meire"
+JANELA_PRECO_DIAS = 120   # valor sugerido = mediana do serviço nesses últimos dias (sem atendimento: histórico todo)
 
 # =========================
 # Utils
@@ -57,20 +68,6 @@ def send_tg_msg(text):
         st.warning(f"Falha Telegram: {e}")
 
 # ----------- FOTO: Normalização + Verificação + Envio robusto -----------
-def normalize_photo_url(u: str) -> str:
-    if not isinstance(u, str) or not u:
-        return PHOTO_FALLBACK_URL
-    u = u.strip()
-    m = re.search(r"drive\.google\.com/file/d/([^/]+)/", u)
-    if m:
-        file_id = m.group(1)
-        return f"https://drive.google.com/uc?export=view&id={file_id}"
-    m = re.search(r"drive\.google\.com/(?:open|uc)\?[^#]*id=([^&]+)", u)
-    if m:
-        file_id = m.group(1)
-        return f"https://drive.google.com/uc?export=view&id={file_id}"
-    return u
-
 def check_url_ok(url: str) -> bool:
     try:
         r = requests.head(url, timeout=6, allow_redirects=True)
@@ -108,6 +105,19 @@ def send_tg_photo(photo_url, caption):
     for chat_id in (CHAT_ID_FEMININO, CHAT_ID_JPAULO):
         _telegram_photo(chat_id, photo_url, caption)
 
+def cards_ao_gravar(cards: list[tuple[str, str]], resumo: str | None = None):
+    """ao_gravar da fila: os cards (foto, legenda) e o resumo só saem depois que a gravação terminar."""
+    def _enviar(_pedido):
+        for foto, caption in cards:
+            send_tg_photo(foto, caption)
+        if resumo:
+            send_tg_msg(resumo)
+    return _enviar
+
+def avisar_pendente(msg: str):
+    st.info(f"⏳ {msg} — enviado para gravação na planilha. O card sai no Telegram assim que "
+            "a gravação for confirmada. Erros de gravação aparecem na barra lateral.")
+
 def card_confirmacao(c, s, v, conta, f, d, h, obs, ida, fiado=False, venc=""):
     val = "-" if v in ("", None) else f"R$ {float(v):.2f}".replace(".", ",")
     extra = f"\n🧾 <b>Condição:</b> {'Fiado (venc. '+venc+')' if fiado else 'Pago'}"
@@ -141,12 +151,12 @@ def conectar_sheets():
         "https://www.googleapis.com/auth/spreadsheets",
         "https://www.googleapis.com/auth/drive"
     ])
-    return gspread.authorize(creds)
+    return autorizar(creds)
 
 # Abre a planilha com tratamento de erro
 try:
-    gc = conectar_sheets()
-    sh = gc.open_by_key(SHEET_ID)
+    conectar_sheets()   # credenciais + e-mail da conta de serviço (para a mensagem abaixo)
+    metadados.abas()    # abas e cabeçalhos guardados no processo (salao/metadados.py)
 except gspread.exceptions.APIError as e:
     st.error(
         "❌ Não consegui abrir a planilha pelo ID.\n\n"
@@ -161,10 +171,7 @@ except Exception as e:
     st.stop()
 
 def abrir_ws(nome):
-    try:
-        return sh.worksheet(nome)
-    except gspread.WorksheetNotFound:
-        return sh.add_worksheet(title=nome, rows=3000, cols=60)
+    return metadados.garantir_aba(nome, linhas=3000, colunas=60)
 
 COLS_AGENDA = [
     "IDAgenda","Data","Hora","Cliente","Serviço","Valor","Conta","Funcionário",
@@ -172,18 +179,24 @@ COLS_AGENDA = [
 ]
 
 def garantir_estrutura_agenda():
+    if all(c in metadados.cabecalho(ABA_AGENDAMENTO) for c in COLS_AGENDA):
+        return  # cabeçalho guardado já está completo: nada a ler
     ws = abrir_ws(ABA_AGENDAMENTO)
     df = get_as_dataframe(ws, header=0)
     if df.empty or any(c not in df.columns for c in COLS_AGENDA):
         ws.clear(); ws.update(rowcol_to_a1(1,1), [COLS_AGENDA])
+        metadados.anotar_cabecalho(ABA_AGENDAMENTO, COLS_AGENDA)
 garantir_estrutura_agenda()
 
 def garantir_estrutura_status_fem():
+    base = ["Cliente","Status","Foto","Observação"]
+    if all(c in metadados.cabecalho(ABA_STATUS_FEM) for c in base):
+        return
     ws = abrir_ws(ABA_STATUS_FEM)
     df = get_as_dataframe(ws, header=0, evaluate_formulas=False).dropna(how="all")
-    base = ["Cliente","Status","Foto","Observação"]
     if df.empty:
-        ws.clear(); ws.update(rowcol_to_a1(1,1), [base]); return
+        ws.clear(); ws.update(rowcol_to_a1(1,1), [base])
+        metadados.anotar_cabecalho(ABA_STATUS_FEM, base); return
     changed = False
     for c in base:
         if c not in df.columns:
@@ -192,6 +205,7 @@ def garantir_estrutura_status_fem():
     if changed:
         outros = [c for c in df.columns if c not in base]
         set_with_dataframe(ws, df[base + outros], include_index=False, include_column_header=True, resize=True)
+        metadados.anotar_cabecalho(ABA_STATUS_FEM, [str(c) for c in base + outros])
 
 def carregar_df(aba):
     ws = abrir_ws(aba)
@@ -202,25 +216,37 @@ def carregar_df(aba):
         df = df[COLS_AGENDA]
     return df
 
-def salvar_df(aba, df):
-    ws = abrir_ws(aba)
-    if df.empty:
-        ws.clear(); ws.update(rowcol_to_a1(1,1), [list(df.columns)])
+def anexar_registros(aba, registros: list[dict], ao_gravar=None):
+    """Acrescenta registros no fim da aba pela fila de escrita (na ordem do cabeçalho da aba)."""
+    headers = metadados.cabecalho(aba)
+    linhas = [["" if pd.isna(r.get(h, "")) else r.get(h, "") for h in headers] for r in registros]
+    return fila.anexar(aba, linhas, ao_gravar)
+
+def corrigir_registros(aba, alteracoes: dict, ao_gravar=None):
+    """
+    Corrige células pela fila de escrita, sem reescrever a aba.
+    alteracoes: {índice do carregar_df: {coluna: valor}} (índice 0 = linha 2 do Sheets).
+    """
+    headers = metadados.cabecalho(aba)
+    pos = {h: i + 1 for i, h in enumerate(headers)}
+    faixas = [{"range": rowcol_to_a1(int(idx) + 2, pos[c]), "values": [[v]]}
+              for idx, campos in alteracoes.items() for c, v in campos.items() if c in pos]
+    return fila.corrigir(aba, faixas, ao_gravar)
+
+def marcar_atendidos(ids: list[str], quando: str):
+    """Status 'Atendido' + Atendido_em nos agendamentos dos IDs (pela fila de escrita)."""
+    if not ids:
         return
-    ws.clear()
-    set_with_dataframe(ws, df, include_index=False, include_column_header=True, resize=True)
+    df_ag = carregar_df(ABA_AGENDAMENTO)
+    atendidos = df_ag.index[df_ag["IDAgenda"].astype(str).isin(ids)]
+    corrigir_registros(ABA_AGENDAMENTO, {i: {"Status": "Atendido", "Atendido_em": quando} for i in atendidos})
 
 # -------------------------
 # Auxiliares (Clientes, Serviços, Combos, Foto)
 # -------------------------
 @st.cache_data(show_spinner=False)
-def clientes_existentes():
+def _clientes_status():
     nomes = set()
-    try:
-        df = carregar_df(ABA_DADOS_FEM)
-        if "Cliente" in df.columns:
-            for x in df["Cliente"].dropna().astype(str): nomes.add(x.strip())
-    except: pass
     try:
         df2 = carregar_df(ABA_STATUS_FEM)
         nome_col = None
@@ -230,71 +256,44 @@ def clientes_existentes():
         if nome_col:
             for x in df2[nome_col].dropna().astype(str): nomes.add(x.strip())
     except: pass
+    return nomes
+
+def clientes_existentes():
+    nomes = set(_clientes_status())
+    try:
+        df = base_bruta(colunas=["Cliente"])
+        if "Cliente" in df.columns:
+            nomes.update(x for x in df["Cliente"].unique() if x)
+    except: pass
     return sorted(nomes, key=lambda s: norm(s))
 
-@st.cache_data(show_spinner=False)
 def servicos_e_combos():
     servs, combs = [], []
     try:
-        df = carregar_df(ABA_DADOS_FEM)
+        df = base_bruta(colunas=["Serviço", "Combo"])
         if not df.empty:
             if "Serviço" in df.columns:
-                servs = [s for s in df["Serviço"].dropna().astype(str) if s.strip()]
+                servs = [s for s in df["Serviço"].unique() if s]
             if "Combo" in df.columns:
-                combs = [c for c in df["Combo"].dropna().astype(str) if c.strip()]
+                combs = [c for c in df["Combo"].unique() if c]
     except: pass
     servs = [(s[:1].upper() + s[1:]).strip() for s in servs]
     return sorted(set(servs), key=lambda s: norm(s)), sorted(set(combs), key=lambda s: norm(s))
 
 def preco_sugerido(servico):
+    # mediana do serviço nos últimos JANELA_PRECO_DIAS (tabela do snapshot: salao/indices.py)
     try:
-        df = carregar_df(ABA_DADOS_FEM)
-        if {"Data","Serviço","Valor"}.issubset(df.columns):
-            datas = pd.to_datetime(df["Data"], format=DATA_FMT, errors="coerce")
-            agosto = (datas.dt.month == 8) & (datas.dt.year == 2025)
-            m = df[agosto & (df["Serviço"].astype(str).str.lower() == servico.lower())]
-            vals = pd.to_numeric(m["Valor"], errors="coerce").dropna()
-            if not vals.empty:
-                return round(float(vals.median()), 2)
+        t = preco_servicos(JANELA_PRECO_DIAS)
+        k = str(servico or "").strip().lower()
+        if k in t.index:
+            return round(float(t.at[k, "Mediana"]), 2)
     except Exception as e:
         print("preco_sugerido erro:", e)
     return None
 
 def foto_do_cliente(cliente: str) -> str:
-    def _norm(s: str) -> str:
-        if not isinstance(s, str): return ""
-        return "".join(ch for ch in unicodedata.normalize("NFKD", s.strip().lower()) if not unicodedata.combining(ch))
-    if not cliente:
-        return PHOTO_FALLBACK_URL
-    try:
-        df = carregar_df(ABA_STATUS_FEM)
-        if df.empty:
-            return PHOTO_FALLBACK_URL
-        nome_col = None
-        for col in df.columns:
-            if _norm(col) in ("cliente","nome","nome_cliente"):
-                nome_col = col; break
-        if not nome_col:
-            return PHOTO_FALLBACK_URL
-        foto_col = None
-        cand_norm = {_norm(x) for x in FOTO_COL_CANDIDATES}
-        for col in df.columns:
-            if _norm(col) in cand_norm:
-                foto_col = col; break
-        if not foto_col:
-            return PHOTO_FALLBACK_URL
-        df["_k"] = df[nome_col].astype(str).apply(_norm)
-        row = df[df["_k"] == _norm(cliente)].head(1)
-        if row.empty:
-            return PHOTO_FALLBACK_URL
-        url = str(row.iloc[0][foto_col]).strip()
-        if not url.startswith(("http://","https://")):
-            return PHOTO_FALLBACK_URL
-        url = normalize_photo_url(url)
-        return url or PHOTO_FALLBACK_URL
-    except Exception as e:
-        print("foto_do_cliente erro:", e)
-        return PHOTO_FALLBACK_URL
+    # mapa ClienteKey -> URL (já normalizada) guardado no processo: salao/fotos.py
+    return fotos.foto_cliente(cliente) or PHOTO_FALLBACK_URL
 
 # =========================
 # UI
@@ -332,26 +331,16 @@ if acao.startswith("➕"):
                 for c in ["Cliente","Status","Foto","Observação"]:
                     if c not in df_status.columns:
                         df_status[c] = ""
-                chave = df_status["Cliente"].astype(str).apply(norm)
-                m = chave == norm(nome_novo)
+                m = chaves_clientes(df_status["Cliente"]) == chave_cliente(nome_novo)
+                campos = {"Status": status_novo, "Foto": foto_nova.strip(), "Observação": obs_nova.strip()}
+                def limpar_cache(_p):
+                    _clientes_status.clear()
+                    fotos.invalidar()
                 if m.any():
-                    idx = m.idxmax()
-                    df_status.loc[idx, "Status"] = status_novo
-                    df_status.loc[idx, "Foto"] = foto_nova.strip()
-                    df_status.loc[idx, "Observação"] = obs_nova.strip()
+                    corrigir_registros(ABA_STATUS_FEM, {m.idxmax(): campos}, limpar_cache)
                 else:
-                    df_status = pd.concat([df_status, pd.DataFrame([{
-                        "Cliente": nome_novo.strip(),
-                        "Status": status_novo,
-                        "Foto": foto_nova.strip(),
-                        "Observação": obs_nova.strip()
-                    }])], ignore_index=True)
-                salvar_df(ABA_STATUS_FEM, df_status)
+                    anexar_registros(ABA_STATUS_FEM, [{"Cliente": nome_novo.strip(), **campos}], limpar_cache)
                 st.success(f"Cliente '{nome_novo.strip()}' salvo com sucesso!")
-                try:
-                    clientes_existentes.clear()
-                except Exception:
-                    pass
                 st.session_state["cliente_recem_cadastrado"] = nome_novo.strip()
                 _rerun = getattr(st, "rerun", None) or getattr(st, "experimental_rerun", None)
                 if callable(_rerun):
@@ -364,11 +353,12 @@ if acao.startswith("➕"):
     if not clientes_opts:
         st.error("Nenhum cliente encontrado. Cadastre clientes em 'clientes_status_feminino' ou na Base.")
         st.stop()
-    idx_default = 0
-    novo = st.session_state.get("cliente_recem_cadastrado")
-    if novo and novo in clientes_opts:
-        idx_default = clientes_opts.index(novo)
-    cliente_final = st.selectbox("Cliente", clientes_opts, index=idx_default)
+    # busca no índice (salao/busca.py) restrita aos cadastrados; recém-cadastrado já vem escolhido
+    cliente_final = seletor_cliente("Cliente", key="agenda_cliente", nomes=clientes_opts,
+                                    padrao=st.session_state.get("cliente_recem_cadastrado"))
+    if not cliente_final:
+        st.info("Busque a cliente pelo nome.")
+        st.stop()
 
     # Serviços / Combos
     _servs, _combs = servicos_e_combos()
@@ -433,9 +423,6 @@ if acao.startswith("➕"):
             "Status": "Agendado", "Criado_em": criado_em, "Atendido_em": "",
             "ItensComboJSON": json.dumps(itens_combo, ensure_ascii=False) if itens_combo else ""
         }
-        df_ag = pd.concat([df_ag, pd.DataFrame([linha])], ignore_index=True)
-        salvar_df(ABA_AGENDAMENTO, df_ag)
-
         foto_url = foto_do_cliente(cliente_final) or PHOTO_FALLBACK_URL
         det = ""
         if itens_combo:
@@ -455,10 +442,10 @@ if acao.startswith("➕"):
             f"🏷️ <b>ID:</b> {ida}"
             f"{det}"
         )
-        send_tg_photo(foto_url, caption)
+        anexar_registros(ABA_AGENDAMENTO, [linha], cards_ao_gravar([(foto_url, caption)]))
         if "cliente_recem_cadastrado" in st.session_state:
             del st.session_state["cliente_recem_cadastrado"]
-        st.success("Agendado e notificado com sucesso ✅")
+        avisar_pendente(f"Agendamento {ida}")
 
 # ---------- 2) CONFIRMAR ----------
 elif acao.startswith("✅"):
@@ -584,17 +571,14 @@ elif acao.startswith("✅"):
             if selecionar.empty:
                 st.warning("Selecione pelo menos um agendamento.")
             else:
-                # Carrega/garante Base de Dados Feminino
-                df_base = carregar_df(ABA_DADOS_FEM)
-                cols_base = list(df_base.columns) if not df_base.empty else [
+                # Colunas da Base de Dados Feminino (cabeçalho do snapshot)
+                cols_base = [c for c in snapshot().cabecalho if c] or [
                     "Data","Serviço","Valor","Conta","Cliente","Combo","Funcionário",
                     "Fase","Tipo","Período","StatusFiado","IDLancFiado","VencimentoFiado",
                     "DataPagamento","Fiado_Vencimento","Fiado_Status","Quitado_em","Observação"
                 ]
-                if df_base.empty:
-                    df_base = pd.DataFrame(columns=cols_base)
 
-                novos, ids = [], []
+                novos, ids, repetidos = [], [], []
                 hoje_txt = tz_now().strftime(DATA_FMT)
                 agora_txt = tz_now().strftime(f"{DATA_FMT} {HORA_FMT}")
 
@@ -658,6 +642,7 @@ elif acao.startswith("✅"):
                         v = float(str(row["Valor"])) if str(row["Valor"]).strip() else 0.0
                         df_items = pd.DataFrame([{"Serviço": s, "Valor (R$)": v}])
 
+                    linhas_row = []
                     for _, it in df_items.iterrows():
                         s_item = str(it["Serviço"]).strip()
                         v_item = float(it["Valor (R$)"]) if it["Valor (R$)"] not in (None, "") else 0.0
@@ -685,21 +670,25 @@ elif acao.startswith("✅"):
                         # completa colunas faltantes
                         for c in cols_base:
                             if c not in novo: novo[c] = ""
-                        novos.append(novo)
+                        linhas_row.append(novo)
 
+                    # já lançado (na base ou ainda na fila de escrita): confirmar de novo duplicaria a base
+                    if any(ja_existe(n["Cliente"], n["Data"], n["Serviço"], n["Combo"]) for n in linhas_row):
+                        repetidos.append(ida)
+                        continue
+                    novos.extend(linhas_row)
                     ids.append(ida)
 
-                # Persiste na Base
-                df_base = pd.concat([df_base, pd.DataFrame(novos)], ignore_index=True)
-                salvar_df(ABA_DADOS_FEM, df_base)
+                if repetidos:
+                    st.warning(f"Já lançados na Base (não relançados, só marcados como atendidos): {', '.join(repetidos)}")
+                if not ids:
+                    marcar_atendidos(repetidos, agora_txt)
+                    avisar_pendente(f"{len(repetidos)} agendamento(s) marcado(s) como atendido(s)")
+                    st.stop()
+                selecionar = selecionar[selecionar["IDAgenda"].astype(str).isin(ids)]
 
-                # Atualiza agendamentos
-                df_ag = carregar_df(ABA_AGENDAMENTO)
-                df_ag.loc[df_ag["IDAgenda"].isin(ids), "Status"] = "Atendido"
-                df_ag.loc[df_ag["IDAgenda"].isin(ids), "Atendido_em"] = agora_txt
-                salvar_df(ABA_AGENDAMENTO, df_ag)
-
-                # Telegram por atendimento
+                # Telegram por atendimento: cards montados agora, enviados quando a base estiver gravada
+                cards = []
                 for _, row in selecionar.iterrows():
                     ida = str(row["IDAgenda"])
                     key_items = f"items_{ida}"
@@ -733,10 +722,17 @@ elif acao.startswith("✅"):
                         obs=str(row["Observação"]).strip(), ida=ida,
                         fiado=fiado_flag, venc=venc_txt
                     )
-                    send_tg_photo(foto, caption)
+                    cards.append((foto, caption))
+
+                # Persiste na Base (só as linhas novas, pela fila de escrita)
+                resumo = f"🧾 <b>Resumo</b>: {len(ids)} atendimento(s) confirmado(s) (fiado/à vista) e lançados na Base de Dados Feminino."
+                anexar_linhas(novos, list(dict.fromkeys(k for n in novos for k in n)), em_fila=True,
+                              ao_gravar=cards_ao_gravar(cards, resumo))
+
+                # Atualiza agendamentos (só Status/Atendido_em), inclusive os que já estavam na Base
+                marcar_atendidos(ids + repetidos, agora_txt)
 
-                send_tg_msg(f"🧾 <b>Resumo</b>: {len(ids)} atendimento(s) confirmado(s) (fiado/à vista) e lançados na Base de Dados Feminino.")
-                st.success(f"{len(ids)} atendimento(s) confirmados com sucesso. Registros gravados e cards enviados.")
+                avisar_pendente(f"{len(ids)} atendimento(s) confirmado(s)")
 
 # ---------- 3) EM ABERTO ----------
 else:
@@ -749,15 +745,9 @@ else:
         if abertos.empty:
             st.success("Sem agendamentos em aberto 🎉")
         else:
-            def dt_key(r):
-                try:
-                    d = datetime.strptime(str(r["Data"]), DATA_FMT)
-                    h = datetime.strptime(str(r["Hora"]), HORA_FMT).time()
-                    return datetime.combine(d.date(), h)
-                except Exception:
-                    return datetime.max
-            abertos["__ord"] = abertos.apply(dt_key, axis=1)
-            abertos = abertos.sort_values("__ord").drop(columns="__ord")
+            quando = abertos["Data"].astype(str) + " " + abertos["Hora"].astype(str)
+            abertos["__ord"] = parse_datas(quando, (f"{DATA_FMT} {HORA_FMT}",), serial=False)
+            abertos = abertos.sort_values("__ord", na_position="last", kind="stable").drop(columns="__ord")
             st.dataframe(
                 abertos[["IDAgenda","Data","Hora","Cliente","Serviço","Valor","Funcionário","Conta","Combo","Observação"]],
                 use_container_width=True, hide_index=True
@@ -4,10 +4,15 @@ import pandas as pd
 import cloudinary
 import cloudinary.uploader
 import cloudinary.api
-import gspread
 from google.oauth2.service_account import Credentials
 
+from salao.busca import seletor_cliente
+from salao.clientes import COL_CHAVE, chave_cliente, chaves_clientes
+from salao.sheets import autorizar
+from salao import fotos, telemetria
+
 st.set_page_config(page_title="Upload Imagem Cliente (Feminino)")
+telemetria.pagina("7_Upload Imagem Cliente")
 st.markdown("<h1 style='text-align:center'>📸 Upload Imagem Cliente — Feminino</h1>", unsafe_allow_html=True)
 
 # ====== Cloudinary ======
@@ -24,7 +29,7 @@ def carregar_clientes_status_feminino():
         st.secrets["GCP_SERVICE_ACCOUNT"],
         scopes=["https://www.googleapis.com/auth/spreadsheets"]
     )
-    gc = gspread.authorize(creds)
+    gc = autorizar(creds)
     spreadsheet = gc.open_by_url(st.secrets["PLANILHA_URL"])
     aba = spreadsheet.worksheet("clientes_status_feminino")
     dados = aba.get_all_records()
@@ -37,14 +42,13 @@ if "Cliente" not in df_status.columns or "Foto" not in df_status.columns:
     st.error("A aba 'clientes_status_feminino' precisa ter as colunas 'Cliente' e 'Foto'.")
     st.stop()
 
-def nrm(s: str) -> str:
-    return str(s).strip().lower()
-
-df_status["ClienteKey"] = df_status["Cliente"].map(nrm)
+df_status[COL_CHAVE] = chaves_clientes(df_status["Cliente"])
 nomes_clientes = sorted([c for c in df_status["Cliente"].dropna().astype(str).str.strip().unique() if c])
 
 # ====== Seleção ======
-nome_cliente = st.selectbox("👩 Selecione a cliente", nomes_clientes, placeholder="Digite para buscar...")
+nome_cliente = seletor_cliente("👩 Selecione a cliente", key="upload_cliente", nomes=nomes_clientes)
+if not nome_cliente:
+    st.stop()
 public_id = nome_cliente.strip().lower().replace(" ", "_")
 pid_path = f"{PASTA_CLOUD}/{public_id}"
 
@@ -54,15 +58,8 @@ def imagem_existe_e_url():
         resp = cloudinary.api.resource(pid_path)
         return True, resp.get("secure_url")
     except Exception:
-        row = df_status[df_status["ClienteKey"] == nrm(nome_cliente)]
-        if not row.empty:
-            url = str(row.iloc[0]["Foto"]).strip()
-            if url:
-                if "drive.google.com" in url and "id=" in url:
-                    file_id = url.split("id=")[-1].split("&")[0]
-                    url = f"https://drive.google.com/uc?id={file_id}"
-                return True, url
-        return False, None
+        url = fotos.foto_cliente(nome_cliente)
+        return (True, url) if url else (False, None)
 
 existe, url_existente = imagem_existe_e_url()
 
@@ -88,7 +85,7 @@ if arquivo is not None:
                 resource_type="image",
             )
             url_nova = up["secure_url"]
-            mask = df_status["ClienteKey"] == nrm(nome_cliente)
+            mask = df_status[COL_CHAVE] == chave_cliente(nome_cliente)
             if not mask.any():
                 st.error("Cliente não encontrado na planilha ao salvar o link da foto.")
             else:
@@ -96,6 +93,7 @@ if arquivo is not None:
                 linha = idx0 + 2                  # +2 por causa do cabeçalho
                 col_foto = df_status.columns.get_loc("Foto") + 1
                 aba_status.update_cell(linha, col_foto, url_nova)
+                fotos.invalidar()
                 st.success("✅ Imagem enviada e link salvo na planilha!")
                 st.image(url_nova, width=300)
         except Exception as e:
@@ -109,12 +107,13 @@ if existe and st.button("🗑️ Deletar imagem"):
             st.success("Imagem deletada do Cloudinary.")
         except Exception:
             pass
-        mask = df_status["ClienteKey"] == nrm(nome_cliente)
+        mask = df_status[COL_CHAVE] == chave_cliente(nome_cliente)
         if mask.any():
             idx0 = df_status.index[mask][0]
             linha = idx0 + 2
             col_foto = df_status.columns.get_loc("Foto") + 1
             aba_status.update_cell(linha, col_foto, "")
+            fotos.invalidar()
             st.success("Link removido da planilha.")
         else:
             st.warning("Cliente não encontrado na planilha para limpar o link.")
@@ -136,12 +135,7 @@ for nome in nomes_clientes:
         resp = cloudinary.api.resource(path)
         url = resp.get("secure_url")
     except Exception:
-        row = df_status[df_status["ClienteKey"] == nrm(nome)]
-        if not row.empty:
-            url = str(row.iloc[0]["Foto"]).strip()
-            if url and "drive.google.com" in url and "id=" in url:
-                file_id = url.split("id=")[-1].split("&")[0]
-                url = f"https://drive.google.com/uc?id={file_id}"
+        url = fotos.foto_cliente(nome)
     if url:
         with cols[i % 5]:
             st.image(url, width=110, caption=nome)
@@ -1,14 +1,17 @@
 # -*- coding: utf-8 -*-
 import streamlit as st
-import pandas as pd
-import urllib.parse
 import unicodedata
 
+from salao import telemetria
+from salao.abas import ler_colunas
+from salao.clientes import contem
+from salao.metadados import cabecalho
+
 st.set_page_config(page_title="Clientes sem Foto (Feminino)", page_icon="🖼", layout="wide")
+telemetria.pagina("8_Clientes_sem_foto")
 st.title("🖼 Clientes sem Foto — Feminino")
 
 # CONFIG
-SHEET_ID = "1qtOF1I7Ap4By2388ySThoVlZHbI3rAJv_haEcil0IUE"   # planilha principal
 ABA_STATUS = "clientes_status_feminino"                    # aba feminina
 
 FOTO_COL_CANDIDATES = ["foto", "link_foto", "imagem", "url_foto", "foto_link", "link", "image", "foto_url"]
@@ -18,13 +21,6 @@ def norm(s):
     return "".join(ch for ch in unicodedata.normalize("NFKD", s.strip().lower())
                    if not unicodedata.combining(ch))
 
-@st.cache_data(ttl=300)
-def carregar_clientes_status(sheet_id: str, aba: str) -> pd.DataFrame:
-    url = f"https://docs.google.com/spreadsheets/d/{sheet_id}/gviz/tq?tqx=out:csv&sheet={urllib.parse.quote(aba)}"
-    df = pd.read_csv(url, dtype=str)
-    df.columns = [c.strip() for c in df.columns]
-    return df
-
 def descobrir_coluna_foto(cols):
     cand_norm = {norm(c) for c in FOTO_COL_CANDIDATES}
     for c in cols:
@@ -34,12 +30,12 @@ def descobrir_coluna_foto(cols):
     if "Foto" in cols: return "Foto"
     return None
 
-df_status = carregar_clientes_status(SHEET_ID, ABA_STATUS)
-
-# Descobre colunas
-nome_col   = next((c for c in df_status.columns if norm(c) in ("cliente", "nome", "nome_cliente")), None)
-foto_col   = descobrir_coluna_foto(df_status.columns)
-status_col = next((c for c in df_status.columns if norm(c) == "status"), None)
+# Descobre colunas pelo cabeçalho e baixa só elas (salao/abas.py)
+cab        = cabecalho(ABA_STATUS)
+nome_col   = next((c for c in cab if norm(c) in ("cliente", "nome", "nome_cliente")), None)
+foto_col   = descobrir_coluna_foto(cab)
+status_col = next((c for c in cab if norm(c) == "status"), None)
+df_status  = ler_colunas(ABA_STATUS, [c for c in (nome_col, foto_col, status_col) if c])
 
 if not nome_col:
     st.error("Não encontrei a coluna de nome (ex.: 'Cliente' ou 'Nome') na aba feminina.")
@@ -76,8 +72,7 @@ else:
     else:
         q = st.text_input("🔎 Buscar cliente", "")
         if q:
-            qn = norm(q)
-            faltantes = faltantes[faltantes["Cliente"].astype(str).apply(norm).str.contains(qn)]
+            faltantes = faltantes[contem(faltantes["Cliente"], q)]
 
         st.warning(f"⚠ {len(faltantes)} cliente(s) sem foto cadastrada:")
         st.dataframe(faltantes[["Cliente", "Status"]], use_container_width=True, hide_index=True)
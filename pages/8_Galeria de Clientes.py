@@ -1,6 +1,5 @@
 import streamlit as st
 import pandas as pd
-import gspread
 import requests
 from PIL import Image
 from io import BytesIO
@@ -8,7 +7,12 @@ from google.oauth2.service_account import Credentials
 import cloudinary
 import cloudinary.uploader
 
+from salao.busca import seletor_cliente
+from salao.sheets import autorizar
+from salao import fotos, telemetria
+
 st.set_page_config(page_title="Galeria de Clientes Feminino", layout="wide")
+telemetria.pagina("8_Galeria de Clientes")
 st.title("💅 Galeria de Clientes (Feminino)")
 
 # === LOGO PADRÃO ===
@@ -28,7 +32,7 @@ def carregar_dados():
         credenciais = Credentials.from_service_account_info(
             st.secrets["GCP_SERVICE_ACCOUNT"], scopes=escopos
         )
-        cliente = gspread.authorize(credenciais)
+        cliente = autorizar(credenciais)
         planilha = cliente.open_by_url(st.secrets["PLANILHA_URL"])
         # ⬇️ Alterado para ler a aba feminina
         aba = planilha.worksheet("clientes_status_feminino")
@@ -45,10 +49,10 @@ if df.empty or "Foto" not in df.columns:
     st.info("Nenhuma imagem encontrada.")
 else:
     nomes = df["Cliente"].dropna().unique()
-    nome_filtrado = st.selectbox("Filtrar por cliente:", ["Todos"] + sorted(nomes.tolist()))
+    nome_filtrado = seletor_cliente("Filtrar por cliente:", key="galeria_cliente", nomes=nomes, vazio="Todos")
 
-    if nome_filtrado != "Todos":
-        df = df[df["Cliente"] == nome_filtrado]
+    if nome_filtrado:
+        df = df[df["Cliente"].astype(str).str.strip() == nome_filtrado]
 
     fotos_validas = df.dropna(subset=["Foto"])
 
@@ -97,6 +101,7 @@ else:
                                     if cell:
                                         col_foto = df.columns.get_loc("Foto") + 1
                                         aba_clientes.update_cell(cell.row, col_foto, "")
+                                        fotos.invalidar()
                                         st.success("✅ Imagem removida da planilha.")
 
                                     if "res.cloudinary.com" in row["Foto"]:
@@ -116,6 +121,7 @@ else:
                                     if cell:
                                         col_foto = df.columns.get_loc("Foto") + 1
                                         aba_clientes.update_cell(cell.row, col_foto, nova_foto)
+                                        fotos.invalidar()
                                         st.success("✅ Imagem substituída com sucesso.")
                                         st.experimental_rerun()
                                 except Exception as e:
@@ -1,11 +1,17 @@
 import streamlit as st
 import pandas as pd
-import gspread
-from gspread_dataframe import get_as_dataframe, set_with_dataframe
+from gspread_dataframe import set_with_dataframe
 from google.oauth2.service_account import Credentials
 from datetime import datetime
 
+from salao.abas import ler_aba
+from salao.base import base_bruta
+from salao.clientes import COL_CHAVE, chaves_clientes
+from salao.sheets import autorizar
+from salao import telemetria
+
 st.set_page_config(page_title="🔄 Sincronizar Clientes (Feminino)", layout="wide")
+telemetria.pagina("9_Sincronizar_Clientes")
 st.title("🔄 Sincronizar Clientes (Feminino)")
 
 # === CONFIG GOOGLE SHEETS ===
@@ -23,14 +29,13 @@ def conectar_sheets():
     info = st.secrets["GCP_SERVICE_ACCOUNT"]
     escopo = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
     credenciais = Credentials.from_service_account_info(info, scopes=escopo)
-    cliente = gspread.authorize(credenciais)
+    cliente = autorizar(credenciais)
     return cliente.open_by_key(SHEET_ID)
 
 def carregar_bases():
     planilha = conectar_sheets()
-    base   = get_as_dataframe(planilha.worksheet(BASE_ABA)).dropna(how="all")
-    status = get_as_dataframe(planilha.worksheet(STATUS_ABA)).dropna(how="all")
-    base.columns   = [str(c).strip() for c in base.columns]
+    base   = base_bruta()   # snapshot compartilhado (salao/base.py)
+    status = ler_aba(STATUS_ABA, cache=False)   # 1 chamada (salao/abas.py), sem cache: a página grava nela
     status.columns = [str(c).strip() for c in status.columns]
     return base, status, planilha
 
@@ -38,7 +43,7 @@ def parse_data(df: pd.DataFrame, col="Data") -> pd.DataFrame:
     if col not in df.columns:
         return df.iloc[0:0]
     df = df.copy()
-    df[col] = pd.to_datetime(df[col].astype(str).str.strip(), errors="coerce", dayfirst=True)
+    df[col] = df["DataDT"]
     return df.dropna(subset=[col])
 
 def escolher_coluna_foto(status_cols):
@@ -77,9 +82,6 @@ def montar_novos_df(novos_clientes, status_df):
         novos_df = novos_df.sort_values(by=col_cliente, key=lambda s: s.astype(str).str.casefold()).reset_index(drop=True)
     return novos_df
 
-def norm(s: str) -> str:
-    return str(s).strip().casefold()
-
 # === Carregar e preparar ===
 base_df, status_df, planilha = carregar_bases()
 
@@ -92,12 +94,12 @@ base_df = parse_data(base_df, "Data")
 base_df = base_df[base_df["Data"] >= DATA_INICIO]
 
 # Conjuntos normalizados
-clientes_base_raw = base_df["Cliente"].dropna().astype(str).str.strip()
 clientes_status_raw = status_df["Cliente"].dropna().astype(str).str.strip() if "Cliente" in status_df.columns else pd.Series([], dtype=str)
+clientes_status_norm = set(chaves_clientes(clientes_status_raw))
 
-clientes_status_norm = {norm(x) for x in clientes_status_raw}
-novos_clientes = sorted([x for x in clientes_base_raw.unique() if norm(x) not in clientes_status_norm],
-                        key=lambda s: s.casefold())
+# a base já traz ClienteKey (salao/clientes.py): cruza pela chave, sem normalizar de novo
+novos = base_df["Cliente"].ne("") & ~base_df[COL_CHAVE].isin(clientes_status_norm)
+novos_clientes = sorted(base_df.loc[novos, "Cliente"].unique(), key=lambda s: s.casefold())
 
 st.markdown(f"### 👥 Clientes novos (Feminino) desde **{DATA_INICIO_STR}**: `{len(novos_clientes)}`")
 
@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+# salao — camada compartilhada de dados do app Feminino.
+# - sheets: conexão única com a planilha e token de versão (Drive)
+# - cota:   cliente HTTP do gspread com limite de requisições, retentativa e leituras compartilhadas
+# - base:   snapshot tipado da "Base de Dados Feminino" + acessores usados pelas páginas
+# - disco:  cópia em Parquet do snapshot para abrir rápido após reinício
+# - abas:   leitura de várias abas em um único values_batch_get (ou só algumas colunas), DataFrame por aba
+# - metadados: abas da planilha e cabeçalhos de todas elas, guardados no processo
+# - formatos: formato numérico das colunas de pagamento, 1 batchUpdate e só quando mudou
+# - fila:   fila de escrita (append/patch) gravada por uma thread do processo, em lote
+# - indices: índices derivados do snapshot (duplicidade, linhas por cliente, visitas, cubos, fiados em aberto, preços por serviço)
+# - telemetria: contagem/latência das chamadas externas por página e rerun (painel ?debug=1 + log)
+# - parsers: conversão de valores (R$) e datas do Sheets
+# - clientes: chave canônica do nome do cliente (ClienteKey categórica) e busca por ela
+# - busca:  índice de trigramas/prefixo das ClienteKey e o seletor de cliente (streamlit-searchbox)
+# - fotos:  mapa ClienteKey -> URL da foto (aba de status), guardado no processo até alguém gravar foto
+
+from salao.sheets import SHEET_ID, ABA_BASE, ABA_STATUS, autorizar, conectar, versao_planilha
+from salao.base import (
+    Snapshot, snapshot, base_bruta, base_analitica, invalidar,
+    anexar_linhas, excluir_linhas, ajustar_local,
+)
+
+__all__ = [
+    "SHEET_ID", "ABA_BASE", "ABA_STATUS", "autorizar", "conectar", "versao_planilha",
+    "Snapshot", "snapshot", "base_bruta", "base_analitica", "invalidar",
+    "anexar_linhas", "excluir_linhas", "ajustar_local",
+]
@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+# salao/abas.py — leitura de várias abas da planilha em UMA chamada (values_batch_get)
+#
+# - A página declara as abas (e, se quiser, a faixa A1 de cada uma) e recebe um DataFrame por aba.
+# - O DataFrame sai igual ao do get_as_dataframe (fórmulas como texto, datas formatadas,
+#   tipos inferidos com as linhas vazias da grade, como o fill_gaps dele; linhas vazias fora,
+#   índice 0 = linha 2 do Sheets).
+# - Aba inexistente vira DataFrame vazio (sem derrubar as outras).
+# - Resultado guardado por versão da planilha: nova leitura só quando a planilha mudar.
+# - ler_colunas: só as colunas pedidas (pelo nome no cabeçalho), para páginas que usam poucas;
+#   ler_coluna_como_aba_inteira devolve uma coluna como str(célula) da leitura da aba inteira.
+
+import pandas as pd
+import streamlit as st
+from gspread.exceptions import APIError
+from gspread.utils import rowcol_to_a1
+from pandas.io.parsers import TextParser
+
+from salao import metadados
+from salao.metadados import a1
+from salao.sheets import conectar, versao_planilha
+
+PARAMS_LEITURA = {"valueRenderOption": "FORMULA", "dateTimeRenderOption": "FORMATTED_STRING"}
+
+def para_df(valores: list[list], linhas_grade: int = 0) -> pd.DataFrame:
+    """
+    Linhas do Sheets (1ª = cabeçalho) -> DataFrame no formato do get_as_dataframe.
+    linhas_grade: nº de linhas da grade da aba; como no fill_gaps do get_as_dataframe, as linhas
+    vazias até lá entram na inferência (uma coluna de inteiros com grade sobrando sai float).
+    """
+    if not valores:
+        return pd.DataFrame()
+    largura = max(len(r) for r in valores)
+    linhas = [list(r) + [""] * (largura - len(r)) for r in valores]
+    linhas += [[""] * largura for _ in range(linhas_grade - len(linhas))]
+    df = TextParser(linhas, header=0).read()
+    df = df.dropna(how="all", axis=0)
+    vazias = [c for c in df.columns if str(c).startswith("Unnamed:") and df[c].isna().all()]
+    return df.drop(columns=vazias)
+
+def _buscar(faixas: tuple[tuple[str, str | None], ...]) -> list[list[list]]:
+    """Valores de cada (aba, faixa), na ordem pedida; aba inexistente vem como []."""
+    ss = conectar()
+    pedidas = list(faixas)
+    try:
+        resp = ss.values_batch_get([a1(a, f) for a, f in pedidas], params=PARAMS_LEITURA)
+    except APIError as e:
+        if e.code != 400:
+            raise
+        # alguma aba não existe: pergunta os títulos e busca só as que existem
+        existentes = {ws.title for ws in ss.worksheets()}
+        pedidas = [(a, f) for a, f in pedidas if a in existentes]
+        resp = (ss.values_batch_get([a1(a, f) for a, f in pedidas], params=PARAMS_LEITURA)
+                if pedidas else {"valueRanges": []})
+    lidas = {fx: vr.get("values", []) for fx, vr in zip(pedidas, resp.get("valueRanges", []))}
+    return [lidas.get(fx, []) for fx in faixas]
+
+def _linhas_grade(aba: str) -> int:
+    """Linhas da grade da aba, do cache do metadados (zerado pelo metadados.invalidar)."""
+    info = metadados.abas().get(aba)
+    return int(info.propriedades.get("gridProperties", {}).get("rowCount", 0)) if info else 0
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def _buscar_versao(faixas: tuple[tuple[str, str | None], ...], versao: str) -> list[list[list]]:
+    return _buscar(faixas)
+
+def _ler(faixas: tuple[tuple[str, str | None], ...], cache: bool) -> list[list[list]]:
+    return _buscar_versao(faixas, versao_planilha()) if cache else _buscar(faixas)
+
+def ler_abas(abas, cache: bool = True) -> dict[str, pd.DataFrame]:
+    """
+    Lê todas as abas pedidas em um único values_batch_get.
+    abas: ["Aba1", "Aba2"] ou {"Aba1": None, "Aba2": "A:G"} (faixa A1 opcional por aba).
+    cache=True reaproveita a leitura enquanto a versão da planilha (Drive) não mudar.
+    """
+    itens = abas.items() if isinstance(abas, dict) else ((a, None) for a in abas)
+    chave = tuple((a, f) for a, f in itens)
+    return {a: para_df(v, 0 if f else _linhas_grade(a)) for (a, f), v in zip(chave, _ler(chave, cache))}
+
+def ler_aba(aba: str, faixa: str | None = None, cache: bool = True) -> pd.DataFrame:
+    """Atalho para uma aba só."""
+    return ler_abas({aba: faixa}, cache)[aba]
+
+# =========================
+# PROJEÇÃO DE COLUNAS
+# =========================
+def _blocos(posicoes: list[int]) -> list[tuple[int, int]]:
+    """[0, 1, 2, 5, 7, 8] -> [(0, 2), (5, 5), (7, 8)] (colunas vizinhas viram uma faixa só)."""
+    blocos = []
+    for p in sorted(set(posicoes)):
+        if blocos and p == blocos[-1][1] + 1:
+            blocos[-1] = (blocos[-1][0], p)
+        else:
+            blocos.append((p, p))
+    return blocos
+
+def _letra(pos: int) -> str:
+    return rowcol_to_a1(1, pos + 1)[:-1]
+
+def _juntar(blocos: list[list[list]], larguras: list[int]) -> list[list]:
+    """Cola lado a lado as faixas de colunas (cada uma vem com linhas e larguras irregulares)."""
+    n = max((len(b) for b in blocos), default=0)
+    linhas = []
+    for i in range(n):
+        linha = []
+        for b, w in zip(blocos, larguras):
+            r = b[i] if i < len(b) else []
+            linha += list(r) + [""] * (w - len(r))
+        linhas.append(linha)
+    return linhas
+
+def ler_colunas(aba: str, colunas: list[str], cache: bool = True) -> pd.DataFrame:
+    """
+    Só as colunas pedidas da aba (achadas pelo cabeçalho), em um values_batch_get com uma
+    faixa por bloco de colunas vizinhas. Mesmo formato do ler_abas; colunas que não existem
+    na aba ficam de fora. Cada projeção tem seu próprio cache por versão da planilha.
+    """
+    for _ in range(2):
+        cab = metadados.cabecalho(aba)
+        pos = {}
+        for i, c in enumerate(cab):
+            pos.setdefault(c, i)
+        quero = [c for c in dict.fromkeys(str(c).strip() for c in colunas) if c in pos]
+        if not quero:
+            return pd.DataFrame()
+        blocos = _blocos([pos[c] for c in quero])
+        chave = tuple((aba, f"{_letra(i)}:{_letra(f)}") for i, f in blocos)
+        valores = _ler(chave, cache)
+        linhas = _juntar(valores, [f - i + 1 for i, f in blocos])
+        lidos = [str(c).strip() for c in (linhas[0] if linhas else [])]
+        if lidos == [c for i, f in blocos for c in cab[i:f + 1]]:
+            df = para_df(linhas, _linhas_grade(aba))
+            df.columns = [str(c).strip() for c in df.columns]
+            return df[[c for c in quero if c in df.columns]]
+        metadados.invalidar()   # colunas mudaram de lugar: relê os cabeçalhos e tenta de novo
+    return pd.DataFrame()
+
+def _como_aba_inteira(celulas: list, coluna: str, linhas, linhas_grade: int = 0) -> pd.Series:
+    """
+    Células da coluna (da linha 2 em diante) -> str() de cada uma como no
+    get_as_dataframe(aba inteira).fillna(""), nas `linhas` pedidas (nº do Sheets, na ordem).
+    O tipo sai de todas as linhas da grade, como na aba inteira: vazio vira NaN, e uma coluna
+    de inteiros com algum vazio vira float ('30.0'). Vazio -> ''.
+    """
+    linhas = [int(n) for n in linhas]
+    if not linhas:
+        return pd.Series([], dtype=object, name=coluna)
+    total = max(linhas_grade, len(celulas) + 1, max(linhas))
+    texto = [[celulas[i] if i < len(celulas) else ""] for i in range(total - 1)]
+    df = TextParser([[coluna]] + texto, header=0, skip_blank_lines=False).read()
+    v = df[coluna].iloc[[n - 2 for n in linhas]]
+    return pd.Series(v.astype(object).fillna("").astype(str).str.strip().to_numpy(), name=coluna)
+
+def ler_coluna_como_aba_inteira(aba: str, coluna: str, linhas, cache: bool = True) -> pd.Series | None:
+    """
+    Uma coluna da aba (lida com FORMULA, como o get_as_dataframe) em texto, nas `linhas`
+    pedidas (SheetRow do snapshot). None se a aba não tem a coluna. Mesmo cache por versão
+    do ler_colunas.
+    """
+    for _ in range(2):
+        cab = metadados.cabecalho(aba)
+        if coluna not in cab:
+            return None
+        letra = _letra(cab.index(coluna))
+        valores = _ler(((aba, f"{letra}:{letra}"),), cache)[0]
+        if valores and str(valores[0][0] if valores[0] else "").strip() == coluna:
+            celulas = [r[0] if r else "" for r in valores[1:]]
+            return _como_aba_inteira(celulas, coluna, linhas, _linhas_grade(aba))
+        metadados.invalidar()   # coluna mudou de lugar: relê os cabeçalhos e tenta de novo
+    return None
@@ -0,0 +1,612 @@
+# -*- coding: utf-8 -*-
+# salao/base.py — snapshot único e tipado da "Base de Dados Feminino"
+#
+# - A base é baixada UMA vez por versão da planilha (token do Drive) e fica em memória
+#   do processo, compartilhada por todas as páginas e sessões.
+# - Trocar de página não faz leitura no Sheets: só a checagem de versão (cache de 60s).
+# - Quando a versão muda, lê só o cabeçalho + as linhas novas no fim (a base só cresce
+#   embaixo); se o cabeçalho ou a última linha lida mudaram, relê tudo. Edições no meio
+#   feitas fora do app aparecem na releitura completa (no máximo a cada TTL_COMPLETO).
+# - Cada versão lida é gravada em disco (salao/disco.py); ao reiniciar o processo as páginas
+#   abrem dessa cópia e a conferência com o Sheets roda em segundo plano.
+# - Colunas originais ficam como texto ("" quando vazio) no dtype "str" do pandas (pyarrow),
+#   bem menor que object; com copy-on-write ligado, base_bruta/base_analitica não copiam os dados
+#   (a cópia só acontece se a página alterar alguma coluna). As derivadas são:
+#   ValorNum, DataDT, Ano, Mês, Dia, SheetRow (nº real da linha no Sheets), ConferidoFlag e
+#   ClienteKey (chave canônica do cliente, categórica — salao/clientes.py).
+# - O lock do estado só protege conferir/trocar o snapshot e os índices; leitura do Sheets e
+#   montagem de índice rodam fora dele. Quem pede a mesma coisa (o snapshot, ou o mesmo índice)
+#   enquanto ela está em andamento espera só por ela (Event por chave).
+
+import re
+import threading
+import time
+import unicodedata
+from dataclasses import dataclass, field, replace
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from gspread.utils import rowcol_to_a1
+
+from salao import disco, fila, metadados
+from salao.clientes import COL_CHAVE, com_chave, unir_chaves
+from salao.parsers import coerce_valor, parse_data_sheets, so_dia
+from salao.sheets import ABA_BASE, conectar, versao_planilha
+
+TTL_COMPLETO = 30 * 60  # segundos; depois disso a próxima mudança de versão relê a base inteira
+
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)   # no pandas 3 já é sempre assim
+
+COLS_DERIVADAS = ["ValorNum", "DataDT", "Ano", "Mês", "Dia", "SheetRow", "ConferidoFlag", COL_CHAVE]
+VERDADEIROS = ("1", "true", "verdadeiro", "sim", "ok", "y", "yes")
+# poucas categorias distintas: categóricas na base_analitica (groupby dos painéis bem mais rápido)
+COLS_CATEGORIAS = ["Cliente", "Serviço", "Funcionário", "Conta", "Combo", "Período", "Tipo", "Fase"]
+
+def _dtype_texto():
+    """dtype "str" do pandas 3 (pyarrow, ausente = NaN); no pandas 2, o equivalente; sem pyarrow, object."""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return object
+    try:
+        return pd.StringDtype("pyarrow", na_value=np.nan)
+    except TypeError:
+        return "string[pyarrow_numpy]"
+
+TEXTO = _dtype_texto()
+
+@dataclass(frozen=True)
+class Snapshot:
+    versao: str
+    df: pd.DataFrame
+    cabecalho: list[str] = field(default_factory=list)
+    lido_em: float = 0.0
+    # índices derivados (nome -> (valor, atualizar)); ver indice()
+    indices: dict = field(default_factory=dict, compare=False, repr=False)
+    construindo: dict = field(default_factory=dict, compare=False, repr=False)   # nome -> Event
+    # leitura incremental: última linha do Sheets já lida (e seu conteúdo cru, para conferir)
+    n_linhas: int = 0
+    ultima_linha: tuple | None = None
+
+@dataclass
+class _Estado:
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    snapshot: Snapshot | None = None
+    disco_lido: bool = False     # cópia em disco já foi tentada neste processo
+    atualizando: bool = False    # revalidação em segundo plano em andamento
+    lendo: threading.Event | None = None   # leitura do snapshot (disco ou Sheets) em andamento
+    pendentes: dict = field(default_factory=dict)   # linhas na fila de escrita, ainda fora do snapshot
+    disco_lock: threading.Lock = field(default_factory=threading.Lock)
+    disco_pendente: tuple | None = None   # (df, meta) mais recente ainda não gravado
+    disco_gravando: bool = False          # thread de gravação em disco ativa
+
+@st.cache_resource(show_spinner=False)
+def _estado() -> _Estado:
+    return _Estado()
+
+# =========================
+# LEITURA / MONTAGEM
+# =========================
+def _norm_col(name: str) -> str:
+    return re.sub(r"[\s\W_]+", "", str(name).strip().lower())
+
+def _norm_key(s: str) -> str:
+    return unicodedata.normalize("NFKC", str(s).strip()).casefold()
+
+def _ler_valores() -> list[list[str]]:
+    resp = conectar().values_get(f"'{ABA_BASE}'")
+    return resp.get("values", [])
+
+def _tipar_texto(df: pd.DataFrame) -> pd.DataFrame:
+    """Colunas originais (não derivadas) no dtype de texto compacto."""
+    cols = [c for c in df.columns if c not in COLS_DERIVADAS and df[c].dtype != TEXTO]
+    if cols:
+        df[cols] = df[cols].astype(TEXTO)
+    return df
+
+def _linha_crua(r: list, largura: int) -> list[str]:
+    return [("" if c is None else str(c).strip()) for c in (list(r) + [""] * max(0, largura - len(r)))[:largura]]
+
+def montar_df(valores: list[list], primeira_linha: int = 2) -> tuple[pd.DataFrame, list[str]]:
+    """
+    Monta o DataFrame tipado a partir da matriz crua (linha 0 = cabeçalho).
+    primeira_linha: nº no Sheets da 1ª linha de dados (para montar só um pedaço da base).
+    """
+    if not valores:
+        return pd.DataFrame(columns=COLS_DERIVADAS), []
+
+    cabecalho = [str(c).strip() for c in valores[0]]
+    largura = len(cabecalho)
+    corpo = [_linha_crua(r, largura) for r in valores[1:]]
+    df = pd.DataFrame(corpo, columns=cabecalho, dtype=object)
+    df["SheetRow"] = np.arange(2, len(df) + 2)
+
+    # colunas sem nome e nomes repetidos (mantém a 1ª ocorrência)
+    manter = np.array([bool(c) for c in df.columns]) & ~df.columns.duplicated(keep="first")
+    df = df.loc[:, manter]
+
+    # descarta linhas totalmente vazias (o índice segue = SheetRow - 2)
+    cols_txt = [c for c in df.columns if c not in COLS_DERIVADAS]
+    if cols_txt:
+        df = df[df[cols_txt].ne("").any(axis=1)]
+    df = _tipar_texto(df.copy())
+
+    # 'Conferido' -> usa a ÚLTIMA coluna com esse nome (regra da página de conferência)
+    idx_conf = [i for i, h in enumerate(cabecalho) if _norm_col(h) == "conferido"]
+    if idx_conf:
+        i = idx_conf[-1]
+        conf = pd.Series([(r[i] if i < len(r) else "") for r in corpo], dtype=object)
+        conf = conf.iloc[df.index]
+        conf.index = df.index
+        df["ConferidoFlag"] = conf.astype(str).str.strip().str.lower().isin(VERDADEIROS)
+    else:
+        df["ConferidoFlag"] = False
+
+    df["ValorNum"] = coerce_valor(df["Valor"]) if "Valor" in df.columns else 0.0
+    if "Data" in df.columns:
+        df["DataDT"] = parse_data_sheets(df["Data"])
+    else:
+        df["DataDT"] = pd.Series(pd.NaT, index=df.index, dtype="datetime64[ns]")
+    df["Ano"] = df["DataDT"].dt.year.astype("Int64")
+    df["Mês"] = df["DataDT"].dt.month.astype("Int64")
+    df["Dia"] = so_dia(df["DataDT"])
+    com_chave(df)
+    if primeira_linha != 2:
+        df["SheetRow"] = df["SheetRow"] + (primeira_linha - 2)
+        df.index = df["SheetRow"] - 2
+    return df, cabecalho
+
+def _concatenar(base: pd.DataFrame, novo: pd.DataFrame) -> pd.DataFrame:
+    """base + linhas novas, mantendo ClienteKey categórica."""
+    df = pd.concat([base, novo])
+    if COL_CHAVE in df.columns:
+        df[COL_CHAVE] = pd.Series(unir_chaves([base[COL_CHAVE], novo[COL_CHAVE]]), index=df.index)
+    return df
+
+def _ler_snapshot(versao: str) -> Snapshot:
+    valores = _ler_valores()
+    df, cabecalho = montar_df(valores)
+    ultima = tuple(_linha_crua(valores[-1], len(cabecalho))) if len(valores) > 1 else ()
+    return Snapshot(versao=versao, df=df, cabecalho=cabecalho, lido_em=time.time(),
+                    n_linhas=len(valores), ultima_linha=ultima)
+
+def _ler_cauda(snap: Snapshot, versao: str) -> Snapshot | None:
+    """
+    Lê só o cabeçalho e as linhas a partir da última já lida (A{n}:…; base só com cabeçalho:
+    A2:…), numa chamada.
+    Devolve None (=> recarga completa) se o cabeçalho mudou ou se a linha n não é mais
+    a mesma (linhas excluídas/inseridas/editadas acima do fim).
+    """
+    n, largura = snap.n_linhas, len(snap.cabecalho)
+    if not largura or snap.ultima_linha is None or n < 1:
+        return None
+    col_fim = re.sub(r"\d+", "", rowcol_to_a1(1, largura))
+    inicio = n if n > 1 else 2   # só cabeçalho: não há linha de dados para conferir, lê da 2
+    resp = conectar().values_batch_get([f"'{ABA_BASE}'!1:1", f"'{ABA_BASE}'!A{inicio}:{col_fim}"])
+    faixas = resp.get("valueRanges", [])
+    cab = (faixas[0].get("values") or [[]])[0] if faixas else []
+    cauda = faixas[1].get("values", []) if len(faixas) > 1 else []
+
+    if [str(c).strip() for c in cab] != snap.cabecalho:
+        return None
+    if n > 1:
+        if not cauda or tuple(_linha_crua(cauda[0], largura)) != snap.ultima_linha:
+            return None
+        cauda = cauda[1:]
+
+    # linhas só aplicadas localmente (anexar_linhas) são trocadas pelo que veio do Sheets
+    base = snap.df[snap.df["SheetRow"] <= n]
+    indices = {}
+    if cauda:
+        novo, _ = montar_df([snap.cabecalho] + cauda, primeira_linha=n + 1)
+        novo = novo[base.columns]
+        df = _concatenar(base, novo)
+        if len(base) == len(snap.df):
+            indices = {nome: (atualizar(valor, novo), atualizar)
+                       for nome, (valor, atualizar) in snap.indices.items() if atualizar}
+        ultima = tuple(_linha_crua(cauda[-1], largura))
+    else:
+        df = base
+        indices = dict(snap.indices) if len(base) == len(snap.df) else {}
+        ultima = snap.ultima_linha
+    return Snapshot(versao=versao, df=df, cabecalho=snap.cabecalho, lido_em=snap.lido_em,
+                    indices=indices, n_linhas=n + len(cauda), ultima_linha=ultima)
+
+def _atualizar_snapshot(snap: Snapshot | None, versao: str) -> Snapshot:
+    if snap is not None and time.time() - snap.lido_em < TTL_COMPLETO:
+        try:
+            novo = _ler_cauda(snap, versao)
+        except Exception:
+            novo = None
+        if novo is not None:
+            return novo
+    return _ler_snapshot(versao)
+
+# =========================
+# CÓPIA EM DISCO (warm start)
+# =========================
+def _para_disco(snap: Snapshot):
+    meta = {
+        "versao": snap.versao, "cabecalho": snap.cabecalho, "lido_em": snap.lido_em,
+        "n_linhas": snap.n_linhas,
+        "ultima_linha": list(snap.ultima_linha) if snap.ultima_linha is not None else None,
+    }
+    # uma thread grava por vez; versões que chegam enquanto ela grava substituem a pendente
+    est = _estado()
+    with est.disco_lock:
+        est.disco_pendente = (snap.df, meta)
+        if est.disco_gravando:
+            return
+        est.disco_gravando = True
+    threading.Thread(target=_gravar_disco, daemon=True).start()
+
+def _gravar_disco():
+    est = _estado()
+    while True:
+        with est.disco_lock:
+            pendente, est.disco_pendente = est.disco_pendente, None
+            if pendente is None:
+                est.disco_gravando = False
+                return
+        disco.salvar(*pendente)
+
+def _do_disco() -> Snapshot | None:
+    lido = disco.carregar()
+    if lido is None:
+        return None
+    df, meta = lido
+    df = _tipar_texto(df)
+    df.index = df["SheetRow"] - 2
+    ultima = meta.get("ultima_linha")
+    return Snapshot(versao=meta["versao"], df=df, cabecalho=meta["cabecalho"], lido_em=meta["lido_em"],
+                    n_linhas=meta["n_linhas"], ultima_linha=tuple(ultima) if ultima is not None else None)
+
+def _copia(snap: Snapshot | None) -> Snapshot | None:
+    """Cópia rasa para ler/atualizar fora do lock (chamar com o lock: congela os índices de agora)."""
+    return replace(snap, indices=dict(snap.indices), construindo={}) if snap is not None else None
+
+def _indices_validos(novos: dict, antes: dict, agora: dict) -> dict:
+    """
+    Índices recalculados fora do lock a partir de `antes`: descarta os que mudaram nesse meio
+    tempo (trocar_indice) — serão montados de novo quando alguém pedir.
+    """
+    return {nome: v for nome, v in novos.items() if agora.get(nome) is antes.get(nome)}
+
+def _abrir_disco():
+    est = _estado()
+    with est.lock:
+        if est.disco_lido or est.snapshot is not None or est.lendo is not None:
+            est.disco_lido = True
+            return
+        est.disco_lido = True
+        ev = est.lendo = threading.Event()
+    try:
+        snap = _do_disco()
+        with est.lock:
+            if snap is not None and est.snapshot is None:
+                est.snapshot = snap
+                est.atualizando = True
+                threading.Thread(target=_revalidar_fundo, daemon=True).start()
+    finally:
+        with est.lock:
+            est.lendo = None
+        ev.set()
+
+def _revalidar_fundo():
+    # a leitura (cauda ou completa) roda fora do lock: páginas seguem usando a cópia do disco e
+    # montando índices; só a troca do snapshot é feita com o lock
+    est = _estado()
+    try:
+        versao = versao_planilha()
+        with est.lock:
+            snap = est.snapshot
+            if snap is None or snap.versao == versao:
+                return
+            copia = _copia(snap)
+        novo = _atualizar_snapshot(copia, versao)
+        with est.lock:
+            if est.snapshot is not snap:   # alguém já trocou (append, leitura síncrona): vale o dele
+                return
+            novo = replace(novo, indices=_indices_validos(novo.indices, copia.indices, snap.indices))
+            est.snapshot = novo
+        _para_disco(novo)
+    except Exception:
+        pass
+    finally:
+        est.atualizando = False
+
+# =========================
+# ACESSO
+# =========================
+def snapshot(revalidar: bool = False) -> Snapshot:
+    """
+    Snapshot atual da base. Só baixa de novo se a versão da planilha mudou.
+    revalidar=True consulta a versão no Drive agora (use antes de gravar).
+    Ao iniciar o processo, usa a cópia em disco na hora e revalida em segundo plano.
+    Uma leitura por vez: quem chega durante a leitura espera por ela, sem segurar o lock.
+    """
+    est = _estado()
+    if not revalidar and not est.disco_lido:
+        _abrir_disco()
+    if revalidar:
+        versao_planilha.clear()
+    versao = None
+    while True:
+        with est.lock:
+            snap, ev, em_fundo = est.snapshot, est.lendo, est.atualizando
+        # revalidação em segundo plano em andamento: a cópia atual serve sem esperar por ela
+        if not revalidar and em_fundo and snap is not None:
+            return snap
+        if ev is not None:
+            ev.wait()
+            continue
+        if versao is None:
+            versao = versao_planilha()
+        with est.lock:
+            snap = est.snapshot
+            if snap is not None and snap.versao == versao:
+                return snap
+            if est.lendo is not None:
+                continue
+            ev = est.lendo = threading.Event()
+            copia = _copia(snap)
+        try:
+            novo = _atualizar_snapshot(copia, versao)
+            with est.lock:
+                trocou = est.snapshot is snap
+                if trocou:
+                    if snap is not None:
+                        novo = replace(novo, indices=_indices_validos(novo.indices, copia.indices, snap.indices))
+                    est.snapshot = novo
+            if trocou:
+                _para_disco(novo)
+                return novo
+            # alguém trocou o snapshot durante a leitura (append, ajuste local): confere o dele
+        finally:
+            with est.lock:
+                est.lendo = None
+            ev.set()
+
+def indice(nome: str, construir, atualizar=None, snap: Snapshot | None = None):
+    """
+    Índice derivado do snapshot atual: construir(df) roda uma vez por versão da base.
+    Se `atualizar(valor, df_novas)` for informado, o índice é mantido nos appends
+    (anexar_linhas) em vez de ser reconstruído.
+    snap: use um snapshot já obtido (índice e snap.df ficam da mesma versão).
+    construir roda fora do lock (pode pedir outros índices); quem pede o mesmo índice
+    enquanto ele é montado espera por ele.
+    """
+    snap = snap or snapshot()
+    est = _estado()
+    while True:
+        with est.lock:
+            if nome in snap.indices:
+                return snap.indices[nome][0]
+            ev = snap.construindo.get(nome)
+            if ev is None:
+                ev = snap.construindo[nome] = threading.Event()
+                break
+        ev.wait()
+    try:
+        valor = construir(snap.df)
+        with est.lock:
+            snap.indices[nome] = (valor, atualizar)
+        return valor
+    finally:
+        with est.lock:
+            snap.construindo.pop(nome, None)
+        ev.set()
+
+def trocar_indice(nome: str, alterar, snap: Snapshot | None = None) -> bool:
+    """
+    Aplica `alterar(valor)` num índice já montado do snapshot (ex.: o app acabou de enfileirar
+    uma gravação que sabe refletir no índice). Índice ainda não montado: nada a fazer (False);
+    em montagem: espera terminar e aplica.
+    """
+    snap = snap or snapshot()
+    est = _estado()
+    while True:
+        with est.lock:
+            if nome in snap.indices:
+                valor, atualizar = snap.indices[nome]
+                snap.indices[nome] = (alterar(valor), atualizar)
+                return True
+            ev = snap.construindo.get(nome)
+            if ev is None:
+                return False
+        ev.wait()
+
+def invalidar(so_versao: bool = False):
+    """
+    Chamar depois de gravar na base. Descarta o snapshot (próxima leitura é completa);
+    so_versao=True só força conferir a versão — use quando a gravação foi só append no fim,
+    assim a próxima leitura baixa apenas as linhas novas.
+    """
+    versao_planilha.clear()
+    if so_versao:
+        return
+    est = _estado()
+    with est.lock:
+        est.snapshot = None
+
+def base_bruta(revalidar: bool = False, colunas: list[str] | None = None) -> pd.DataFrame:
+    """
+    Base completa: colunas do Sheets como texto + colunas derivadas.
+    colunas=[...] devolve só essas (as que existirem) — copia bem menos que a base inteira.
+    """
+    df = snapshot(revalidar).df
+    if colunas is not None:
+        return df[[c for c in colunas if c in df.columns]]
+    return df.copy(deep=False)   # copy-on-write: só copia o que a página alterar
+
+def _analitica(df: pd.DataFrame) -> pd.DataFrame:
+    df = df[df["DataDT"].notna()].copy()
+    df["Data"] = df["DataDT"]
+    df["Ano"] = df["Ano"].astype(int)
+    df["Mês"] = df["Mês"].astype(int)
+    for c in COLS_CATEGORIAS:
+        if c in df.columns:
+            df[c] = df[c].astype("category")
+    return df
+
+def base_analitica() -> pd.DataFrame:
+    """
+    Só linhas com data válida; 'Data' já vem como datetime (para dashboards).
+    Montada 1x por versão da base; COLS_CATEGORIAS vêm categóricas (use groupby(..., observed=True)).
+    """
+    return indice("base_analitica", _analitica).copy(deep=False)
+
+# =========================
+# ESCRITA (append-only)
+# =========================
+def _aplicar_anexo(snap: Snapshot, cabecalho: list[str], linhas: list[list], primeira: int):
+    """Acrescenta as linhas gravadas no snapshot em memória (sem reler o Sheets)."""
+    novo, _ = montar_df([cabecalho] + linhas, primeira_linha=primeira)
+    novo = novo[snap.df.columns]
+    df = _concatenar(snap.df, novo)
+    est = _estado()
+    with est.lock:
+        antes = dict(snap.indices)
+    indices = {nome: (atualizar(valor, novo), atualizar)
+               for nome, (valor, atualizar) in antes.items() if atualizar}
+    with est.lock:
+        if est.snapshot is snap:
+            est.snapshot = Snapshot(versao=snap.versao, df=df, cabecalho=snap.cabecalho,
+                                    lido_em=snap.lido_em, indices=_indices_validos(indices, antes, snap.indices),
+                                    n_linhas=snap.n_linhas, ultima_linha=snap.ultima_linha)
+
+def _confirmar_anexo(cabecalho: list[str], linhas: list[list], faixa: tuple[int, int] | None, local: bool):
+    """Depois de gravar: põe as linhas no snapshot atual (se ainda couberem no fim) ou descarta o snapshot."""
+    snap = _estado().snapshot
+    if local and faixa and snap is not None and (snap.df.empty or int(snap.df["SheetRow"].max()) < faixa[0]):
+        _aplicar_anexo(snap, cabecalho, linhas, faixa[0])
+    else:
+        invalidar()
+    versao_planilha.clear()  # próxima leitura confere a nova versão
+
+def _reservar(cabecalho: list[str], linhas: list[list]) -> object:
+    """Registra linhas enfileiradas (ainda fora do snapshot); devolve a marca para _liberar."""
+    novo, _ = montar_df([cabecalho] + linhas)
+    marca = object()
+    est = _estado()
+    with est.lock:
+        est.pendentes[marca] = novo
+    return marca
+
+def _liberar(marca: object):
+    est = _estado()
+    with est.lock:
+        est.pendentes.pop(marca, None)
+
+def linhas_pendentes() -> pd.DataFrame | None:
+    """Linhas da base ainda na fila de escrita (mesmas colunas do montar_df); None se não há nenhuma."""
+    est = _estado()
+    with est.lock:
+        partes = list(est.pendentes.values())
+    return pd.concat(partes, ignore_index=True) if partes else None
+
+def anexar_linhas(novas: list[dict], colunas_padrao: list[str] | None = None,
+                  em_fila: bool = False, ao_gravar=None):
+    """
+    Grava só as linhas novas no fim da base (append), na ordem do cabeçalho atual;
+    colunas de `colunas_padrao` que faltarem no cabeçalho são criadas antes.
+    Retorna (primeira, última) linha gravada no Sheets, ou None se nada foi gravado.
+    em_fila=True: enfileira na fila de escrita (salao/fila.py) e devolve o Pedido na hora;
+    o snapshot é atualizado quando a gravação terminar (depois roda ao_gravar(pedido)).
+    """
+    if not novas:
+        return None
+    snap = snapshot(revalidar=True)
+    ss = conectar()
+    headers = list(snap.cabecalho)
+    faltando = [c for c in (colunas_padrao or []) if _norm_key(c) not in {_norm_key(h) for h in headers}]
+    if faltando:
+        headers = headers + faltando
+        ss.values_update(f"'{ABA_BASE}'!A1", params={"valueInputOption": "RAW"}, body={"values": [headers]})
+        metadados.anotar_cabecalho(ABA_BASE, headers)
+
+    hdr_norm = [_norm_key(h) for h in headers]
+    linhas = []
+    for d in novas:
+        d_norm = {_norm_key(k): v for k, v in d.items()}
+        linhas.append([d_norm.get(hn, "") for hn in hdr_norm])
+    local = not faltando and bool(snap.cabecalho)
+
+    if em_fila:
+        marca = _reservar(headers, linhas)
+        def _gravado(p):
+            _confirmar_anexo(headers, linhas, p.faixa, local)
+            _liberar(marca)
+            if ao_gravar:
+                ao_gravar(p)
+        return fila.anexar(ABA_BASE, linhas, ao_gravar=_gravado, ao_falhar=lambda _p: _liberar(marca))
+
+    resp = ss.values_append(f"'{ABA_BASE}'", params={"valueInputOption": "USER_ENTERED"}, body={"values": linhas})
+    faixa = fila.faixa_gravada(resp)
+    _confirmar_anexo(headers, linhas, faixa, local)
+    return faixa
+
+# =========================
+# ESCRITA (ajuste local após gravar)
+# =========================
+def faixas_contiguas(linhas) -> list[tuple[int, int]]:
+    """[5, 6, 7, 10, 12, 13] -> [(5, 7), (10, 10), (12, 13)]"""
+    faixas = []
+    for r in sorted(set(int(x) for x in linhas)):
+        if faixas and r == faixas[-1][1] + 1:
+            faixas[-1][1] = r
+        else:
+            faixas.append([r, r])
+    return [tuple(f) for f in faixas]
+
+def excluir_linhas(ws, linhas) -> list[tuple[int, int]]:
+    """
+    Exclui as linhas (nº do Sheets) numa única chamada spreadsheets.batchUpdate,
+    um deleteDimension por faixa contígua, de baixo para cima. Retorna as faixas excluídas.
+    """
+    faixas = faixas_contiguas(linhas)
+    if not faixas:
+        return []
+    reqs = [{
+        "deleteDimension": {
+            "range": {"sheetId": ws.id, "dimension": "ROWS", "startIndex": ini - 1, "endIndex": fim}
+        }
+    } for ini, fim in reversed(faixas)]
+    ws.spreadsheet.batch_update({"requests": reqs})
+    return faixas
+
+def remapear_exclusao(df: pd.DataFrame, linhas) -> pd.DataFrame:
+    """Tira as linhas excluídas e renumera SheetRow das que estavam abaixo delas."""
+    excl = np.array(sorted(set(int(x) for x in linhas)), dtype=np.int64)
+    df = df[~df["SheetRow"].isin(excl)].copy()
+    df["SheetRow"] = df["SheetRow"] - np.searchsorted(excl, df["SheetRow"].to_numpy())
+    df.index = df["SheetRow"] - 2
+    return df
+
+def ajustar_local(alterar, versao_antes: str) -> bool:
+    """
+    Depois de uma gravação feita por este app: aplica `alterar(df)` no snapshot em memória
+    e adota a nova versão da planilha, sem reler a base. Se a base já estava em outra versão
+    antes da gravação (alguém mexeu por fora), descarta o snapshot e deixa recarregar.
+    """
+    est = _estado()
+    with est.lock:
+        snap = est.snapshot
+        if snap is None or snap.versao != versao_antes:
+            est.snapshot = None
+            snap = None
+    versao_planilha.clear()
+    if snap is None:
+        return False
+    df = alterar(snap.df.copy())
+    nova = versao_planilha()
+    with est.lock:
+        if est.snapshot is not snap:
+            return False
+        # exclusões/edições mudam as linhas já lidas: a próxima mudança de versão recarrega tudo
+        est.snapshot = Snapshot(versao=nova, df=df, cabecalho=snap.cabecalho, lido_em=snap.lido_em,
+                                n_linhas=snap.n_linhas, ultima_linha=None)
+        _para_disco(est.snapshot)
+    return True
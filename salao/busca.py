@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+# salao/busca.py — busca de cliente por trigramas/prefixo sobre a ClienteKey (montada 1x por versão da base)
+#
+# - Cada cliente entra uma vez (pela ClienteKey) com a grafia mais recente, a última visita e o nº de
+#   visitas (Cliente + Dia); as posições já ficam na ordem do ranking: mais recente primeiro, depois mais visitas.
+# - Termo com 3+ letras: interseção das listas de trigramas + conferência do "contém"; com 1-2 letras:
+#   início de palavra, por busca binária. Começo do nome vem antes de começo de palavra, que vem antes do meio.
+# - seletor_cliente() usa o streamlit-searchbox: o navegador recebe só as N sugestões do termo digitado.
+#   Sem o pacote instalado, cai no selectbox com a lista inteira (como era antes).
+# - Índices de uma lista de nomes (indice_de_nomes) ficam num LRU pequeno fora do snapshot.
+
+import bisect
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from functools import reduce
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from salao.base import Snapshot, indice, snapshot
+from salao.clientes import COL_CHAVE, chave_cliente, chaves_clientes
+
+try:
+    from streamlit_searchbox import st_searchbox
+except ImportError:  # opcional (requirements.txt); sem ele o seletor vira selectbox
+    st_searchbox = None
+
+N_SUGESTOES = 10
+N_INDICES_NOMES = 8   # listas de nomes diferentes guardadas ao mesmo tempo (LRU)
+
+@dataclass(frozen=True)
+class IndiceClientes:
+    clientes: pd.DataFrame        # ordem do ranking: ClienteKey, Cliente, UltimaVisita, Visitas
+    chaves: list[str]             # ClienteKey por posição
+    trigramas: dict               # trigrama de " chave " -> posições (crescentes = ordem do ranking)
+    palavras: list[str]           # palavras das chaves, ordenadas (busca por prefixo)
+    pos_palavras: np.ndarray      # posição do cliente de cada item de `palavras`
+    nomes: dict                   # grafia -> ClienteKey (todas as grafias vistas)
+
+# =========================
+# MONTAGEM
+# =========================
+def resumo_clientes(df: pd.DataFrame, data: str = "DataDT") -> pd.DataFrame:
+    """1 linha por ClienteKey: Cliente (grafia mais recente), UltimaVisita e Visitas (dias distintos)."""
+    chave = (df[COL_CHAVE] if COL_CHAVE in df.columns else chaves_clientes(df["Cliente"])).astype(str)
+    d = pd.DataFrame({COL_CHAVE: chave, "Cliente": df["Cliente"].astype(str).str.strip(),
+                      "Dia": pd.to_datetime(df[data], errors="coerce").dt.normalize()})
+    d = d[d[COL_CHAVE].ne("")].sort_values("Dia", kind="stable", na_position="first")
+    r = d.groupby(COL_CHAVE, sort=False).agg(Cliente=("Cliente", "last"), UltimaVisita=("Dia", "max"),
+                                             Visitas=("Dia", "nunique"))
+    return r.reset_index()
+
+def montar_indice(resumo: pd.DataFrame, nomes: dict | None = None) -> IndiceClientes:
+    c = (resumo.sort_values(["UltimaVisita", "Visitas"], ascending=False, na_position="last", kind="stable")
+               .reset_index(drop=True))
+    chaves = c[COL_CHAVE].tolist()
+    tri = {}
+    for i, k in enumerate(chaves):
+        p = f" {k} "
+        for t in {p[j:j + 3] for j in range(len(p) - 2)}:
+            tri.setdefault(t, []).append(i)
+    pal = sorted((w, i) for i, k in enumerate(chaves) for w in set(k.split()))
+    return IndiceClientes(c, chaves, {t: np.array(v) for t, v in tri.items()},
+                          [w for w, _ in pal], np.array([i for _, i in pal], dtype=int),
+                          nomes if nomes is not None else dict(zip(c["Cliente"], chaves)))
+
+def _indice_base(df: pd.DataFrame) -> IndiceClientes:
+    nomes = df[["Cliente", COL_CHAVE]].astype(str).drop_duplicates("Cliente")
+    return montar_indice(resumo_clientes(df), dict(zip(nomes["Cliente"].str.strip(), nomes[COL_CHAVE])))
+
+def indice_clientes(snap: Snapshot | None = None) -> IndiceClientes:
+    """Índice de busca de todos os clientes da base (1x por versão; append descarta e a próxima busca remonta)."""
+    return indice("busca_clientes", _indice_base, snap=snap)
+
+@dataclass
+class _IndicesNomes:
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    itens: OrderedDict = field(default_factory=OrderedDict)   # (id do índice da base, nomes) -> (base, índice)
+
+@st.cache_resource(show_spinner=False)
+def _indices_nomes() -> _IndicesNomes:
+    return _IndicesNomes()
+
+def _indice_nomes(base: IndiceClientes, lista: pd.Series) -> IndiceClientes:
+    todas = pd.DataFrame({COL_CHAVE: chaves_clientes(lista).astype(str), "Cliente": lista})
+    sub = todas.drop_duplicates(COL_CHAVE)
+    stats = base.clientes.set_index(COL_CHAVE)[["UltimaVisita", "Visitas"]]
+    r = sub.join(stats, on=COL_CHAVE).fillna({"Visitas": 0}).astype({"Visitas": int})
+    return montar_indice(r, dict(zip(todas["Cliente"], todas[COL_CHAVE])))
+
+def indice_de_nomes(nomes, snap: Snapshot | None = None) -> IndiceClientes:
+    """
+    Índice só com os `nomes` informados (ex.: clientes da aba de status), devolvendo essas mesmas grafias;
+    visitas/última visita vêm da base, e quem não está na base entra no fim do ranking.
+    Guardado num LRU de N_INDICES_NOMES listas (não no snapshot); nova versão da base remonta na hora de usar.
+    """
+    base = indice_clientes(snap or snapshot())
+    lista = pd.Series([str(n).strip() for n in nomes if str(n).strip()], dtype=object)
+    chave = (id(base), tuple(lista))
+    est = _indices_nomes()
+    with est.lock:
+        achado = est.itens.get(chave)
+        if achado is not None and achado[0] is base:
+            est.itens.move_to_end(chave)
+            return achado[1]
+    idx = _indice_nomes(base, lista)
+    with est.lock:
+        est.itens[chave] = (base, idx)
+        est.itens.move_to_end(chave)
+        while len(est.itens) > N_INDICES_NOMES:
+            est.itens.popitem(last=False)
+    return idx
+
+# =========================
+# CONSULTA
+# =========================
+def _candidatos(idx: IndiceClientes, q: str) -> np.ndarray:
+    if len(q) >= 3:
+        listas = [idx.trigramas.get(q[j:j + 3]) for j in range(len(q) - 2)]
+        if any(l is None for l in listas):
+            return np.array([], dtype=int)
+        pos = reduce(np.intersect1d, sorted(listas, key=len))
+        return np.array([i for i in pos if q in idx.chaves[i]], dtype=int)
+    a = bisect.bisect_left(idx.palavras, q)
+    b = bisect.bisect_left(idx.palavras, q + "\uffff")
+    return np.unique(idx.pos_palavras[a:b])
+
+def buscar(termo: str, n: int | None = N_SUGESTOES, idx: IndiceClientes | None = None,
+           snap: Snapshot | None = None) -> pd.DataFrame:
+    """Clientes que casam com o termo (sem acento/caixa), melhores primeiro; termo vazio = ranking. n=None: todos."""
+    idx = idx or indice_clientes(snap)
+    q = chave_cliente(termo)
+    if not q:
+        return idx.clientes.iloc[:n]
+    pos = _candidatos(idx, q)
+    qualidade = np.array([0 if idx.chaves[i].startswith(q) else 1 if f" {q}" in f" {idx.chaves[i]}" else 2
+                          for i in pos], dtype=int)
+    return idx.clientes.iloc[pos[np.lexsort((pos, qualidade))][:n]]
+
+def filtro_nomes(nomes: pd.Series, termo: str, snap: Snapshot | None = None) -> pd.Series:
+    """Máscara de busca sobre uma coluna de nomes da base, pelo índice (nenhum nome é normalizado de novo)."""
+    q = chave_cliente(termo)
+    if not q:
+        return pd.Series(True, index=nomes.index)
+    idx = indice_clientes(snap)
+    achadas = {idx.chaves[i] for i in _candidatos(idx, q)}
+    chaves = nomes.astype(str).map(idx.nomes)
+    faltam = chaves.isna()
+    if faltam.any():   # nome que não está na base (ex.: digitado agora)
+        chaves[faltam] = nomes[faltam].map(chave_cliente)
+    return chaves.isin(achadas)
+
+# =========================
+# COMPONENTE
+# =========================
+def seletor_cliente(rotulo: str, key: str, nomes=None, padrao: str | None = None, vazio: str | None = None,
+                    n: int = N_SUGESTOES, sugerir: bool = True, idx: IndiceClientes | None = None) -> str | None:
+    """
+    Campo de busca de cliente; devolve o nome escolhido (ou `padrao`), None se nada escolhido.
+    nomes: restringe às grafias informadas (senão, todos os clientes da base).
+    vazio: no selectbox de reserva, rótulo da opção "nenhum" no topo (ex.: "" ou "Todos").
+    sugerir=False não mostra o ranking antes de digitar (ex.: portal da cliente).
+    """
+    idx = idx or (indice_de_nomes(nomes) if nomes is not None else indice_clientes())
+    if st_searchbox is None:
+        c = idx.clientes.sort_values(COL_CHAVE, kind="stable")
+        opcoes, chaves = c["Cliente"].tolist(), c[COL_CHAVE].tolist()
+        if vazio is not None:
+            opcoes, chaves = [vazio] + opcoes, [None] + chaves
+        kp = chave_cliente(padrao) if padrao else None
+        escolha = st.selectbox(rotulo, opcoes, key=key,
+                               index=chaves.index(kp) if kp in chaves else 0 if opcoes else None)
+        return None if escolha == vazio else escolha
+
+    def sugestoes(termo: str) -> list[str]:
+        return buscar(termo, n, idx)["Cliente"].tolist()
+
+    return st_searchbox(sugestoes, label=rotulo, key=key, default=padrao,
+                        placeholder="Digite o nome...",
+                        default_options=sugestoes("") if sugerir else None)
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+# salao/clientes.py — chave canônica do nome do cliente
+#
+# - Uma regra só para comparar nomes: sem acento, casefold, espaços repetidos colapsados.
+# - chaves_clientes() é vetorizada: normaliza cada nome distinto UMA vez e devolve uma coluna
+#   categórica (cada chave guardada uma vez só, linhas apontam para ela).
+# - A base já vem com a coluna ClienteKey (salao/base.py); fotos, status, fiado e busca
+#   cruzam por ela em vez de normalizar de novo.
+
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+COL_CHAVE = "ClienteKey"
+
+def chave_cliente(nome) -> str:
+    """'  José  da Silva ' -> 'jose da silva' (None/NaN -> '')."""
+    if nome is None or (isinstance(nome, float) and np.isnan(nome)):
+        return ""
+    s = unicodedata.normalize("NFKD", str(nome)).casefold()
+    s = "".join(ch for ch in s if not unicodedata.combining(ch))
+    return " ".join(s.split())
+
+def chaves_clientes(nomes) -> pd.Series:
+    """Série categórica com a chave de cada nome (mesmo índice da entrada)."""
+    s = pd.Series(nomes)
+    codigos, unicos = pd.factorize(s.astype(object).where(s.notna(), ""), sort=False)
+    chaves = np.array([chave_cliente(u) for u in unicos], dtype=object)
+    return pd.Series(pd.Categorical(chaves[codigos] if len(chaves) else []), index=s.index, name=COL_CHAVE)
+
+def com_chave(df: pd.DataFrame, coluna: str = "Cliente") -> pd.DataFrame:
+    """Acrescenta ClienteKey (a partir de `coluna`) no próprio df e devolve o df."""
+    df[COL_CHAVE] = chaves_clientes(df[coluna] if coluna in df.columns else pd.Series("", index=df.index))
+    return df
+
+def unir_chaves(partes: list[pd.Series]) -> pd.Categorical:
+    """Concatena colunas ClienteKey sem perder o tipo categórico (categorias diferentes viram a união)."""
+    cheias = [p for p in partes if len(p)] or partes[:1]   # parte vazia tem categorias sem tipo (object)
+    return pd.api.types.union_categoricals([pd.Categorical(p) for p in cheias])
+
+def contem(nomes_ou_chaves: pd.Series, termo: str) -> pd.Series:
+    """Máscara de busca: a chave do cliente contém o termo normalizado (testa cada valor distinto 1x)."""
+    s = nomes_ou_chaves
+    if not isinstance(s.dtype, pd.CategoricalDtype):
+        s = s.astype("category")
+    q = chave_cliente(termo)
+    cats = s.cat.categories
+    achadas = cats[np.array([q in chave_cliente(c) for c in cats], dtype=bool)]
+    return s.isin(achadas)
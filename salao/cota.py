@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+# salao/cota.py — cliente HTTP do gspread que respeita a cota do Google Sheets
+#
+# - Balde de fichas separado para leitura e escrita (compartilhado por todas as sessões do processo).
+# - Leitura: 429 / 5xx / timeout / erro de conexão tentam de novo, com espera exponencial com jitter.
+# - Escrita só tenta de novo quando com certeza não foi aplicada: 429 ou falha ao abrir a conexão
+#   (antes de enviar). 5xx/timeout no meio da escrita podem ter gravado: repetir duplicaria um append.
+# - Leituras idênticas em andamento (mesmo endpoint + parâmetros) viram uma requisição só.
+# Limites configuráveis por variável de ambiente (a cota padrão do Sheets é 60 req/min por usuário).
+
+import json
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+
+import requests
+import streamlit as st
+from gspread.exceptions import APIError
+from gspread.http_client import HTTPClient
+from urllib3.exceptions import ConnectTimeoutError
+
+# =========================
+# CONFIG
+# =========================
+LEITURAS_POR_MIN = float(os.environ.get("SALAO_SHEETS_LEITURAS_MIN", 60))
+ESCRITAS_POR_MIN = float(os.environ.get("SALAO_SHEETS_ESCRITAS_MIN", 60))
+RAJADA = int(os.environ.get("SALAO_SHEETS_RAJADA", 10))        # fichas acumuláveis por balde
+MAX_TENTATIVAS = int(os.environ.get("SALAO_SHEETS_TENTATIVAS", 6))
+ESPERA_BASE = 1.0    # s; espera máxima da tentativa n = ESPERA_BASE * 2**n (limitada a ESPERA_MAX)
+ESPERA_MAX = 32.0
+CODIGOS_RETENTAVEIS = {408, 429, 500, 502, 503, 504}
+CODIGOS_RETENTAVEIS_ESCRITA = {429}   # cota estourada: a requisição foi recusada, nada gravado
+
+# =========================
+# BALDE DE FICHAS
+# =========================
+@dataclass
+class Balde:
+    por_minuto: float
+    rajada: int
+    fichas: float = field(init=False)
+    ultimo: float = field(init=False, default_factory=time.monotonic)
+    lock: threading.Lock = field(init=False, default_factory=threading.Lock)
+
+    def __post_init__(self):
+        self.fichas = float(self.rajada)
+
+    def tomar(self):
+        """Bloqueia até haver uma ficha livre e a consome."""
+        while True:
+            with self.lock:
+                agora = time.monotonic()
+                self.fichas = min(self.rajada, self.fichas + (agora - self.ultimo) * self.por_minuto / 60.0)
+                self.ultimo = agora
+                if self.fichas >= 1:
+                    self.fichas -= 1
+                    return
+                espera = (1 - self.fichas) * 60.0 / self.por_minuto
+            time.sleep(espera)
+
+@dataclass
+class _EmAndamento:
+    pronto: threading.Event = field(default_factory=threading.Event)
+    resposta: object = None
+    erro: BaseException | None = None
+
+@dataclass
+class _Controle:
+    leitura: Balde
+    escrita: Balde
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    em_andamento: dict = field(default_factory=dict)
+    geracao: int = 0   # muda a cada escrita: leitura nova não pega carona em leitura anterior a ela
+
+@st.cache_resource(show_spinner=False)
+def _controle() -> _Controle:
+    return _Controle(leitura=Balde(LEITURAS_POR_MIN, RAJADA), escrita=Balde(ESCRITAS_POR_MIN, RAJADA))
+
+# =========================
+# CLIENTE
+# =========================
+def _espera(tentativa: int) -> float:
+    """Backoff exponencial com jitter total."""
+    return random.uniform(0, min(ESPERA_MAX, ESPERA_BASE * 2 ** tentativa))
+
+def _antes_do_envio(e: requests.RequestException) -> bool:
+    """Falhou ao abrir a conexão (DNS, recusada, timeout de conexão): a requisição não saiu."""
+    if isinstance(e, requests.ConnectTimeout):
+        return True
+    motivo = getattr(e.args[0], "reason", None) if e.args else None   # MaxRetryError do urllib3
+    return isinstance(e, requests.ConnectionError) and isinstance(motivo, ConnectTimeoutError)
+
+class ClienteCota(HTTPClient):
+    """HTTPClient do gspread com balde de fichas, retentativa e leituras compartilhadas."""
+
+    def request(self, method, endpoint, params=None, data=None, json=None, files=None, headers=None):
+        ctl = _controle()
+        args = (method, endpoint, params, data, json, files, headers)
+        if method.upper() != "GET":
+            try:
+                return self._com_retentativa(ctl.escrita, args, escrita=True)
+            finally:
+                with ctl.lock:
+                    ctl.geracao += 1
+
+        chave = (endpoint, _congelar(params), ctl.geracao)
+        with ctl.lock:
+            atual = ctl.em_andamento.get(chave)
+            lider = atual is None
+            if lider:
+                atual = ctl.em_andamento[chave] = _EmAndamento()
+        if not lider:
+            atual.pronto.wait()
+            if atual.erro is not None:
+                raise atual.erro
+            return atual.resposta
+        try:
+            atual.resposta = self._com_retentativa(ctl.leitura, args)
+            return atual.resposta
+        except BaseException as e:
+            atual.erro = e
+            raise
+        finally:
+            with ctl.lock:
+                ctl.em_andamento.pop(chave, None)
+            atual.pronto.set()
+
+    def _com_retentativa(self, balde: Balde, args, escrita: bool = False):
+        codigos = CODIGOS_RETENTAVEIS_ESCRITA if escrita else CODIGOS_RETENTAVEIS
+        for tentativa in range(MAX_TENTATIVAS):
+            balde.tomar()
+            try:
+                return super().request(*args)
+            except APIError as e:
+                if e.code not in codigos or tentativa == MAX_TENTATIVAS - 1:
+                    raise
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if (escrita and not _antes_do_envio(e)) or tentativa == MAX_TENTATIVAS - 1:
+                    raise
+            time.sleep(_espera(tentativa))
+
+def _congelar(params) -> str:
+    return json.dumps(params or {}, sort_keys=True, default=str)
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+# salao/disco.py — cópia local (Parquet) do snapshot da base, para abrir rápido após reiniciar
+#
+# - Guarda o DataFrame já tipado + metadados (versão da planilha, cabeçalho, leitura incremental).
+# - Sem pyarrow (ou sem permissão de escrita) simplesmente não usa o disco; falha de gravação
+#   vai para o log (logger "salao.disco").
+
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover
+    pa = pq = None
+
+PASTA_CACHE = Path(os.environ.get("SALAO_CACHE_DIR") or Path(tempfile.gettempdir()) / "salao_cache")
+ARQ_BASE = PASTA_CACHE / "base_feminino.parquet"
+CHAVE_META = b"salao_snapshot"
+VERSAO_FORMATO = 2  # mude se o layout do DataFrame mudar (descarta arquivos antigos)
+
+log = logging.getLogger(__name__)
+
+def salvar(df: pd.DataFrame, meta: dict, arquivo: Path = ARQ_BASE) -> bool:
+    """
+    Grava df + meta de forma atômica: arquivo temporário próprio desta gravação (mesma pasta)
+    + rename. Gravações simultâneas nunca escrevem no mesmo temporário.
+    """
+    if pq is None:
+        return False
+    tmp = None
+    try:
+        arquivo.parent.mkdir(parents=True, exist_ok=True)
+        tabela = pa.Table.from_pandas(df, preserve_index=False)
+        md = dict(tabela.schema.metadata or {})
+        md[CHAVE_META] = json.dumps({**meta, "formato": VERSAO_FORMATO}).encode("utf-8")
+        tabela = tabela.replace_schema_metadata(md)
+        fd, tmp = tempfile.mkstemp(dir=arquivo.parent, prefix=f"{arquivo.name}.", suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            pq.write_table(tabela, f)
+        os.replace(tmp, arquivo)
+        return True
+    except Exception:
+        log.warning("falha ao gravar a cópia em disco %s", arquivo, exc_info=True)
+        if tmp is not None:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+        return False
+
+def carregar(arquivo: Path = ARQ_BASE) -> tuple[pd.DataFrame, dict] | None:
+    """Lê df + meta gravados por salvar(); None se não houver arquivo válido."""
+    if pq is None or not arquivo.exists():
+        return None
+    try:
+        tabela = pq.read_table(arquivo)
+        meta = json.loads((tabela.schema.metadata or {}).get(CHAVE_META, b"{}"))
+        if meta.get("formato") != VERSAO_FORMATO:
+            return None
+        return tabela.to_pandas(), meta
+    except Exception:
+        return None
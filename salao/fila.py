@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+# salao/fila.py — fila de escrita (write-behind) compartilhada por todas as sessões
+#
+# - As páginas enfileiram anexos de linhas (append) e correções de células (patch) e seguem na hora;
+#   o Pedido devolvido diz se ainda está pendente, se gravou ou se deu erro.
+# - Uma thread do processo grava em série: junta o que chegou na mesma janela em 1 values_batch_update
+#   (todas as correções) + 1 values_append por aba, então duas recepcionistas salvando juntas não se atropelam.
+# - ao_gravar(pedido) roda depois da gravação (ex.: atualizar o snapshot da base, mandar o card);
+#   ao_falhar(pedido) roda se a gravação deu erro. Os dois rodam na thread da fila (sem st.*).
+# - Correções levam o nº da linha: quem exclui linhas da aba faz isso dentro de pausada() e chama
+#   remapear_exclusao(), que renumera (ou descarta) as correções ainda na fila.
+
+import bisect
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable
+
+import streamlit as st
+
+from salao.sheets import conectar, versao_planilha
+
+try:
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+except ImportError:  # pragma: no cover
+    def get_script_run_ctx():
+        return None
+
+JANELA = 0.3            # s de espera para juntar pedidos que chegam quase juntos
+HISTORICO = 200         # pedidos concluídos guardados para o status das sessões
+RE_FAIXA = re.compile(r"!\D+(\d+)(?::\D+(\d+))?$")  # "'Aba'!A10:X12" -> 10, 12
+RE_A1 = re.compile(r"^([A-Za-z]+)(\d+)(?::([A-Za-z]+)(\d+))?$")  # "B5" / "A5:X7" (sem o nome da aba)
+
+# =========================
+# PEDIDOS
+# =========================
+@dataclass
+class Pedido:
+    aba: str
+    tipo: str                       # "anexo" (linhas) | "patch" ([{"range": "B5", "values": [[...]]}])
+    valores: list
+    entrada: str = "USER_ENTERED"   # valueInputOption
+    ao_gravar: Callable | None = None
+    sessao: str | None = None
+    ao_falhar: Callable | None = None
+    criado_em: float = field(default_factory=time.time)
+    status: str = "pendente"        # pendente | gravado | erro
+    erro: str = ""
+    faixa: tuple[int, int] | None = None   # linhas gravadas no Sheets (anexo)
+    visto: bool = False             # erro já mostrado para a sessão
+    pronto: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    def aguardar(self, timeout: float | None = None) -> bool:
+        """Espera a gravação; True se gravou."""
+        self.pronto.wait(timeout)
+        return self.status == "gravado"
+
+@dataclass
+class _Fila:
+    cond: threading.Condition = field(default_factory=threading.Condition)
+    itens: list = field(default_factory=list)
+    historico: deque = field(default_factory=lambda: deque(maxlen=HISTORICO))
+    thread: threading.Thread | None = None
+    gravando: threading.Lock = field(default_factory=threading.Lock)   # segurado durante cada lote
+
+@st.cache_resource(show_spinner=False)
+def _fila() -> _Fila:
+    return _Fila()
+
+def _sessao() -> str | None:
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx is not None else None
+
+def _enfileirar(p: Pedido) -> Pedido:
+    f = _fila()
+    with f.cond:
+        if f.thread is None or not f.thread.is_alive():
+            f.thread = threading.Thread(target=_trabalhar, args=(f,), name="salao-fila", daemon=True)
+            f.thread.start()
+        f.itens.append(p)
+        f.historico.append(p)
+        f.cond.notify()
+    return p
+
+def anexar(aba: str, linhas: list[list], ao_gravar: Callable | None = None,
+           entrada: str = "USER_ENTERED", ao_falhar: Callable | None = None) -> Pedido:
+    """Enfileira linhas para o fim da aba (na ordem do cabeçalho da aba)."""
+    return _enfileirar(Pedido(aba, "anexo", linhas, entrada, ao_gravar, _sessao(), ao_falhar))
+
+def corrigir(aba: str, faixas: list[dict], ao_gravar: Callable | None = None,
+             entrada: str = "USER_ENTERED", ao_falhar: Callable | None = None) -> Pedido:
+    """Enfileira correções de células: [{"range": "B5", "values": [["x"]]}, ...] (A1 sem o nome da aba)."""
+    return _enfileirar(Pedido(aba, "patch", faixas, entrada, ao_gravar, _sessao(), ao_falhar))
+
+# =========================
+# EXCLUSÃO DE LINHAS
+# =========================
+@contextmanager
+def pausada():
+    """Segura a gravação (espera o lote em andamento terminar) enquanto o bloco roda."""
+    with _fila().gravando:
+        yield
+
+def _remapear_faixa(faixa: str, excl: list[int]) -> str | None:
+    m = RE_A1.match(faixa)
+    if not m:
+        return faixa
+    c1, r1, c2, r2 = m.group(1), int(m.group(2)), m.group(3), int(m.group(4) or m.group(2))
+    if bisect.bisect_left(excl, r1) != bisect.bisect_right(excl, r2):
+        return None   # a linha corrigida foi excluída
+    desloc = bisect.bisect_left(excl, r1)
+    return f"{c1}{r1 - desloc}" + (f":{c2}{r2 - desloc}" if c2 else "")
+
+def remapear_exclusao(aba: str, linhas) -> int:
+    """
+    Depois de excluir `linhas` (nº do Sheets) da aba: renumera as correções dessa aba ainda na fila
+    e descarta as que caíam nas linhas excluídas. Chamar dentro de pausada(). Retorna quantas caíram.
+    """
+    excl = sorted(set(int(x) for x in linhas))
+    if not excl:
+        return 0
+    caidas = 0
+    f = _fila()
+    with f.cond:
+        for p in f.itens:
+            if p.tipo != "patch" or p.aba != aba:
+                continue
+            novos = []
+            for x in p.valores:
+                faixa = _remapear_faixa(x["range"], excl)
+                if faixa is None:
+                    caidas += 1
+                else:
+                    novos.append({**x, "range": faixa})
+            p.valores = novos
+    return caidas
+
+# =========================
+# GRAVAÇÃO (thread)
+# =========================
+def faixa_gravada(resp: dict) -> tuple[int, int] | None:
+    """Linhas (primeira, última) da resposta de values_append."""
+    m = RE_FAIXA.search(str((resp or {}).get("updates", {}).get("updatedRange", "")))
+    if not m:
+        return None
+    ini = int(m.group(1))
+    return ini, int(m.group(2) or ini)
+
+def _trabalhar(f: _Fila):
+    while True:
+        with f.cond:
+            while not f.itens:
+                f.cond.wait()
+        time.sleep(JANELA)
+        with f.gravando:   # pega o lote já com a trava: uma exclusão não remapeia o que está em voo
+            with f.cond:
+                lote, f.itens = f.itens, []
+            try:
+                _gravar_lote(lote)
+            except BaseException as e:  # a thread não pode morrer
+                _concluir([p for p in lote if p.status == "pendente"], e)
+        versao_planilha.clear()  # leituras por versão (base, salao/abas.py) conferem de novo
+
+def _gravar_lote(lote: list[Pedido]):
+    ss = conectar()
+    # correções: uma chamada por valueInputOption (na prática, uma só)
+    for entrada in dict.fromkeys(p.entrada for p in lote if p.tipo == "patch"):
+        grupo = [p for p in lote if p.tipo == "patch" and p.entrada == entrada]
+        data = [{"range": f"'{p.aba}'!{x['range']}", "values": x["values"]} for p in grupo for x in p.valores]
+        if not data:   # tudo caiu em linhas excluídas (remapear_exclusao)
+            _concluir(grupo)
+            continue
+        try:
+            ss.values_batch_update({"valueInputOption": entrada, "data": data})
+            _concluir(grupo)
+        except Exception as e:
+            _concluir(grupo, e)
+    # anexos: um values_append por aba, linhas na ordem de chegada
+    for aba, entrada in dict.fromkeys((p.aba, p.entrada) for p in lote if p.tipo == "anexo"):
+        grupo = [p for p in lote if p.tipo == "anexo" and p.aba == aba and p.entrada == entrada]
+        linhas = [l for p in grupo for l in p.valores]
+        try:
+            resp = ss.values_append(f"'{aba}'", params={"valueInputOption": entrada}, body={"values": linhas})
+        except Exception as e:
+            _concluir(grupo, e)
+            continue
+        faixa = faixa_gravada(resp)
+        ini = faixa[0] if faixa else None
+        for p in grupo:
+            if ini is not None and p.valores:
+                p.faixa = (ini, ini + len(p.valores) - 1)
+                ini += len(p.valores)
+        _concluir(grupo)
+
+def _concluir(grupo: list[Pedido], erro: BaseException | None = None):
+    for p in grupo:
+        if erro is None:
+            p.status = "gravado"
+            if p.ao_gravar:
+                try:
+                    p.ao_gravar(p)
+                except Exception:
+                    pass
+        else:
+            p.status, p.erro = "erro", f"{type(erro).__name__}: {erro}"
+            if p.ao_falhar:
+                try:
+                    p.ao_falhar(p)
+                except Exception:
+                    pass
+        p.pronto.set()
+
+# =========================
+# STATUS (UI)
+# =========================
+def pedidos_da_sessao() -> list[Pedido]:
+    sid = _sessao()
+    f = _fila()
+    with f.cond:
+        return [p for p in f.historico if p.sessao == sid]
+
+def status_sidebar():
+    """Mostra na sidebar o que ainda está gravando e erros de gravação desta sessão."""
+    pedidos = pedidos_da_sessao()
+    pend = [p for p in pedidos if p.status == "pendente"]
+    if pend:
+        st.sidebar.info(f"⏳ Gravando na planilha: {len(pend)} operação(ões) pendente(s)…")
+    for p in pedidos:
+        if p.status == "erro" and not p.visto:
+            p.visto = True
+            st.sidebar.error(f"Falha ao gravar em '{p.aba}': {p.erro}")
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+# salao/formatos.py — formato numérico das colunas de pagamento, aplicado uma vez só
+#
+# - Todas as colunas vão em 1 batchUpdate (repeatCell da linha 2 até o fim da aba).
+# - A assinatura aplicada (versão + posição das colunas) fica num developerMetadata da aba;
+#   enquanto ela bater com o cabeçalho atual, aplicar() não faz nenhuma chamada.
+# - Mudou o formato? Suba VERSAO_FORMATOS e a próxima gravação reaplica.
+
+import json
+import unicodedata
+
+from salao import metadados
+from salao.sheets import conectar
+
+VERSAO_FORMATOS = 1
+CHAVE_MARCA = "salao_formatos"
+
+# coluna -> (tipo, padrão) do numberFormat
+FORMATOS_EXTRAS = {
+    "ValorBrutoRecebido": ("NUMBER", "0.00"),
+    "ValorLiquidoRecebido": ("NUMBER", "0.00"),
+    "TaxaCartaoValor": ("NUMBER", "0.00"),
+    "TaxaCartaoPct": ("PERCENT", "0.00%"),
+}
+
+def _norm_key(s: str) -> str:
+    return unicodedata.normalize("NFKC", str(s).strip()).casefold()
+
+def assinatura(colunas: dict[str, int], formatos: dict[str, tuple[str, str]], versao: int) -> str:
+    return json.dumps({"v": versao, "colunas": colunas,
+                       "formatos": {c: list(f) for c, f in formatos.items()}},
+                      sort_keys=True, ensure_ascii=False)
+
+def aplicar(aba: str, formatos: dict[str, tuple[str, str]] = FORMATOS_EXTRAS,
+            versao: int = VERSAO_FORMATOS) -> bool:
+    """
+    Garante o numberFormat das colunas `formatos` na aba. Devolve True se precisou aplicar.
+    Colunas que não existem no cabeçalho são ignoradas.
+    """
+    mapa = metadados.mapa_colunas(aba, _norm_key)
+    colunas = {c: mapa[_norm_key(c)] for c in formatos if _norm_key(c) in mapa}
+    if not colunas:
+        return False
+    alvo = assinatura(colunas, formatos, versao)
+    if metadados.marca(aba, CHAVE_MARCA) == alvo:
+        return False
+    sheet_id = metadados.abas()[aba].propriedades["sheetId"]
+    pedidos = [{
+        "repeatCell": {
+            "range": {"sheetId": sheet_id, "startRowIndex": 1,
+                      "startColumnIndex": col - 1, "endColumnIndex": col},
+            "cell": {"userEnteredFormat": {"numberFormat": {"type": formatos[c][0], "pattern": formatos[c][1]}}},
+            "fields": "userEnteredFormat.numberFormat",
+        }
+    } for c, col in colunas.items()]
+    pedidos.append(metadados.pedido_marca(aba, CHAVE_MARCA, alvo))
+    resp = conectar().batch_update({"requests": pedidos})
+    metadados.anotar_marca(aba, CHAVE_MARCA, alvo, resp)
+    return True
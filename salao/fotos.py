@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+# salao/fotos.py — fotos das clientes (aba clientes_status_feminino): ClienteKey -> URL, guardado no processo
+#
+# - Uma leitura da aba de status monta o mapa; links do Drive já saem reescritos (normalizar_url)
+#   e só entram URLs http(s).
+# - Não segue a versão da planilha: lançar atendimento/fiado não relê as fotos. Quem grava foto
+#   (upload, galeria, cadastro do Agendamento) chama invalidar().
+
+import re
+
+import pandas as pd
+import streamlit as st
+
+from salao.abas import ler_aba
+from salao.clientes import chave_cliente, chaves_clientes
+from salao.sheets import ABA_STATUS
+
+COLUNAS_FOTO = ["link_foto", "foto", "imagem", "url_foto", "foto_link", "link", "image",
+                "foto_url", "link da foto", "url", "foto (url)"]
+COLUNAS_CLIENTE = ["cliente", "nome", "nome_cliente", "cliente_nome", "nome do cliente"]
+
+RE_DRIVE = (re.compile(r"drive\.google\.com/file/d/([^/]+)/"),
+            re.compile(r"drive\.google\.com/(?:open|uc)\?[^#]*id=([^&]+)"))
+
+def _canon(s) -> str:
+    return re.sub(r"[\s\W_]+", "", str(s).strip().lower())
+
+def normalizar_url(u) -> str:
+    """Link do Drive -> uc?export=view&id=...; outros http(s) como estão; resto -> ''."""
+    if not isinstance(u, str):
+        return ""
+    u = u.strip()
+    if not u.lower().startswith(("http://", "https://")):
+        return ""
+    for rx in RE_DRIVE:
+        m = rx.search(u)
+        if m:
+            return f"https://drive.google.com/uc?export=view&id={m.group(1)}"
+    return u
+
+def _coluna(colunas, candidatos: list[str]) -> str | None:
+    por_canon = {}
+    for c in colunas:
+        por_canon.setdefault(_canon(c), c)
+    return next((por_canon[_canon(k)] for k in candidatos if _canon(k) in por_canon), None)
+
+def montar_mapa(df: pd.DataFrame) -> dict[str, str]:
+    """Aba de status -> {ClienteKey: URL} (vale a primeira URL válida de cada cliente)."""
+    if df.empty:
+        return {}
+    cli_col = _coluna(df.columns, COLUNAS_CLIENTE)
+    foto_col = _coluna(df.columns, COLUNAS_FOTO)
+    if not (cli_col and foto_col):
+        return {}
+    urls = df[foto_col].astype(object).where(df[foto_col].notna(), "")
+    codigos, unicos = pd.factorize(urls.astype(str), sort=False)
+    normal = [normalizar_url(u) for u in unicos]          # cada link distinto reescrito 1x
+    t = pd.DataFrame({"k": chaves_clientes(df[cli_col]).astype(str),
+                      "url": [normal[c] for c in codigos]})
+    t = t[t["k"].ne("") & t["url"].ne("")].drop_duplicates("k")
+    return dict(zip(t["k"], t["url"]))
+
+@st.cache_resource(show_spinner=False)
+def _mapa() -> dict[str, str]:
+    # falha de leitura sobe: exceção não fica no cache, a próxima consulta tenta de novo
+    return montar_mapa(ler_aba(ABA_STATUS, cache=False))   # 1 chamada; aba ausente vem vazia
+
+def mapa() -> dict[str, str]:
+    """{ClienteKey: URL da foto} — compartilhado entre sessões; não altere o dicionário. Sem leitura: {}."""
+    try:
+        return _mapa()
+    except Exception:
+        return {}
+
+def foto_cliente(nome: str) -> str | None:
+    """URL da foto da cliente (pelo nome, em qualquer grafia) ou None."""
+    return mapa().get(chave_cliente(nome)) if nome else None
+
+def invalidar():
+    """Chamar depois de gravar/apagar foto na aba de status: a próxima consulta relê o mapa."""
+    _mapa.clear()
@@ -0,0 +1,419 @@
+# -*- coding: utf-8 -*-
+# salao/indices.py — índices derivados do snapshot da base (montados 1x por versão)
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from salao.base import Snapshot, indice, linhas_pendentes, snapshot, trocar_indice
+from salao.clientes import COL_CHAVE, chave_cliente, chaves_clientes, unir_chaves
+from salao.parsers import DATA_FMT, parse_datas
+
+# =========================
+# DUPLICIDADE DE ATENDIMENTO
+# =========================
+def _col(df: pd.DataFrame, nome: str) -> pd.Series:
+    return df[nome].astype(str).str.strip() if nome in df.columns else pd.Series("", index=df.index)
+
+def _chaves_atendimento(df: pd.DataFrame) -> set[tuple[str, str, str, str]]:
+    # (Cliente, Data, Serviço como _cap_first, Combo)
+    servico = _col(df, "Serviço").str.lower().str.capitalize()
+    return set(zip(_col(df, "Cliente"), _col(df, "Data"), servico, _col(df, "Combo")))
+
+def _anexar_chaves(chaves: set, novas: pd.DataFrame) -> set:
+    return chaves | _chaves_atendimento(novas)
+
+def chaves_atendimento() -> set[tuple[str, str, str, str]]:
+    """Conjunto (Cliente, Data, Serviço, Combo) de tudo que já está na base ou na fila de escrita."""
+    chaves = indice("chaves_atendimento", _chaves_atendimento, _anexar_chaves)
+    pendentes = linhas_pendentes()
+    return chaves if pendentes is None else chaves | _chaves_atendimento(pendentes)
+
+def ja_existe(cliente: str, data: str, servico: str, combo: str = "") -> bool:
+    servico = (str(servico).strip().lower().capitalize()) if servico is not None else ""
+    return (str(cliente), str(data), servico, str(combo).strip()) in chaves_atendimento()
+
+# =========================
+# LINHAS POR CLIENTE (e por cliente + dia)
+# =========================
+def _rotulos_por(df: pd.DataFrame, *cols: str) -> dict:
+    """chave (ou tupla de chaves) -> rótulos do índice do df, na ordem da base."""
+    chaves = [_col(df, c) for c in cols]
+    grupos = pd.Series(df.index, index=df.index).groupby(chaves[0] if len(chaves) == 1 else chaves,
+                                                         sort=False).indices
+    rot = df.index.to_numpy()
+    return {k: rot[p] for k, p in grupos.items()}
+
+def _juntar_rotulos(atual: dict, novos: dict) -> dict:
+    # cópia rasa: o dicionário do snapshot anterior continua valendo para quem ainda o usa
+    out = dict(atual)
+    for k, r in novos.items():
+        out[k] = np.concatenate([out[k], r]) if k in out else r
+    return out
+
+def _por_cliente(df: pd.DataFrame) -> dict:
+    return _rotulos_por(df, COL_CHAVE)
+
+def _por_cliente_dia(df: pd.DataFrame) -> dict:
+    return _rotulos_por(df, COL_CHAVE, "Data")
+
+def linhas_cliente(cliente: str, data: str | None = None, snap: Snapshot | None = None) -> pd.DataFrame:
+    """
+    Cópia só das linhas do cliente (qualquer grafia: pela ClienteKey) e do dia `data`, texto dd/mm/aaaa,
+    se informado, sem varrer a base: índice chave -> linhas montado 1x por versão e mantido nos appends.
+    """
+    snap = snap or snapshot()
+    chave = chave_cliente(cliente)
+    if data is None:
+        rot = indice("linhas_por_cliente", _por_cliente,
+                     lambda v, novas: _juntar_rotulos(v, _por_cliente(novas)), snap=snap).get(chave)
+    else:
+        rot = indice("linhas_por_cliente_dia", _por_cliente_dia,
+                     lambda v, novas: _juntar_rotulos(v, _por_cliente_dia(novas)), snap=snap
+                     ).get((chave, str(data).strip()))
+    return snap.df.loc[rot if rot is not None else []].copy()
+
+# =========================
+# VISITAS (1 por Cliente + Dia)
+# =========================
+CHAVE_VISITA = ["Cliente", "Dia"]
+CHAVE_CLIENTE_DIA = [COL_CHAVE, "Dia"]   # a contagem: grafias da mesma chave no mesmo dia = 1 visita
+_CHAVE_PARCIAL = [*CHAVE_VISITA, "Funcionário", "Conta"]
+
+@dataclass(frozen=True)
+class Visitas:
+    tabela: pd.DataFrame     # 1 linha por (Cliente, Dia): Valor, Servicos, Funcionário e Conta principais...
+    parciais: pd.DataFrame   # somas por (Cliente, Dia, Funcionário, Conta): base aditiva para os appends
+
+def _parciais(df: pd.DataFrame) -> pd.DataFrame:
+    d = pd.DataFrame({"Cliente": _col(df, "Cliente"), "Dia": df["Dia"],
+                      "Funcionário": _col(df, "Funcionário"), "Conta": _col(df, "Conta"),
+                      "Valor": df["ValorNum"].astype(float), "Servicos": 1})
+    d = d[d["Dia"].notna()]
+    return d.groupby(_CHAVE_PARCIAL, sort=False, as_index=False)[["Valor", "Servicos"]].sum()
+
+def _principal(p: pd.DataFrame, col: str) -> pd.Series:
+    """`col` com mais serviços na visita (vazio só se não houver outro; empate: o primeiro lançado)."""
+    s = p.groupby([*CHAVE_VISITA, col], sort=False, as_index=False)["Servicos"].sum()
+    s["_vazio"] = s[col].eq("")
+    s = s.sort_values(["_vazio", "Servicos"], ascending=[True, False], kind="stable")
+    return s.drop_duplicates(CHAVE_VISITA).set_index(CHAVE_VISITA)[col]
+
+def _tabela(p: pd.DataFrame) -> pd.DataFrame:
+    v = p.groupby(CHAVE_VISITA, sort=False)[["Valor", "Servicos"]].sum()
+    v["Funcionário"] = _principal(p, "Funcionário")
+    v["Conta"] = _principal(p, "Conta")
+    v = v.reset_index()
+    dt = pd.to_datetime(v["Dia"])
+    v["Ano"] = dt.dt.year.astype(int)
+    v["Mês"] = dt.dt.month.astype(int)
+    v[COL_CHAVE] = chaves_clientes(v["Cliente"])
+    return v[[*CHAVE_VISITA, COL_CHAVE, "Ano", "Mês", "Valor", "Servicos", "Funcionário", "Conta"]]
+
+def _visitas(df: pd.DataFrame) -> Visitas:
+    p = _parciais(df)
+    return Visitas(_tabela(p), p)
+
+def _sem(df: pd.DataFrame, chaves: pd.MultiIndex) -> pd.DataFrame:
+    return df[~pd.MultiIndex.from_frame(df[CHAVE_VISITA]).isin(chaves)]
+
+def _anexar_visitas(v: Visitas, novas: pd.DataFrame) -> Visitas:
+    # só as visitas tocadas pelas linhas novas são recalculadas (a partir das parciais delas)
+    pn = _parciais(novas)
+    if pn.empty:
+        return v
+    chaves = pd.MultiIndex.from_frame(pn[CHAVE_VISITA].drop_duplicates())
+    tocadas = v.parciais[pd.MultiIndex.from_frame(v.parciais[CHAVE_VISITA]).isin(chaves)]
+    p_novo = (pd.concat([tocadas, pn], ignore_index=True)
+              .groupby(_CHAVE_PARCIAL, sort=False, as_index=False)[["Valor", "Servicos"]].sum())
+    t_novo = _tabela(p_novo)
+    resto = _sem(v.tabela, chaves)
+    tabela = pd.concat([resto, t_novo], ignore_index=True)
+    tabela[COL_CHAVE] = unir_chaves([resto[COL_CHAVE], t_novo[COL_CHAVE]])
+    return Visitas(tabela, pd.concat([_sem(v.parciais, chaves), p_novo], ignore_index=True))
+
+def _indice_visitas(snap: Snapshot | None = None) -> Visitas:
+    return indice("visitas", _visitas, _anexar_visitas, snap=snap)
+
+def visitas(snap: Snapshot | None = None) -> pd.DataFrame:
+    """
+    Tabela de visitas da base (regra "1 atendimento por Cliente + Dia"): uma linha por (Cliente, Dia)
+    com ClienteKey, Ano, Mês, Valor (soma), Servicos (nº de linhas), Funcionário e Conta principais.
+    Grafias da mesma cliente vêm em linhas separadas: conte visitas por CHAVE_CLIENTE_DIA.
+    Montada 1x por versão e mantida nos appends; só linhas com data entram.
+    """
+    return _indice_visitas(snap).tabela.copy(deep=False)
+
+def contar_visitas(dia=None, funcionario: str | None = None, snap: Snapshot | None = None) -> int:
+    """Nº de visitas (do dia `dia`, se informado); com `funcionario`, só as que tiveram serviço dela."""
+    v = _indice_visitas(snap)
+    if funcionario is None:
+        t = v.tabela if dia is None else v.tabela[v.tabela["Dia"].eq(dia)]
+        return int(len(t[CHAVE_CLIENTE_DIA].drop_duplicates()))
+    p = v.parciais
+    m = p["Funcionário"].str.casefold().eq(str(funcionario).casefold())
+    if dia is not None:
+        m &= p["Dia"].eq(dia)
+    sel = p.loc[m, CHAVE_VISITA].drop_duplicates()
+    return int(len(set(zip(chaves_clientes(sel["Cliente"]).astype(str), sel["Dia"]))))
+
+# =========================
+# CUBOS DE RECEITA (dashboard)
+# =========================
+# Células já somadas, guardadas como arrays numpy (código de cada dimensão + medidas): cada filtro do
+# dashboard vira máscara + np.bincount sobre algumas centenas de células, sem groupby do pandas.
+DIM_RECEITA = ["Ano", "Mês", "Funcionário", "Conta", "Serviço"]
+DIM_CLIENTES = ["Ano", "Mês", "Cliente"]
+MED_RECEITA = ["Valor", "Linhas"]
+MED_CLIENTES = ["Valor", "Fiado", "Linhas", "LinhasFiado", "Visitas"]
+
+@dataclass(frozen=True)
+class Cubo:
+    dims: dict[str, tuple[np.ndarray, np.ndarray]]   # dimensão -> (código por célula, rótulos ordenados)
+    medidas: dict[str, np.ndarray]                   # medida -> soma por célula
+
+    def tabela(self) -> pd.DataFrame:
+        t = pd.DataFrame({c: rot[cod] for c, (cod, rot) in self.dims.items()})
+        for m, v in self.medidas.items():
+            t[m] = v
+        return t
+
+def _cubo(partes: list[pd.DataFrame], dims: list[str], medidas: list[str]) -> Cubo:
+    g = (pd.concat(partes, ignore_index=True)
+         .groupby(dims, sort=False, observed=True)[medidas].sum().reset_index())
+    cods = {}
+    for c in dims:
+        cod, rot = pd.factorize(g[c], sort=True)
+        cods[c] = (cod, np.asarray(rot))
+    return Cubo(cods, {m: g[m].to_numpy() for m in medidas})
+
+@dataclass(frozen=True)
+class Cubos:
+    receita: Cubo            # por DIM_RECEITA: Valor, Linhas
+    clientes: Cubo           # por DIM_CLIENTES: Valor, Fiado (R$), Linhas, LinhasFiado, Visitas
+    vistas: frozenset        # (ClienteKey, Dia) já contados em Visitas — para os appends não contarem de novo
+
+def _linhas_cubo(df: pd.DataFrame) -> pd.DataFrame:
+    d = df[df["DataDT"].notna()]
+    conta = _col(d, "Conta")
+    fiado = conta.str.casefold().eq("fiado")
+    valor = d["ValorNum"].astype(float)
+    cliente = _col(d, "Cliente")
+    chave = d[COL_CHAVE].astype(str) if COL_CHAVE in d.columns else chaves_clientes(cliente).astype(str)
+    return pd.DataFrame({
+        "Ano": d["Ano"].astype(int), "Mês": d["Mês"].astype(int),
+        "Funcionário": _col(d, "Funcionário"), "Conta": conta, "Serviço": _col(d, "Serviço"),
+        "Cliente": cliente, COL_CHAVE: chave, "Dia": d["Dia"],
+        "Valor": valor, "Fiado": valor.where(fiado, 0.0), "Linhas": 1, "LinhasFiado": fiado.astype(int),
+    })
+
+def _parte_clientes(l: pd.DataFrame, visitas_novas: pd.DataFrame) -> pd.DataFrame:
+    c = l.groupby(DIM_CLIENTES, sort=False)[["Valor", "Fiado", "Linhas", "LinhasFiado"]].sum()
+    c["Visitas"] = visitas_novas.groupby(DIM_CLIENTES, sort=False).size()
+    return c.fillna({"Visitas": 0}).astype({"Visitas": int}).reset_index()
+
+def _cubos(df: pd.DataFrame) -> Cubos:
+    # a visita (ClienteKey, Dia) conta 1x, na grafia da 1ª linha dela — como em visitas()/2_Detalhes_Cliente
+    l = _linhas_cubo(df)
+    v = l.drop_duplicates(CHAVE_CLIENTE_DIA)
+    return Cubos(_cubo([l], DIM_RECEITA, MED_RECEITA),
+                 _cubo([_parte_clientes(l, v)], DIM_CLIENTES, MED_CLIENTES),
+                 frozenset(zip(v[COL_CHAVE], v["Dia"])))
+
+def _anexar_cubos(c: Cubos, novas: pd.DataFrame) -> Cubos:
+    # soma as células das linhas novas nas do cubo; visita só conta se o (ClienteKey, Dia) ainda não existia
+    l = _linhas_cubo(novas)
+    if l.empty:
+        return c
+    v = l.drop_duplicates(CHAVE_CLIENTE_DIA)
+    v = v[[k not in c.vistas for k in zip(v[COL_CHAVE], v["Dia"])]]
+    return Cubos(_cubo([c.receita.tabela(), l], DIM_RECEITA, MED_RECEITA),
+                 _cubo([c.clientes.tabela(), _parte_clientes(l, v)], DIM_CLIENTES, MED_CLIENTES),
+                 c.vistas | frozenset(zip(v[COL_CHAVE], v["Dia"])))
+
+def cubos(snap: Snapshot | None = None) -> Cubos:
+    """Cubos de receita do snapshot (montados 1x por versão e somados nos appends). Só linhas com data."""
+    return indice("cubos", _cubos, _anexar_cubos, snap=snap)
+
+def _fatia(cubo: Cubo, ano, meses) -> np.ndarray:
+    m = np.ones(len(cubo.dims["Ano"][0]), dtype=bool)
+    if ano is not None:
+        cod, rot = cubo.dims["Ano"]
+        m &= np.isin(cod, np.flatnonzero(rot == int(ano)))
+    if meses:
+        cod, rot = cubo.dims["Mês"]
+        m &= np.isin(cod, np.flatnonzero(np.isin(rot, [int(x) for x in meses])))
+    return m
+
+def _agregar(cubo: Cubo, por: list[str], m: np.ndarray, medidas: list[str]) -> dict[str, np.ndarray]:
+    if not por:
+        return {k: cubo.medidas[k][m].sum(keepdims=True) for k in medidas}
+    if not m.any():
+        return {c: cubo.dims[c][1][:0] for c in por} | {k: cubo.medidas[k][:0] for k in medidas}
+    tams = [len(cubo.dims[c][1]) for c in por]
+    chave = np.ravel_multi_index([cubo.dims[c][0][m] for c in por], tams)
+    n = int(np.prod(tams))
+    ocupadas = np.flatnonzero(np.bincount(chave, minlength=n))
+    out = {c: cubo.dims[c][1][i] for c, i in zip(por, np.unravel_index(ocupadas, tams))}
+    for k in medidas:
+        v = cubo.medidas[k]
+        out[k] = np.bincount(chave, weights=v[m], minlength=n)[ocupadas].astype(v.dtype)
+    return out
+
+def receita_por(por: list[str], ano=None, meses=None, sem_fiado: bool = True,
+                snap: Snapshot | None = None) -> pd.DataFrame:
+    """
+    Valor e Linhas agrupados por `por` (colunas de DIM_RECEITA, rótulos em ordem; [] = total numa linha),
+    no ano/meses informados (None = todos), sem as linhas de Conta fiado se `sem_fiado`.
+    """
+    r = cubos(snap).receita
+    m = _fatia(r, ano, meses)
+    if sem_fiado:
+        cod, rot = r.dims["Conta"]
+        m &= ~np.array([str(x).casefold() == "fiado" for x in rot], dtype=bool)[cod]
+    return pd.DataFrame(_agregar(r, por, m, MED_RECEITA))
+
+def clientes_por(ano=None, meses=None, por: list[str] | None = None,
+                 snap: Snapshot | None = None) -> pd.DataFrame:
+    """
+    Por cliente (e pelas colunas `por`, ex. ["Ano"]): Valor (tudo), Fiado (R$), Receita (= Valor − Fiado),
+    Linhas, LinhasFiado e Visitas (1 por ClienteKey + Dia, na grafia da 1ª linha da visita) no ano/meses
+    informados — a mesma contagem de visitas().
+    """
+    c = cubos(snap).clientes
+    out = _agregar(c, ["Cliente", *(por or [])], _fatia(c, ano, meses), MED_CLIENTES)
+    out["Receita"] = out["Valor"] - out["Fiado"]
+    return pd.DataFrame(out)
+
+# =========================
+# FIADOS EM ABERTO
+# =========================
+@dataclass(frozen=True)
+class FiadosAbertos:
+    linhas: pd.DataFrame          # linhas "Em aberto" (rótulos da base): Cliente, ClienteKey, IDLancFiado, DataDT,
+                                  # Serviço, Valor, Combo, Funcionário, Vencimento
+    ids: pd.DataFrame             # 1 por IDLancFiado (índice): Cliente, ClienteKey, DataDT, ValorTotal, Qtde, Combo,
+                                  # Vencimento (o mais antigo do lançamento)
+    por_cliente: dict             # ClienteKey -> IDLancFiado em aberto (mais antigo primeiro)
+    por_id: dict                  # IDLancFiado -> rótulos das linhas
+
+def _linhas_fiado(df: pd.DataFrame) -> pd.DataFrame:
+    a = df[_col(df, "StatusFiado").eq("Em aberto")]
+    return pd.DataFrame({
+        "Cliente": _col(a, "Cliente"), COL_CHAVE: a[COL_CHAVE].astype(str), "IDLancFiado": _col(a, "IDLancFiado"),
+        "DataDT": a["DataDT"], "Serviço": _col(a, "Serviço"), "Valor": a["ValorNum"].astype(float),
+        "Combo": _col(a, "Combo"), "Funcionário": _col(a, "Funcionário"),
+        "Vencimento": parse_datas(_col(a, "VencimentoFiado"), (DATA_FMT,), serial=False),
+    }, index=a.index)
+
+def resumo_ids(linhas: pd.DataFrame) -> pd.DataFrame:
+    """1 linha por IDLancFiado (índice) a partir de linhas em aberto (inteiras ou já filtradas)."""
+    return (linhas.assign(Qtde=linhas["Serviço"].ne("").astype(int))
+            .groupby("IDLancFiado", sort=False)
+            .agg(Cliente=("Cliente", "first"), **{COL_CHAVE: (COL_CHAVE, "first")}, DataDT=("DataDT", "min"),
+                 ValorTotal=("Valor", "sum"), Qtde=("Qtde", "sum"), Combo=("Combo", "first"),
+                 Vencimento=("Vencimento", "min")))
+
+def _montar_fiados(linhas: pd.DataFrame) -> FiadosAbertos:
+    ids = resumo_ids(linhas).sort_values("DataDT", kind="stable")
+    por_cliente = {k: v.to_numpy() for k, v in ids.index.to_series().groupby(ids[COL_CHAVE], sort=False)}
+    return FiadosAbertos(linhas, ids, por_cliente, _rotulos_por(linhas, "IDLancFiado"))
+
+def _fiados(df: pd.DataFrame) -> FiadosAbertos:
+    return _montar_fiados(_linhas_fiado(df))
+
+def _anexar_fiados(f: FiadosAbertos, novas: pd.DataFrame) -> FiadosAbertos:
+    n = _linhas_fiado(novas)
+    return f if n.empty else _montar_fiados(pd.concat([f.linhas, n]))
+
+def fiados_abertos(snap: Snapshot | None = None) -> FiadosAbertos:
+    """Fiados em aberto da base (montado 1x por versão; lançamentos novos entram no append)."""
+    return indice("fiados_abertos", _fiados, _anexar_fiados, snap=snap)
+
+def dias_atraso(vencimento: pd.Series, hoje=None) -> pd.Series:
+    """Dias desde o vencimento (0 se em dia ou sem vencimento)."""
+    hoje = pd.Timestamp(hoje or pd.Timestamp.today().date())
+    return (hoje - vencimento).dt.days.clip(lower=0).fillna(0).astype(int)
+
+def fiados_do_cliente(cliente: str, hoje=None, snap: Snapshot | None = None) -> pd.DataFrame:
+    """IDLancFiado em aberto do cliente (mesma ClienteKey), com DiasAtraso."""
+    f = fiados_abertos(snap)
+    ids = f.ids.loc[f.por_cliente.get(chave_cliente(cliente), [])].copy()
+    ids["DiasAtraso"] = dias_atraso(ids["Vencimento"], hoje)
+    return ids
+
+def linhas_fiado(ids=None, cliente: str | None = None, snap: Snapshot | None = None) -> pd.DataFrame:
+    """Linhas em aberto dos `ids` (ou do cliente, ou todas), na ordem da base."""
+    f = fiados_abertos(snap)
+    if ids is None and cliente is not None:
+        ids = f.por_cliente.get(chave_cliente(cliente), [])
+    if ids is None:
+        return f.linhas.copy()
+    rot = [f.por_id[i] for i in ids if i in f.por_id]
+    return f.linhas.loc[np.sort(np.concatenate(rot)) if rot else []].copy()
+
+def baixar_fiados(rotulos, snap: Snapshot | None = None) -> bool:
+    """Tira do índice as linhas quitadas (chamar ao enfileirar o pagamento)."""
+    def sem(f: FiadosAbertos) -> FiadosAbertos:
+        return _montar_fiados(f.linhas.drop(index=list(rotulos), errors="ignore"))
+    return trocar_indice("fiados_abertos", sem, snap=snap)
+
+# =========================
+# PREÇOS POR SERVIÇO (sugestão do Agendamento)
+# =========================
+JANELA_PRECOS_DIAS = 120
+
+@dataclass(frozen=True)
+class PrecosServicos:
+    linhas: pd.DataFrame          # Servico (chave minúscula), DataDT, Valor — só linhas com data e valor > 0
+    tabela: pd.DataFrame          # índice Servico: Mediana, P25, P75, Ultimo, UltimaData, Qtde, NaJanela
+    desde: pd.Timestamp           # início da janela com que a tabela foi montada
+
+def _linhas_preco(df: pd.DataFrame) -> pd.DataFrame:
+    d = df[df["DataDT"].notna() & (df["ValorNum"] > 0)]
+    return pd.DataFrame({"Servico": _col(d, "Serviço").str.lower(), "DataDT": d["DataDT"],
+                         "Valor": d["ValorNum"].astype(float)}).query("Servico != ''")
+
+def _tabela_precos(linhas: pd.DataFrame, desde: pd.Timestamp) -> pd.DataFrame:
+    # serviço com linha dentro da janela usa só a janela; sem nenhuma, usa o histórico inteiro
+    l = linhas.sort_values("DataDT", kind="stable")
+    na_janela = l["DataDT"].ge(desde)
+    com_janela = l["Servico"].isin(l.loc[na_janela, "Servico"].unique())
+    l = l[na_janela | ~com_janela]
+    g = l.groupby("Servico", sort=True)["Valor"]
+    q = g.quantile([0.25, 0.5, 0.75]).unstack()
+    return pd.DataFrame({
+        "Mediana": q[0.5], "P25": q[0.25], "P75": q[0.75], "Ultimo": g.last(),
+        "UltimaData": l.groupby("Servico", sort=True)["DataDT"].max(), "Qtde": g.size(),
+        "NaJanela": q.index.isin(l.loc[na_janela, "Servico"].unique()),
+    })
+
+def _precos(linhas: pd.DataFrame, desde: pd.Timestamp) -> PrecosServicos:
+    return PrecosServicos(linhas, _tabela_precos(linhas, desde), desde)
+
+def _anexar_precos(p: PrecosServicos, novas: pd.DataFrame) -> PrecosServicos:
+    n = _linhas_preco(novas)
+    return p if n.empty else _precos(pd.concat([p.linhas, n]), p.desde)
+
+def preco_servicos(janela_dias: int = JANELA_PRECOS_DIAS, hoje=None,
+                   snap: Snapshot | None = None) -> pd.DataFrame:
+    """
+    Estatística de preço por serviço (índice = nome em minúsculas) nos últimos `janela_dias`;
+    serviço sem atendimento na janela cai para o histórico todo (NaJanela=False).
+    Um índice por janela, montado 1x por versão; appends e troca de dia recalculam só a tabela.
+    """
+    desde = pd.Timestamp(hoje or pd.Timestamp.today().date()) - pd.Timedelta(days=int(janela_dias))
+    nome = f"precos:{int(janela_dias)}"
+    def construir(df: pd.DataFrame) -> PrecosServicos:
+        return _precos(_linhas_preco(df), desde)
+
+    def no_dia(p: PrecosServicos) -> PrecosServicos:
+        return p if p.desde == desde else _precos(p.linhas, desde)
+
+    p = indice(nome, construir, _anexar_precos, snap=snap)
+    if p.desde != desde:
+        # outro dia: refaz só a tabela com as linhas já guardadas, no lugar da do dia anterior
+        trocar_indice(nome, no_dia, snap=snap)
+        p = indice(nome, construir, _anexar_precos, snap=snap)
+    return p.tabela
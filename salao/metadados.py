@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+# salao/metadados.py — abas da planilha e cabeçalhos (linha 1) de todas elas, guardados no processo
+#
+# - Uma carga: fetch_sheet_metadata (títulos, ids, tamanhos, developerMetadata) + 1 values_batch_get
+#   com a linha 1 de todas as abas.
+# - Depois disso, achar aba, abrir o Worksheet e consultar cabeçalho/posição de coluna não custam chamada.
+# - O cache só muda quando o próprio app mexe em cabeçalho ou cria aba (garantir_aba, garantir_colunas,
+#   anotar_cabecalho) ou quando alguém chama invalidar() (ex.: leitura achou coluna fora do lugar).
+
+import threading
+from dataclasses import dataclass, field
+from typing import Callable
+
+import gspread
+import streamlit as st
+from gspread.worksheet import Worksheet
+
+from salao.sheets import conectar
+
+@dataclass
+class InfoAba:
+    titulo: str
+    propriedades: dict              # "properties" da aba no spreadsheets.get (sheetId, index, gridProperties...)
+    cabecalho: list[str] = field(default_factory=list)
+    marcas: dict[str, dict] = field(default_factory=dict)   # developerMetadata da aba: chave -> {"id", "valor"}
+
+@dataclass
+class _Estado:
+    lock: threading.RLock = field(default_factory=threading.RLock)
+    abas: dict[str, InfoAba] | None = None   # título -> InfoAba, na ordem da planilha
+
+@st.cache_resource(show_spinner=False)
+def _estado() -> _Estado:
+    return _Estado()
+
+def a1(aba: str, faixa: str | None = None) -> str:
+    """'Aba'!faixa com o nome entre aspas (aspas simples do nome dobradas)."""
+    nome = "'" + aba.replace("'", "''") + "'"
+    return f"{nome}!{faixa}" if faixa else nome
+
+def _limpar(linha: list) -> list[str]:
+    return [str(c).strip() for c in linha]
+
+# =========================
+# CARGA
+# =========================
+def _marcas(itens: list[dict]) -> dict[str, dict]:
+    return {m["metadataKey"]: {"id": m.get("metadataId"), "valor": m.get("metadataValue", "")}
+            for m in itens if "metadataKey" in m}
+
+def _carregar() -> dict[str, InfoAba]:
+    ss = conectar()
+    meta = ss.fetch_sheet_metadata(params={"fields": "sheets(properties,developerMetadata)"})
+    folhas = meta.get("sheets", [])
+    grades = [s["properties"] for s in folhas if s["properties"].get("sheetType", "GRID") == "GRID"]
+    resp = (ss.values_batch_get([a1(p["title"], "1:1") for p in grades],
+                                params={"valueRenderOption": "FORMATTED_VALUE"})
+            if grades else {"valueRanges": []})
+    linhas = {p["title"]: vr.get("values", [[]]) for p, vr in zip(grades, resp.get("valueRanges", []))}
+    out = {}
+    for s in folhas:
+        p = s["properties"]
+        cab = (linhas.get(p["title"]) or [[]])[0]
+        out[p["title"]] = InfoAba(p["title"], p, _limpar(cab), _marcas(s.get("developerMetadata", [])))
+    return out
+
+def abas() -> dict[str, InfoAba]:
+    """Todas as abas da planilha (carrega na primeira vez)."""
+    est = _estado()
+    with est.lock:
+        if est.abas is None:
+            est.abas = _carregar()
+        return est.abas
+
+def invalidar():
+    """Descarta o cache: a próxima consulta busca abas e cabeçalhos de novo."""
+    est = _estado()
+    with est.lock:
+        est.abas = None
+
+# =========================
+# CONSULTA (sem chamada)
+# =========================
+def titulos() -> list[str]:
+    return list(abas())
+
+def existe(titulo: str) -> bool:
+    return titulo in abas()
+
+def cabecalho(titulo: str) -> list[str]:
+    """Linha 1 da aba (nomes sem espaços nas pontas); [] se a aba não existe ou está vazia."""
+    info = abas().get(titulo)
+    return list(info.cabecalho) if info else []
+
+def mapa_colunas(titulo: str, normalizar: Callable[[str], str] | None = None) -> dict[str, int]:
+    """Nome (normalizado, se informado) -> coluna 1-based; em nomes repetidos vale a primeira."""
+    mapa = {}
+    for i, h in enumerate(cabecalho(titulo)):
+        k = normalizar(h) if normalizar else h
+        if k and k not in mapa:
+            mapa[k] = i + 1
+    return mapa
+
+def marca(titulo: str, chave: str) -> str | None:
+    """Valor do developerMetadata `chave` gravado na aba (None se não houver)."""
+    info = abas().get(titulo)
+    m = info.marcas.get(chave) if info else None
+    return m["valor"] if m else None
+
+def worksheet(titulo: str) -> Worksheet:
+    """Worksheet montado com as propriedades guardadas (o ss.worksheet() do gspread relê os metadados)."""
+    info = abas().get(titulo)
+    if info is None:
+        raise gspread.WorksheetNotFound(titulo)
+    ss = conectar()
+    return Worksheet(ss, info.propriedades, ss.id, ss.client)
+
+# =========================
+# ALTERAÇÕES FEITAS PELO APP
+# =========================
+def anotar_cabecalho(titulo: str, novo: list[str]):
+    """Depois de o app gravar a linha 1 de uma aba: atualiza o cache sem reler."""
+    est = _estado()
+    with est.lock:
+        info = (est.abas or {}).get(titulo)
+        if info is not None:
+            info.cabecalho = _limpar(novo)
+
+def pedido_marca(titulo: str, chave: str, valor: str) -> dict:
+    """Request de batchUpdate que grava (cria ou atualiza) o developerMetadata `chave` na aba."""
+    info = abas()[titulo]
+    m = info.marcas.get(chave)
+    if m and m.get("id") is not None:
+        return {"updateDeveloperMetadata": {
+            "dataFilters": [{"developerMetadataLookup": {"metadataId": m["id"]}}],
+            "developerMetadata": {"metadataValue": valor},
+            "fields": "metadataValue",
+        }}
+    return {"createDeveloperMetadata": {"developerMetadata": {
+        "metadataKey": chave, "metadataValue": valor, "visibility": "DOCUMENT",
+        "location": {"sheetId": info.propriedades["sheetId"]},
+    }}}
+
+def anotar_marca(titulo: str, chave: str, valor: str, resposta: dict | None = None):
+    """Depois do batchUpdate com pedido_marca: guarda o valor (e o id novo, se foi criado)."""
+    est = _estado()
+    with est.lock:
+        info = (est.abas or {}).get(titulo)
+        if info is None:
+            return
+        m = dict(info.marcas.get(chave) or {})
+        for r in (resposta or {}).get("replies", []):
+            criado = (r or {}).get("createDeveloperMetadata", {}).get("developerMetadata", {})
+            if criado.get("metadataKey") == chave:
+                m["id"] = criado.get("metadataId")
+        m["valor"] = valor
+        info.marcas[chave] = m
+
+def garantir_aba(titulo: str, cabecalho_padrao: list[str] | None = None,
+                 linhas: int = 1000, colunas: int = 26) -> Worksheet:
+    """Worksheet da aba; cria a aba (e escreve o cabeçalho padrão) se não existir ou estiver sem cabeçalho."""
+    if not existe(titulo):
+        try:
+            conectar().add_worksheet(title=titulo, rows=linhas, cols=max(colunas, len(cabecalho_padrao or [])))
+        except gspread.exceptions.APIError:
+            pass  # já foi criada por fora: a releitura abaixo acha
+        invalidar()
+    ws = worksheet(titulo)
+    if cabecalho_padrao and not cabecalho(titulo):
+        ws.update(values=[list(cabecalho_padrao)], range_name="A1")
+        anotar_cabecalho(titulo, cabecalho_padrao)
+    return ws
+
+def garantir_colunas(titulo: str, colunas: list[str],
+                     normalizar: Callable[[str], str] | None = None) -> list[str]:
+    """
+    Acrescenta no fim da linha 1 as colunas que faltarem e devolve o cabeçalho final.
+    Sem nada faltando no cache, não faz chamada; antes de gravar, confere a linha 1 atual na planilha.
+    """
+    chave = normalizar or (lambda s: s)
+    def faltam(cab):
+        tem = {chave(h) for h in cab}
+        return [c for c in colunas if chave(c) not in tem]
+    cab = cabecalho(titulo)
+    if not faltam(cab):
+        return cab
+    ws = worksheet(titulo)
+    cab = _limpar(ws.row_values(1))
+    novas = faltam(cab)
+    if novas:
+        cab = cab + list(novas)
+        ws.update(values=[cab], range_name="A1")
+    anotar_cabecalho(titulo, cab)
+    return cab
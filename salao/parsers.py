@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+# salao/parsers.py — conversão de valores (R$) e datas vindos do Sheets
+
+import numpy as np
+import pandas as pd
+
+DATA_FMT = "%d/%m/%Y"
+FORMATOS_DATA = (DATA_FMT, "%d-%m-%Y", "%Y-%m-%d", "%d/%m/%y")
+
+def _valor_texto(txt: pd.Series) -> pd.Series:
+    out = pd.to_numeric(txt, errors="coerce")      # números e texto já no formato '1234.56'
+    resto = out.isna() & txt.notna()
+    if not resto.any():
+        return out
+    s = (txt[resto].astype(str)
+         .str.replace("\u00a0", "", regex=False)
+         .str.replace(r"[Rr]\$|\s", "", regex=True))
+    virg = s.str.contains(",", regex=False)
+    s = s.where(~virg, s.str.replace(".", "", regex=False).str.replace(",", ".", regex=False))
+    pontos = s.str.count(r"\.").gt(1)
+    if pontos.any():                               # vários pontos: último = decimal
+        partes = s[pontos].str.rpartition(".")
+        s[pontos] = partes[0].str.replace(".", "", regex=False) + "." + partes[2]
+    out[resto] = pd.to_numeric(s, errors="coerce")
+    return out
+
+def coerce_valor(series: pd.Series) -> pd.Series:
+    """
+    Converte: número, 'R$ 1.234,56', '1.234,56', '25,00', '1234.56', '1.234.567' etc.
+    Com vírgula: '.' é milhar e ',' decimal; só pontos: o último é o decimal.
+    Vazio ou inválido -> 0.0. Vetorizado: converte só os valores distintos e espalha.
+    """
+    if pd.api.types.is_numeric_dtype(series):
+        return pd.to_numeric(series, errors="coerce").fillna(0.0).astype(float)
+    codigos, unicos = pd.factorize(series)
+    conv = _valor_texto(pd.Series(unicos, dtype=object)).fillna(0.0).to_numpy(dtype=float)
+    out = np.where(codigos >= 0, conv[codigos] if len(conv) else 0.0, 0.0)
+    return pd.Series(out, index=series.index, name=series.name)
+
+def _datas_unicas(txt: pd.Series, formatos, serial: bool, dayfirst: bool) -> pd.Series:
+    s = txt.astype(str).str.strip()
+    dt = pd.Series(pd.NaT, index=s.index, dtype="datetime64[ns]")
+    resto = txt.notna() & s.ne("")
+    for fmt in formatos:                           # uma passada por formato, só no que sobrou
+        if not resto.any():
+            return dt
+        dt[resto] = pd.to_datetime(s[resto], format=fmt, errors="coerce")
+        resto &= dt.isna()
+    if serial and resto.any():                     # número serial do Sheets
+        num = pd.to_numeric(s[resto], errors="coerce")
+        dt[resto] = pd.to_datetime(num, unit="D", origin="1899-12-30", errors="coerce")
+        resto &= dt.isna()
+    if dayfirst and resto.any():
+        dt[resto] = pd.to_datetime(s[resto], format="mixed", errors="coerce", dayfirst=True)
+    return dt
+
+def parse_datas(col: pd.Series, formatos=FORMATOS_DATA, serial: bool = True,
+                dayfirst: bool = False) -> pd.Series:
+    """
+    Texto/número do Sheets -> datetime64 (NaT quando não reconhece).
+    Tenta cada formato em ordem sobre a coluna inteira; serial=True aceita o número de dias do Sheets;
+    dayfirst=True tenta por último o parser livre do pandas (dia primeiro).
+    """
+    if pd.api.types.is_datetime64_any_dtype(col):
+        return col
+    codigos, unicos = pd.factorize(col)
+    conv = _datas_unicas(pd.Series(unicos, dtype=object), formatos, serial, dayfirst).to_numpy()
+    conv = np.append(conv, np.datetime64("NaT", "ns"))   # código -1 (vazio) -> NaT
+    return pd.Series(conv[codigos], index=col.index, name=col.name)
+
+def so_dia(dt: pd.Series) -> pd.Series:
+    """datetime64 -> datetime.date (None onde não há data)."""
+    dias = pd.Series(dt.dt.date, index=dt.index, dtype=object)
+    return dias.where(dt.notna(), None)
+
+def parse_data_sheets(col: pd.Series) -> pd.Series:
+    """Coluna 'Data' da base: formatos conhecidos, serial do Sheets e, por fim, dia primeiro."""
+    return parse_datas(col, dayfirst=True)
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+# salao/sheets.py — conexão única com o Google Sheets (usada por todas as páginas)
+
+import json
+import os
+import time
+
+import gspread
+import streamlit as st
+from google.auth.transport.requests import AuthorizedSession
+from google.oauth2.service_account import Credentials
+
+from salao.cota import ClienteCota
+
+# =========================
+# CONFIG
+# =========================
+SHEET_ID = "1qtOF1I7Ap4By2388ySThoVlZHbI3rAJv_haEcil0IUE"
+ABA_BASE = "Base de Dados Feminino"
+ABA_STATUS = "clientes_status_feminino"
+
+ESCOPOS = [
+    "https://www.googleapis.com/auth/spreadsheets",
+    "https://www.googleapis.com/auth/drive",
+]
+# Chaves aceitas em st.secrets (mesma ordem de tentativa das páginas antigas)
+CHAVES_SECRETS = [
+    "GCP_SERVICE_ACCOUNT", "gcp_service_account",
+    "gcp_service_account_feminino", "google_credentials",
+]
+
+TTL_VERSAO = 60  # segundos entre consultas da versão da planilha no Drive
+DRIVE_FILES_URL = "https://www.googleapis.com/drive/v3/files/{}"
+
+# =========================
+# CONEXÃO
+# =========================
+@st.cache_resource(show_spinner=False)
+def credenciais() -> Credentials:
+    info = None
+    for k in CHAVES_SECRETS:
+        try:
+            info = st.secrets.get(k)
+        except Exception:
+            info = None
+        if info:
+            break
+    info = info or os.environ.get("GCP_SERVICE_ACCOUNT")
+    if not info:
+        st.error("Secrets ausentes. Adicione [GCP_SERVICE_ACCOUNT] nos Secrets do Streamlit.")
+        st.stop()
+    if isinstance(info, str):
+        info = json.loads(info)
+    return Credentials.from_service_account_info(dict(info), scopes=ESCOPOS)
+
+def autorizar(creds) -> gspread.Client:
+    """gspread.authorize com o cliente que respeita a cota (salao/cota.py). Use em todas as páginas."""
+    return gspread.authorize(creds, http_client=ClienteCota)
+
+@st.cache_resource(show_spinner=False)
+def conectar() -> gspread.Spreadsheet:
+    return autorizar(credenciais()).open_by_key(SHEET_ID)
+
+@st.cache_resource(show_spinner=False)
+def _sessao_drive() -> AuthorizedSession:
+    return AuthorizedSession(credenciais())
+
+@st.cache_data(ttl=TTL_VERSAO, show_spinner=False)
+def versao_planilha() -> str:
+    """
+    Token de versão da planilha (campo 'version' do Drive, muda a cada edição).
+    Se o Drive falhar, usa um token por janela de tempo (recarrega a cada 5 min, como antes).
+    """
+    try:
+        r = _sessao_drive().get(
+            DRIVE_FILES_URL.format(SHEET_ID),
+            params={"fields": "version", "supportsAllDrives": "true"},
+            timeout=10,
+        )
+        if r.ok:
+            v = str(r.json().get("version") or "").strip()
+            if v:
+                return v
+    except Exception:
+        pass
+    return f"t{int(time.time() // 300)}"
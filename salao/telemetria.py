@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+# salao/telemetria.py — contagem e latência das chamadas externas (Sheets, Drive, Telegram, Cloudinary, HTTP)
+#
+# - Um gancho em requests.Session.request (gspread, Drive, Telegram, requests.*) e nos conectores
+#   urllib3 do Cloudinary registra cada chamada: serviço, operação, bytes, latência e sucesso.
+# - Cada página chama pagina("nome") no topo: abre um novo "rerun" para a sessão e, com ?debug=1
+#   na URL (ou SALAO_TELEMETRIA_PAINEL=1), mostra na sidebar os números do rerun anterior.
+# - Todo evento vai também para um log JSON-lines (SALAO_TELEMETRIA_LOG; vazio desliga).
+
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from urllib.parse import urlparse
+
+import pandas as pd
+import requests
+import streamlit as st
+
+from salao.disco import PASTA_CACHE
+
+try:
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+except ImportError:  # pragma: no cover
+    def get_script_run_ctx():
+        return None
+
+# =========================
+# CONFIG
+# =========================
+_log_env = os.environ.get("SALAO_TELEMETRIA_LOG")
+ARQ_LOG = None if _log_env == "" else Path(_log_env or PASTA_CACHE / "telemetria.jsonl")
+LOG_MAX_BYTES = 5 * 1024 * 1024          # acima disso o log vira .1 e recomeça
+PAINEL_SEMPRE = os.environ.get("SALAO_TELEMETRIA_PAINEL") == "1"
+FAIXAS_MS = (50, 100, 250, 500, 1000, 2500, 5000)   # limites do histograma de latência
+
+SERVICOS_POR_HOST = {
+    "sheets.googleapis.com": "sheets",
+    "www.googleapis.com": "drive",
+    "oauth2.googleapis.com": "auth",
+    "api.telegram.org": "telegram",
+    "api.cloudinary.com": "cloudinary",
+    "res.cloudinary.com": "cloudinary",
+}
+
+# Máximo de chamadas por rerun, por página e serviço (acima disso o painel avisa e o log marca).
+# Medido com o painel: rerun frio = metadados (2) + base (1) + leituras próprias da página;
+# com a versão em cache, rerun sem gravar fica em 0 no Sheets. Drive: versão (cache de 60s)
+# + a conferida antes de gravar. Telegram 0 onde os cards saem da fila (contam como "(fundo)").
+ORCAMENTOS: dict[str, dict[str, int]] = {
+    "3_Adicionar_Atendimento": {"sheets": 6, "drive": 2, "telegram": 0},    # + foto, cauda e cabeçalho ao gravar
+    "5_Agendamento": {"sheets": 8, "drive": 2, "telegram": 0},              # + Agendamentos 2x e cauda ao confirmar
+    "11_Comissoes_Daniela": {"sheets": 8, "drive": 2, "telegram": 2},       # + abas, Valor, colunas e cache ao pagar
+    "12_Atendimentos_Por_Dia": {"sheets": 5, "drive": 2},                   # + cauda e conferência/exclusão ao gravar
+}
+
+# =========================
+# ESTADO (por processo)
+# =========================
+@dataclass
+class Rerun:
+    pagina: str
+    numero: int
+    inicio: float
+    orcamento: dict = field(default_factory=dict)
+    chamadas: list = field(default_factory=list)
+
+@dataclass
+class _Estado:
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    atual: dict = field(default_factory=dict)       # session_id -> Rerun em andamento
+    anterior: dict = field(default_factory=dict)    # session_id -> último Rerun concluído
+    histograma: dict = field(default_factory=dict)  # (pagina, servico) -> contagem por faixa
+    instrumentado: bool = False
+
+@st.cache_resource(show_spinner=False)
+def _estado() -> _Estado:
+    return _Estado()
+
+def _sessao() -> str | None:
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx is not None else None
+
+# =========================
+# REGISTRO
+# =========================
+def registrar(servico: str, operacao: str, inicio: float, n_bytes: int = 0, ok: bool = True):
+    """Registra uma chamada externa iniciada em `inicio` (time.perf_counter())."""
+    ms = (time.perf_counter() - inicio) * 1000
+    est = _estado()
+    sid = _sessao()
+    with est.lock:
+        rr = est.atual.get(sid) if sid else None
+        pagina = rr.pagina if rr else "(fundo)"
+        faixas = est.histograma.setdefault((pagina, servico), [0] * (len(FAIXAS_MS) + 1))
+        faixas[sum(ms > f for f in FAIXAS_MS)] += 1
+        ev = {
+            "ts": round(time.time(), 3), "pagina": pagina, "rerun": rr.numero if rr else None,
+            "sessao": sid, "servico": servico, "operacao": operacao,
+            "ms": round(ms, 1), "bytes": int(n_bytes), "ok": bool(ok),
+        }
+        if rr is not None:
+            rr.chamadas.append(ev)
+            limite = rr.orcamento.get(servico)
+            if limite is not None and sum(c["servico"] == servico for c in rr.chamadas) > limite:
+                ev["acima_orcamento"] = True
+    _gravar_log(ev)
+
+def _gravar_log(ev: dict):
+    if ARQ_LOG is None:
+        return
+    try:
+        ARQ_LOG.parent.mkdir(parents=True, exist_ok=True)
+        if ARQ_LOG.exists() and ARQ_LOG.stat().st_size > LOG_MAX_BYTES:
+            os.replace(ARQ_LOG, ARQ_LOG.with_suffix(".jsonl.1"))
+        with open(ARQ_LOG, "a", encoding="utf-8") as f:
+            f.write(json.dumps(ev, ensure_ascii=False) + "\n")
+    except OSError:
+        pass
+
+# =========================
+# GANCHOS
+# =========================
+def _servico(url: str) -> tuple[str, str]:
+    u = urlparse(url)
+    return SERVICOS_POR_HOST.get(u.hostname or "", "http"), u.path
+
+def _tamanho(resp, stream: bool) -> int:
+    if resp is None:
+        return 0
+    if not stream:
+        return len(resp.content or b"")
+    return int(resp.headers.get("Content-Length") or 0)
+
+def _gancho_requests(original):
+    def request(self, method, url, *args, **kwargs):
+        inicio = time.perf_counter()
+        resp = None
+        try:
+            resp = original(self, method, url, *args, **kwargs)
+            return resp
+        finally:
+            servico, caminho = _servico(str(url))
+            registrar(servico, f"{method.upper()} {caminho}", inicio,
+                      _tamanho(resp, kwargs.get("stream", False)), resp is not None and resp.ok)
+    return request
+
+def _gancho_urllib3(original):
+    def request(method, url, *args, **kwargs):
+        inicio = time.perf_counter()
+        resp = None
+        try:
+            resp = original(method, url, *args, **kwargs)
+            return resp
+        finally:
+            servico, caminho = _servico(str(url))
+            registrar(servico, f"{method.upper()} {caminho}", inicio,
+                      len(getattr(resp, "data", b"") or b""), resp is not None and resp.status < 400)
+    return request
+
+def instrumentar():
+    """Instala os ganchos uma vez por processo."""
+    est = _estado()
+    with est.lock:
+        if est.instrumentado:
+            return
+        est.instrumentado = True
+    requests.Session.request = _gancho_requests(requests.Session.request)
+    try:
+        import cloudinary.uploader
+        import cloudinary.api_client.call_api
+        for mod in (cloudinary.uploader, cloudinary.api_client.call_api):
+            http = getattr(mod, "_http", None)
+            if http is not None:
+                http.request = _gancho_urllib3(http.request)
+    except ImportError:
+        pass
+
+# =========================
+# PÁGINA / PAINEL
+# =========================
+def pagina(nome: str, orcamento: dict[str, int] | None = None):
+    """Chame no topo de cada página: inicia o rerun desta sessão e desenha o painel de debug."""
+    instrumentar()
+    sid = _sessao()
+    if sid is None:
+        return
+    est = _estado()
+    with est.lock:
+        ant = est.atual.get(sid)
+        if ant is not None:
+            est.anterior[sid] = ant
+        numero = ant.numero + 1 if ant is not None and ant.pagina == nome else 1
+        est.atual[sid] = Rerun(nome, numero, time.time(), orcamento or ORCAMENTOS.get(nome, {}))
+        ant = est.anterior.get(sid)
+    if PAINEL_SEMPRE or st.query_params.get("debug") == "1":
+        _painel(ant)
+
+def resumo(chamadas: list[dict]) -> pd.DataFrame:
+    """Chamadas de um rerun agrupadas por serviço: quantidade, bytes e latência."""
+    if not chamadas:
+        return pd.DataFrame(columns=["servico", "chamadas", "erros", "bytes", "ms_total", "ms_max"])
+    df = pd.DataFrame(chamadas)
+    return (df.assign(erros=~df["ok"])
+              .groupby("servico", as_index=False)
+              .agg(chamadas=("ms", "size"), erros=("erros", "sum"), bytes=("bytes", "sum"),
+                   ms_total=("ms", "sum"), ms_max=("ms", "max")))
+
+def histograma() -> pd.DataFrame:
+    """Latência acumulada no processo por página e serviço (contagem por faixa de ms)."""
+    est = _estado()
+    with est.lock:
+        itens = {k: list(v) for k, v in est.histograma.items()}
+    cols = [f"≤{f}" for f in FAIXAS_MS] + [f">{FAIXAS_MS[-1]}"]
+    linhas = [{"pagina": p, "servico": s, **dict(zip(cols, v))} for (p, s), v in sorted(itens.items())]
+    return pd.DataFrame(linhas, columns=["pagina", "servico", *cols])
+
+def _painel(rr: Rerun | None):
+    with st.sidebar.expander("🔎 Chamadas externas (debug)", expanded=False):
+        if rr is None:
+            st.caption("Sem rerun anterior nesta sessão.")
+        else:
+            st.caption(f"Rerun anterior: {rr.pagina} #{rr.numero} — {len(rr.chamadas)} chamada(s)")
+            res = resumo(rr.chamadas)
+            st.dataframe(res, hide_index=True)
+            for _, r in res.iterrows():
+                limite = rr.orcamento.get(r["servico"])
+                if limite is not None and r["chamadas"] > limite:
+                    st.warning(f"{r['servico']}: {r['chamadas']} chamadas (orçamento {limite})")
+        st.caption("Latência no processo (ms)")
+        st.dataframe(histograma(), hide_index=True)
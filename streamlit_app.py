@@ -1,32 +1,39 @@
 import streamlit as st
 import pandas as pd
-import gspread
-from google.oauth2.service_account import Credentials
 
-# Autenticação com Google Sheets
-scopes = ["https://www.googleapis.com/auth/spreadsheets.readonly"]
-credentials = Credentials.from_service_account_info(st.secrets["gcp_service_account"], scopes=scopes)
-client = gspread.authorize(credentials)
+from salao.abas import ler_colunas
+from salao.clientes import chave_cliente, chaves_clientes
+from salao.sheets import versao_planilha
+from salao import busca, telemetria
 
-# Nome da planilha e aba
-spreadsheet = client.open_by_url("https://docs.google.com/spreadsheets/d/1qtOF1I7Ap4By2388ySThoVlZHbI3rAJv_haEcil0IUE/edit")
-sheet = spreadsheet.worksheet("Base de Dados")
+telemetria.pagina("streamlit_app")
 
-# Carregar dados
-dados = pd.DataFrame(sheet.get_all_records())
+# Carregar dados: só as colunas que o portal mostra (salao/abas.py busca pelo cabeçalho)
+ABA = "Base de Dados"
+COLUNAS = ["Data", "Cliente", "Serviço", "Profissional", "Valor"]
+dados = ler_colunas(ABA, COLUNAS)
 dados["Data"] = pd.to_datetime(dados["Data"], dayfirst=True, errors="coerce")
 dados = dados.dropna(subset=["Data", "Cliente"])
 
 # Normalizar nomes (tira espaços e padroniza para comparação)
 dados["Cliente"] = dados["Cliente"].astype(str).str.strip()
 
-# Sidebar – Seleção do Cliente
-st.sidebar.markdown("🔎 **Selecione seu nome**")
-clientes_unicos = sorted(dados["Cliente"].unique())
-nome_cliente = st.sidebar.selectbox(" ", clientes_unicos)
+# Índice de busca dos nomes (salao/busca.py), montado 1x por versão da planilha
+@st.cache_resource(show_spinner=False, max_entries=2)
+def indice_portal(versao: str, _dados: pd.DataFrame):
+    return busca.montar_indice(busca.resumo_clientes(_dados, data="Data"))
+
+# Sidebar – Seleção do Cliente: o navegador só recebe os nomes que casam com o que foi digitado
+st.sidebar.markdown("🔎 **Digite seu nome**")
+with st.sidebar:
+    nome_cliente = busca.seletor_cliente(" ", key="portal_cliente", sugerir=False,
+                                         idx=indice_portal(versao_planilha(), dados))
+if not nome_cliente:
+    st.info("Digite seu nome na barra lateral para ver seu histórico.")
+    st.stop()
 
 # Filtrar dados do cliente selecionado
-dados_cliente = dados[dados["Cliente"] == nome_cliente]
+dados_cliente = dados[chaves_clientes(dados["Cliente"]).astype(str) == chave_cliente(nome_cliente)]  # qualquer grafia
 
 # Título principal
 st.markdown(f"### 📋 Histórico de {nome_cliente}")
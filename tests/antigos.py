@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+# tests/antigos.py — cópias das funções que o salao/parsers.py e o salao/base.py substituíram
+#
+# Só para os testes de equivalência e os scripts de medição (bench_parsers.py, relatorio_memoria.py).
+# Mantidas como estavam nas páginas; a única mudança é no _parse_data_sheets do app.py:
+# infer_datetime_format saiu do pandas (já era o padrão), então a chamada vai sem ele.
+
+from datetime import datetime
+
+import pandas as pd
+
+DATA_FMT = "%d/%m/%Y"
+
+# =========================
+# VALORES
+# =========================
+def coerce_valor_app(series: pd.Series) -> pd.Series:
+    """app.py: _coerce_valor."""
+    def parse_cell(x):
+        if pd.isna(x):
+            return 0.0
+        if isinstance(x, (int, float)):
+            return float(x)
+        s = str(x).strip()
+        if not s:
+            return 0.0
+        s = s.replace("R$", "").replace(" ", "")
+        if "," in s:                     # formato BR
+            s = s.replace(".", "")       # remove milhar
+            s = s.replace(",", ".")      # vírgula -> decimal
+            return pd.to_numeric(s, errors="coerce")
+        if s.count(".") > 1:             # vários pontos: último = decimal
+            left, last = s.rsplit(".", 1)
+            left = left.replace(".", "")
+            s = f"{left}.{last}"
+        return pd.to_numeric(s, errors="coerce")
+    return series.map(parse_cell).fillna(0.0)
+
+def parse_valor_qualquer(v):
+    """pages/1_Clientes.py."""
+    if pd.isna(v): return 0.0
+    if isinstance(v, (int, float)):
+        return float(v)
+
+    s = str(v).strip().replace("\u00A0", "")
+    s = s.replace("R$", "").replace("r$", "").replace(" ", "")
+
+    tem_virg = "," in s
+    tem_ponto = "." in s
+
+    if tem_virg and tem_ponto:
+        s = s.replace(".", "").replace(",", ".")
+    elif tem_virg and not tem_ponto:
+        s = s.replace(",", ".")
+
+    try:
+        return float(s)
+    except Exception:
+        x = pd.to_numeric(s, errors="coerce")
+        return float(x) if pd.notna(x) else 0.0
+
+def parse_valor_detalhes(v):
+    """pages/2_Detalhes_Cliente.py: parse_valor."""
+    if pd.isna(v): return 0.0
+    if isinstance(v, (int, float)): return float(v)
+    s = str(v).strip().replace("\u00A0", "")
+    s = s.replace("R$", "").replace("r$", "").replace(" ", "")
+    tem_virg = "," in s
+    tem_ponto = "." in s
+    if tem_virg and tem_ponto:
+        s = s.replace(".", "").replace(",", ".")
+    elif tem_virg and not tem_ponto:
+        s = s.replace(",", ".")
+    try:
+        return float(s)
+    except Exception:
+        x = pd.to_numeric(s, errors="coerce")
+        return float(x) if pd.notna(x) else 0.0
+
+def parse_valor_por_dia(v):
+    """pages/12_Atendimentos_Por_Dia.py: parse_valor (dentro do carregar_base)."""
+    if pd.isna(v): return 0.0
+    s = str(v).strip().replace("R$", "").replace(" ", "")
+    if "," in s and "." in s:
+        s = s.replace(".", "").replace(",", ".")
+    else:
+        s = s.replace(",", ".")
+    try:
+        return float(s)
+    except Exception:
+        return 0.0
+
+# =========================
+# DATAS
+# =========================
+def parse_data_por_dia(x):
+    """pages/12_Atendimentos_Por_Dia.py: parse_data (-> date)."""
+    if pd.isna(x): return None
+    if isinstance(x, (datetime, pd.Timestamp)): return x.date()
+    s = str(x).strip()
+    for fmt in ("%d/%m/%Y", "%d-%m-%Y", "%Y-%m-%d", "%d/%m/%y"):
+        try:
+            return datetime.strptime(s, fmt).date()
+        except Exception:
+            pass
+    return None
+
+def parse_br_date(s: str):
+    """pages/11_Comissoes_Daniela.py."""
+    s = (s or "").strip()
+    for fmt in ("%d/%m/%Y", "%d-%m-%Y", "%Y-%m-%d"):
+        try: return datetime.strptime(s, fmt)
+        except: pass
+    return None
+
+def parse_dt_fiado(x):
+    """pages/4_Fiado.py: parse_dt (vencimento)."""
+    try: return datetime.strptime(str(x), DATA_FMT).date()
+    except Exception: return None
+
+def parse_data_sheets_app(col: pd.Series) -> pd.Series:
+    """app.py: _parse_data_sheets (lê a coluna duas vezes)."""
+    dt_txt = pd.to_datetime(col, errors="coerce", dayfirst=True)
+    s_num = pd.to_numeric(col, errors="coerce")
+    dt_num = pd.to_datetime(s_num, unit="D", origin="1899-12-30")
+    return dt_txt.combine_first(dt_num)
+
+# =========================
+# CARGA DA BASE
+# =========================
+def carregar_base_antiga(rows_raw: list[list]) -> pd.DataFrame:
+    """app.py: carregar_base_feminina a partir da matriz do get_all_values (tudo object)."""
+    rows = [[("" if c is None else str(c).strip()) for c in r] for r in rows_raw]
+    if not rows:
+        return pd.DataFrame()
+
+    header = [c.strip() for c in rows[0]]
+    corpo = rows[1:]
+    corpo = [r for r in corpo if any(c != "" for c in r)]
+    if not corpo:
+        return pd.DataFrame(columns=header)
+
+    width = len(header)
+    corpo = [(r + [""]*max(0, width-len(r)))[:width] for r in corpo]
+    df = pd.DataFrame(corpo, columns=header, dtype=object)
+    df.columns = [str(c).strip() for c in df.columns]
+
+    df["ValorNum"] = coerce_valor_app(df["Valor"]) if "Valor" in df.columns else 0.0
+
+    if "Data" in df.columns:
+        df["Data"] = parse_data_sheets_app(df["Data"])
+        df = df.dropna(subset=["Data"])
+        df["Ano"] = df["Data"].dt.year.astype(int)
+        df["Mês"] = df["Data"].dt.month.astype(int)
+        df["Dia"] = df["Data"].dt.date
+    else:
+        df["Ano"] = pd.NA
+        df["Mês"] = pd.NA
+        df["Dia"] = pd.NA
+
+    if "Cliente" in df.columns:
+        df["Cliente"] = df["Cliente"].astype(str).str.strip()
+    else:
+        df["Cliente"] = ""
+    return df
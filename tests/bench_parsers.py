@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+# tests/bench_parsers.py — tempo dos parsers de valor e data: versões antigas (por linha) x salao/parsers.py
+#
+# Uso (da raiz do repo):  python -m tests.bench_parsers [linhas ...]      (padrão: 100000 1000000)
+# "repetidos" = colunas da base sintética (poucos valores distintos, como na base real);
+# "distintos" = todo valor diferente (pior caso do factorize).
+
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from salao.parsers import coerce_valor, parse_data_sheets, parse_datas, so_dia
+from tests import antigos, dados
+
+def _tempo(f, *args) -> float:
+    t = time.perf_counter()
+    f(*args)
+    return time.perf_counter() - t
+
+def _colunas(n: int) -> dict[str, pd.Series]:
+    amostra = dados.base_sintetica(min(n, 50_000))[1:]
+    rep = np.resize(np.arange(len(amostra)), n)
+    valores = pd.Series([amostra[i][2] for i in rep], dtype=object)
+    datas = pd.Series([amostra[i][0] for i in rep], dtype=object)
+    distintos = pd.Series([f"R$ {i // 100:,},{i % 100:02d}".replace(",", "X", 1).replace("X", ".", 1)
+                           for i in range(n)], dtype=object)
+    return {"valores": valores, "datas": datas, "distintos": distintos}
+
+def medir(n: int):
+    c = _colunas(n)
+    print(f"\n{n:,} linhas".replace(",", "."))
+    linhas = [
+        ("valor repetidos   app.py _coerce_valor (.map)", antigos.coerce_valor_app, c["valores"]),
+        ("valor repetidos   12 parse_valor (.apply)", lambda s: s.apply(antigos.parse_valor_por_dia), c["valores"]),
+        ("valor repetidos   coerce_valor", coerce_valor, c["valores"]),
+        ("valor distintos   app.py _coerce_valor (.map)", antigos.coerce_valor_app, c["distintos"]),
+        ("valor distintos   coerce_valor", coerce_valor, c["distintos"]),
+        ("data mista        12 parse_data (.apply)", lambda s: s.apply(antigos.parse_data_por_dia), c["datas"]),
+        ("data mista        app.py _parse_data_sheets", antigos.parse_data_sheets_app, c["datas"]),
+        ("data mista        parse_datas + so_dia", lambda s: so_dia(parse_datas(s)), c["datas"]),
+        ("data mista        parse_data_sheets", parse_data_sheets, c["datas"]),
+    ]
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        for nome, f, s in linhas:
+            print(f"  {nome:<48} {_tempo(f, s):8.3f} s")
+
+if __name__ == "__main__":
+    for n in [int(x) for x in sys.argv[1:]] or [100_000, 1_000_000]:
+        medir(n)
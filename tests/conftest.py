@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+# tests/conftest.py — deixa `salao` e `tests` importáveis rodando `pytest` da raiz do repo
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
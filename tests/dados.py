@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+# tests/dados.py — dados de teste: casos de borda e base sintética no formato do get_all_values
+
+import numpy as np
+
+CABECALHO = ["Data", "Serviço", "Valor", "Conta", "Cliente", "Combo", "Funcionário", "Fase", "Tipo",
+             "Período", "StatusFiado", "IDLancFiado", "VencimentoFiado", "Conferido"]
+
+SERVICOS = ["Escova", "Unha mão", "Unha pé", "Progressiva", "Sobrancelha", "Corte", "Hidratação",
+            "Luzes", "Pintura", "Depilação"]
+CONTAS = ["Carteira", "Pix", "Nubank CNPJ", "Cartão", "Fiado"]
+FUNCIONARIAS = ["Meire", "Daniela"]
+PERIODOS = ["Manhã", "Tarde", "Noite"]
+
+# células de Valor como chegam do Sheets (texto ou número), incluindo lixo e vazios
+VALORES = ["R$ 1.234,56", "1.234,56", "25,00", "25,5", "25.00", "25.0", "25", "1234.56", "1.234",
+           "R$25,00", "r$ 30,00", " 40 ", "R$ 1\u00a0234,56", " 30,00", "0", "0,00", "-10,00",
+           "", " ", "abc", "R$", "1.234.567", "1.234.567,89", "12,345.67",
+           25, 25.5, 0, 1234.56, None, float("nan")]
+
+# células de Data: formatos aceitos, serial do Sheets e inválidos
+DATAS = ["01/02/2025", "31/12/2024", "1/2/2025", "01-02-2025", "2025-02-01", "01/02/25", "29/02/2024",
+         "31/02/2025", "45658", 45658, 45658.0, "", " ", "abc", "2025/02/01", "01/02/2025 10:30",
+         None, float("nan")]
+
+def _valor(rng: np.random.Generator) -> str:
+    v = float(rng.choice([25, 30, 35, 40, 45, 50, 60, 80, 120, 150, 180, 250, 1200, 1500.5]))
+    estilo = rng.integers(0, 5)
+    if estilo == 0:
+        return f"R$ {v:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+    if estilo == 1:
+        return f"{v:.2f}".replace(".", ",")
+    if estilo == 2:
+        return f"{v:.2f}"
+    if estilo == 3:
+        return str(int(v)) if v == int(v) else str(v)
+    return ""   # vazio
+
+def _data(rng: np.random.Generator, dia: int) -> str:
+    ano, mes, d = 2021 + dia // 336, 1 + (dia // 28) % 12, 1 + dia % 28
+    estilo = rng.integers(0, 10)
+    if estilo < 7:
+        return f"{d:02d}/{mes:02d}/{ano}"
+    if estilo == 7:
+        return f"{ano}-{mes:02d}-{d:02d}"
+    if estilo == 8:
+        return f"{d:02d}-{mes:02d}-{ano}"
+    return ""   # sem data
+
+def base_sintetica(n: int, clientes: int = 3000, seed: int = 0) -> list[list[str]]:
+    """Matriz (cabeçalho + n linhas) como o get_all_values devolve a aba da base."""
+    rng = np.random.default_rng(seed)
+    nomes = [f"Cliente {i:04d}" for i in range(clientes)]
+    linhas = [list(CABECALHO)]
+    for i in range(n):
+        serv = str(rng.choice(SERVICOS))
+        conta = str(rng.choice(CONTAS))
+        fiado = conta == "Fiado"
+        linhas.append([
+            _data(rng, int(rng.integers(0, 1500))), serv, _valor(rng), conta,
+            nomes[int(rng.integers(0, clientes))], serv if rng.random() < 0.8 else f"{serv}+Escova",
+            str(rng.choice(FUNCIONARIAS)), "Atendimento", "Serviço", str(rng.choice(PERIODOS)),
+            "Em aberto" if fiado else "", f"L-{i}" if fiado else "", "", "TRUE" if rng.random() < 0.3 else "",
+        ])
+    return linhas
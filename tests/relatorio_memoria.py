@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+# tests/relatorio_memoria.py — memória e groupby da base: carga antiga (object) x snapshot (str) x categórica
+#
+# Uso (da raiz do repo):  python -m tests.relatorio_memoria [linhas]      (padrão: 200000)
+# Base sintética de tests/dados.py (14 colunas, 3 mil clientes).
+# "MB novos" da cópia vem do tracemalloc: conta os buffers do NumPy; os do pyarrow (texto) não entram.
+
+import sys
+import time
+import tracemalloc
+import warnings
+
+import pandas as pd
+
+from salao.base import COLS_DERIVADAS, _analitica, montar_df
+from tests import antigos, dados
+
+def _mb(df: pd.DataFrame) -> float:
+    return df.memory_usage(deep=True).sum() / 2**20
+
+def _ms(f, vezes: int = 5) -> float:
+    melhor = float("inf")
+    for _ in range(vezes):
+        t = time.perf_counter()
+        f()
+        melhor = min(melhor, time.perf_counter() - t)
+    return melhor * 1000
+
+def _copia(df: pd.DataFrame, deep: bool) -> tuple[float, float]:
+    tracemalloc.start()
+    t = time.perf_counter()
+    c = df.copy(deep=deep)
+    ms = (time.perf_counter() - t) * 1000
+    novo = tracemalloc.get_traced_memory()[0] / 2**20
+    tracemalloc.stop()
+    del c
+    return ms, novo
+
+def relatorio(n: int):
+    matriz = dados.base_sintetica(n)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        antiga = antigos.carregar_base_antiga(matriz)
+    nova = montar_df(matriz)[0]
+    analitica = _analitica(nova)
+    texto = [c for c in nova.columns if c not in COLS_DERIVADAS]
+    objeto = pd.DataFrame(matriz[1:], columns=matriz[0], dtype=object)   # mesma base, tudo object
+
+    print(f"Base sintética: {n:_} linhas, {len(matriz[0])} colunas".replace("_", "."))
+    print(f"  base como object (antes)            {_mb(objeto):8.1f} MB")
+    print(f"  snapshot, texto como str (depois)   {_mb(nova[texto]):8.1f} MB"
+          f"  ({_mb(nova):.1f} MB com as derivadas)")
+    print(f"  colunas categóricas (painéis)       {_mb(analitica[[c for c in analitica if c in dados.CABECALHO]]):8.1f} MB")
+
+    comum = analitica.loc[analitica.index.intersection(antiga.index)]
+    str_ = nova.loc[comum.index]
+    obj = antiga.loc[comum.index]
+    for chaves in (["Cliente"], ["Cliente", "Ano"], ["Funcionário"]):
+        t_obj = _ms(lambda: obj.groupby(chaves)["ValorNum"].sum())
+        t_str = _ms(lambda: str_.groupby(chaves)["ValorNum"].sum())
+        t_cat = _ms(lambda: comum.groupby(chaves, observed=True)["ValorNum"].sum())
+        print(f"  groupby {'+'.join(chaves):<14} sum   object {t_obj:6.1f} ms | str {t_str:6.1f} ms"
+              f" | category {t_cat:6.1f} ms")
+
+    ms, mb = _copia(nova, deep=True)
+    print(f"  cópia por sessão  .copy()                      {ms:7.2f} ms / {mb:6.1f} MB novos")
+    ms, mb = _copia(nova, deep=False)
+    print(f"  cópia por sessão  copy(deep=False) + CoW       {ms:7.2f} ms / {mb:6.1f} MB novos")
+
+if __name__ == "__main__":
+    relatorio(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+# tests/test_abas.py — para_df/_como_aba_inteira (salao/abas.py) contra o get_as_dataframe
+
+import pytest
+from gspread_dataframe import get_as_dataframe
+
+from salao import abas, metadados
+from salao.abas import _como_aba_inteira, para_df
+
+class _Planilha:
+    def __init__(self, valores):
+        self.valores = valores
+
+    def values_get(self, faixa, params=None):
+        return {"values": self.valores}
+
+class _Aba:
+    title = "Base de Dados"
+
+    def __init__(self, valores, sobra):
+        self.spreadsheet = _Planilha(valores)
+        self.row_count = len(valores) + sobra
+        self.col_count = max(len(r) for r in valores) + 2
+
+# células como o Sheets devolve com FORMULA: número vem número, texto vem texto, vazio some no fim
+CABECALHO = ["Data", "Cliente", "Valor", "Funcionário"]
+ABAS = {
+    "inteiros": [CABECALHO, ["01/02/2025", "Ana", 30, "Meire"], ["02/02/2025", "Bia", 45, "Daniela"],
+                 [], ["03/02/2025", "Cris", 120, "Meire"]],
+    "inteiros_sem_vazio": [CABECALHO, ["01/02/2025", "Ana", 30, "Meire"], ["02/02/2025", "Bia", 45, "Daniela"]],
+    "float": [CABECALHO, ["01/02/2025", "Ana", 30, "Meire"], ["02/02/2025", "Bia", 25.5, "Daniela"]],
+    "vazio_no_meio": [CABECALHO, ["01/02/2025", "Ana", 30, "Meire"], ["02/02/2025", "Bia", "", "Daniela"],
+                      ["03/02/2025", "Cris", 50, "Meire"]],
+    "vazio_no_fim": [CABECALHO, ["01/02/2025", "Ana", 30, "Meire"], ["02/02/2025", "Bia", 40, "Daniela"],
+                     ["03/02/2025", "Cris"], ["04/02/2025", "Duda", "", "Meire"]],
+    "texto": [CABECALHO, ["01/02/2025", "Ana", "R$ 30,00", "Meire"], ["02/02/2025", "Bia", 40, "Daniela"],
+              ["03/02/2025", "Cris", " 35 ", "Meire"]],
+    "formula": [CABECALHO, ["01/02/2025", "Ana", "=10+20", "Meire"], ["02/02/2025", "Bia", 40, "Daniela"]],
+}
+
+# grade sem linha sobrando (append encheu a aba) e com linhas vazias no fim
+SOBRAS = [0, 5]
+
+def _linhas_com_dado(valores: list[list]) -> list[int]:
+    """Nº no Sheets das linhas não vazias (as que o snapshot mantém, com SheetRow)."""
+    return [n for n, r in enumerate(valores[1:], start=2) if any(str(c).strip() for c in r)]
+
+@pytest.mark.parametrize("sobra", SOBRAS)
+@pytest.mark.parametrize("nome", ABAS)
+def test_para_df_igual_ao_get_as_dataframe(nome, sobra):
+    valores = ABAS[nome]
+    aba = _Aba(valores, sobra)
+    velho = get_as_dataframe(aba, evaluate_formulas=False)
+    novo = para_df(valores, aba.row_count)
+    assert list(novo.columns) == list(velho.columns)
+    assert novo.astype(object).fillna("").astype(str).values.tolist() == \
+        velho.astype(object).fillna("").astype(str).values.tolist()
+
+@pytest.mark.parametrize("sobra", SOBRAS)
+@pytest.mark.parametrize("nome", ABAS)
+def test_valor_do_refid_igual_ao_da_aba_inteira(nome, sobra):
+    # pages/11: o RefID dos já pagos foi gerado com str() do Valor do get_as_dataframe(...).fillna("")
+    valores = ABAS[nome]
+    aba = _Aba(valores, sobra)
+    velho = get_as_dataframe(aba, evaluate_formulas=False).fillna("")
+    col = CABECALHO.index("Valor")
+    celulas = [r[col] if len(r) > col else "" for r in valores[1:]]
+    novo = _como_aba_inteira(celulas, "Valor", _linhas_com_dado(valores), aba.row_count)
+    assert novo.tolist() == velho["Valor"].astype(str).str.strip().tolist()
+
+# =========================
+# CACHE POR VERSÃO
+# =========================
+class _PlanilhaLote:
+    def __init__(self):
+        self.chamadas = 0
+
+    def values_batch_get(self, faixas, params=None):
+        self.chamadas += 1
+        return {"valueRanges": [{"values": ABAS["inteiros"]} for _ in faixas]}
+
+@pytest.fixture
+def planilha(monkeypatch):
+    ss = _PlanilhaLote()
+    versao = {"v": "1"}
+    monkeypatch.setattr(abas, "conectar", lambda: ss)
+    monkeypatch.setattr(abas, "versao_planilha", lambda: versao["v"])
+    monkeypatch.setattr(metadados, "abas", lambda: {})
+    abas._buscar_versao.clear()
+    yield ss, versao
+    abas._buscar_versao.clear()
+
+def test_ler_abas_mesma_versao_busca_uma_vez(planilha):
+    ss, versao = planilha
+    primeira = abas.ler_abas(["Base de Dados"])
+    segunda = abas.ler_abas(["Base de Dados"])
+    assert ss.chamadas == 1
+    assert primeira["Base de Dados"].equals(segunda["Base de Dados"])
+    versao["v"] = "2"
+    abas.ler_abas(["Base de Dados"])
+    assert ss.chamadas == 2
+
+def test_ler_abas_sem_cache_sempre_busca(planilha):
+    ss, _ = planilha
+    abas.ler_abas(["Base de Dados"], cache=False)
+    abas.ler_abas(["Base de Dados"], cache=False)
+    assert ss.chamadas == 2
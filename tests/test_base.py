@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+# tests/test_base.py — montar_df/base_analitica (salao/base.py) contra a carga antiga do app.py
+
+import re
+import threading
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from salao import base
+from salao.base import COLS_CATEGORIAS, COLS_DERIVADAS, _analitica, montar_df
+from tests import antigos, dados
+
+@pytest.fixture(scope="module")
+def matriz():
+    return dados.base_sintetica(5000)
+
+@pytest.fixture(scope="module")
+def antiga(matriz):
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return antigos.carregar_base_antiga(matriz)
+
+@pytest.fixture(scope="module")
+def nova(matriz):
+    return montar_df(matriz)[0]
+
+def test_mesmas_linhas_e_valores(antiga, nova):
+    # a carga antiga descartava linha sem data reconhecida; todas as que ela mantinha estão na nova
+    assert antiga.index.isin(nova.index).all()
+    comum = nova.loc[antiga.index]
+    np.testing.assert_allclose(comum["ValorNum"].to_numpy(), antiga["ValorNum"].to_numpy())
+    pd.testing.assert_series_equal(comum["DataDT"], antiga["Data"].astype("datetime64[ns]"), check_names=False)
+    assert comum["Ano"].astype(int).tolist() == antiga["Ano"].tolist()
+    assert comum["Mês"].astype(int).tolist() == antiga["Mês"].tolist()
+    assert comum["Dia"].tolist() == antiga["Dia"].tolist()
+
+def test_texto_igual(antiga, nova):
+    comum = nova.loc[antiga.index]
+    for c in dados.CABECALHO:
+        if c != "Data":
+            assert comum[c].astype(object).tolist() == antiga[c].tolist(), c
+
+def test_datas_a_mais_so_onde_a_antiga_nao_lia(antiga, nova):
+    # linhas novas com data: formatos que a carga antiga perdia (ex.: aaaa-mm-dd no meio de dd/mm/aaaa)
+    extras = nova[nova["DataDT"].notna() & ~nova.index.isin(antiga.index)]
+    assert extras["Data"].map(antigos.parse_data_por_dia).notna().all()
+
+def test_tipos_compactos(nova):
+    texto = [c for c in nova.columns if c not in COLS_DERIVADAS]
+    assert all(nova[c].dtype != object for c in texto)
+    assert nova["ValorNum"].dtype == np.float64
+    analitica = _analitica(nova)
+    assert all(isinstance(analitica[c].dtype, pd.CategoricalDtype) for c in COLS_CATEGORIAS)
+
+def test_memoria_menor(antiga, nova):
+    texto = [c for c in dados.CABECALHO if c != "Data"]
+    assert nova[texto].memory_usage(deep=True).sum() < antiga[texto].memory_usage(deep=True).sum() / 2
+
+@pytest.mark.parametrize("chaves", [["Cliente"], ["Cliente", "Ano"], ["Funcionário"], ["Serviço", "Conta"]])
+def test_groupby_categorico_igual_ao_object(antiga, nova, chaves):
+    analitica = _analitica(nova).loc[antiga.index]
+    novo = analitica.groupby(chaves, observed=True)["ValorNum"].sum()
+    velho = antiga.groupby(chaves)["ValorNum"].sum()
+    def _chave(k):
+        return tuple(map(str, k)) if isinstance(k, tuple) else str(k)
+    assert {_chave(k): v for k, v in novo.items()} == pytest.approx({_chave(k): v for k, v in velho.items()})
+
+# =========================
+# LEITURA DA CAUDA
+# =========================
+class _Planilha:
+    """values_get/values_batch_get de uma aba só, respeitando 1:1 e A{n}:X."""
+    def __init__(self, valores):
+        self.valores = valores
+
+    def values_get(self, faixa, params=None):
+        return {"values": self.valores}
+
+    def values_batch_get(self, faixas, params=None):
+        resp = []
+        for f in faixas:
+            ini = re.search(r"!A?(\d+):", f)
+            n = int(ini.group(1)) if ini else 1
+            fim = n if f.endswith("!1:1") else len(self.valores)
+            resp.append({"values": self.valores[n - 1:fim]})
+        return {"valueRanges": resp}
+
+@pytest.fixture
+def planilha(monkeypatch):
+    ss = _Planilha([list(dados.CABECALHO)])
+    monkeypatch.setattr(base, "conectar", lambda: ss)
+    return ss
+
+def test_cauda_com_base_so_com_cabecalho(planilha):
+    snap = base._ler_snapshot("v1")
+    assert snap.df.empty and snap.n_linhas == 1 and snap.ultima_linha == ()
+    novas = dados.base_sintetica(3, seed=1)[1:]
+    planilha.valores = planilha.valores + novas
+    novo = base._ler_cauda(snap, "v2")
+    assert novo is not None
+    assert novo.n_linhas == 4 and novo.df["SheetRow"].tolist() == [2, 3, 4]
+    assert novo.df["Cliente"].tolist() == [r[4] for r in novas]   # cabeçalho não entra como linha
+
+def test_cauda_igual_a_leitura_completa(planilha):
+    matriz = dados.base_sintetica(50)
+    planilha.valores = matriz[:31]
+    snap = base._ler_snapshot("v1")
+    planilha.valores = matriz
+    novo = base._ler_cauda(snap, "v2")
+    completo = base._ler_snapshot("v2")
+    assert novo.n_linhas == completo.n_linhas and novo.ultima_linha == completo.ultima_linha
+    pd.testing.assert_frame_equal(novo.df.astype({base.COL_CHAVE: str}),
+                                  completo.df.astype({base.COL_CHAVE: str}))
+
+# =========================
+# LOCK: SÓ PARA CONFERIR/TROCAR
+# =========================
+class _Versao:
+    def __init__(self, v):
+        self.v = v
+
+    def __call__(self):
+        return self.v
+
+    def clear(self):
+        pass
+
+@pytest.fixture
+def estado(monkeypatch):
+    est = base._Estado(disco_lido=True)
+    monkeypatch.setattr(base, "_estado", lambda: est)
+    monkeypatch.setattr(base, "versao_planilha", _Versao("v1"))
+    monkeypatch.setattr(base, "_para_disco", lambda snap: None)
+    return est
+
+def _em_threads(f, n: int) -> list:
+    saida = [None] * n
+    def rodar(i):
+        saida[i] = f()
+    ts = [threading.Thread(target=rodar, args=(i,)) for i in range(n)]
+    for t in ts:
+        t.start()
+    for t in ts:
+        t.join(timeout=5)
+    assert not any(t.is_alive() for t in ts)
+    return saida
+
+def test_indice_que_pede_outro_indice_nao_trava(estado, matriz):
+    snap = base.Snapshot("v1", montar_df(matriz)[0])
+    def por_cliente(df):
+        return base.indice("linhas", len, snap=snap) + 1
+    assert _em_threads(lambda: base.indice("linhas+1", por_cliente, snap=snap), 1) == [len(snap.df) + 1]
+
+def test_indice_montado_uma_vez_e_sem_bloquear_os_outros(estado, matriz):
+    snap = base.Snapshot("v1", montar_df(matriz)[0])
+    base.indice("pronto", len, snap=snap)
+    montagens, liberar = [], threading.Event()
+    def lento(df):
+        montagens.append(1)
+        liberar.wait(5)
+        return "lento"
+    ts = [threading.Thread(target=base.indice, args=("lento", lento), kwargs={"snap": snap}) for _ in range(4)]
+    for t in ts:
+        t.start()
+    time.sleep(0.05)
+    # outro índice (e o snapshot atual) respondem enquanto "lento" está sendo montado
+    assert base.indice("pronto", len, snap=snap) == len(snap.df)
+    liberar.set()
+    for t in ts:
+        t.join(timeout=5)
+    assert len(montagens) == 1 and snap.indices["lento"][0] == "lento"
+
+def test_trocar_indice_espera_a_montagem(estado, matriz):
+    snap = base.Snapshot("v1", montar_df(matriz)[0])
+    liberar = threading.Event()
+    def lento(df):
+        liberar.wait(5)
+        return 1
+    t = threading.Thread(target=base.indice, args=("n", lento), kwargs={"snap": snap})
+    t.start()
+    time.sleep(0.05)
+    threading.Timer(0.05, liberar.set).start()
+    assert base.trocar_indice("n", lambda v: v + 1, snap=snap)
+    t.join(timeout=5)
+    assert snap.indices["n"][0] == 2
+
+def test_snapshot_uma_leitura_e_indices_do_atual_sem_esperar(estado, monkeypatch, matriz):
+    atual = base.Snapshot("v1", montar_df(matriz)[0])
+    estado.snapshot = atual
+    base.versao_planilha.v = "v2"
+    leituras, liberar = [], threading.Event()
+    def ler(snap, versao):
+        leituras.append(versao)
+        liberar.wait(5)
+        return base.Snapshot(versao, snap.df)
+    monkeypatch.setattr(base, "_atualizar_snapshot", ler)
+    ts = [threading.Thread(target=base.snapshot) for _ in range(4)]
+    for t in ts:
+        t.start()
+    time.sleep(0.05)
+    # leitura do Sheets em andamento: índice do snapshot já obtido não espera por ela
+    assert base.indice("n", len, snap=atual) == len(atual.df)
+    liberar.set()
+    for t in ts:
+        t.join(timeout=5)
+    assert leituras == ["v2"] and estado.snapshot.versao == "v2" and estado.lendo is None
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+# tests/test_busca.py — índices de busca por lista de nomes (salao/busca.py)
+
+import pytest
+
+from salao import base, busca
+from salao.base import Snapshot, montar_df
+from tests import dados
+
+@pytest.fixture
+def snap(monkeypatch):
+    monkeypatch.setattr(base, "_estado", lambda: base._Estado(disco_lido=True))
+    nomes = busca._IndicesNomes()
+    monkeypatch.setattr(busca, "_indices_nomes", lambda: nomes)
+    return Snapshot("v1", montar_df(dados.base_sintetica(2000, clientes=300))[0])
+
+def _nomes(i: int) -> list[str]:
+    return [f"Cliente {j:04d}" for j in range(i, i + 40)] + ["Cadastrada Agora"]
+
+def test_listas_diferentes_nao_acumulam_no_snapshot(snap):
+    for i in range(30):
+        busca.indice_de_nomes(_nomes(i), snap=snap)
+    assert list(snap.indices) == ["busca_clientes"]
+    assert len(busca._indices_nomes().itens) == busca.N_INDICES_NOMES
+
+def test_mesma_lista_reaproveita_e_base_nova_remonta(snap):
+    a = busca.indice_de_nomes(_nomes(0), snap=snap)
+    assert busca.indice_de_nomes(_nomes(0), snap=snap) is a
+    outro = Snapshot("v2", snap.df)
+    assert busca.indice_de_nomes(_nomes(0), snap=outro) is not a
+
+def test_indice_de_nomes_so_com_os_nomes_pedidos(snap):
+    idx = busca.indice_de_nomes(_nomes(0), snap=snap)
+    assert set(idx.clientes["Cliente"]) == set(_nomes(0))
+    assert idx.clientes["Cliente"].iloc[-1] == "Cadastrada Agora"   # fora da base: fim do ranking
+    assert busca.buscar("cadastr", idx=idx)["Cliente"].tolist() == ["Cadastrada Agora"]
+    assert set(busca.buscar("cliente 00", n=None, idx=idx)["Cliente"]) == set(_nomes(0)[:40])
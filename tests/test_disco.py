@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+# tests/test_disco.py — cópia em disco do snapshot (salao/disco.py): gravações simultâneas
+
+import threading
+
+import pandas as pd
+import pytest
+
+from salao import disco
+
+pytest.importorskip("pyarrow")
+
+def _df(n: int) -> pd.DataFrame:
+    return pd.DataFrame({"Cliente": [f"Cliente {n}"] * 2000, "ValorNum": [float(n)] * 2000})
+
+def test_gravacoes_simultaneas_nao_misturam_arquivo(tmp_path):
+    arquivo = tmp_path / "base.parquet"
+    inicio = threading.Barrier(8)
+
+    def gravar(n):
+        inicio.wait()
+        for _ in range(5):
+            assert disco.salvar(_df(n), {"versao": str(n)}, arquivo)
+
+    threads = [threading.Thread(target=gravar, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    df, meta = disco.carregar(arquivo)
+    n = int(meta["versao"])
+    pd.testing.assert_frame_equal(df, _df(n))
+    assert [p.name for p in tmp_path.iterdir()] == ["base.parquet"]   # nenhum temporário sobrando
+
+def test_falha_ao_gravar_vai_para_o_log(tmp_path, caplog):
+    pasta = tmp_path / "arquivo_no_lugar_da_pasta"
+    pasta.write_text("")
+    assert not disco.salvar(_df(1), {"versao": "1"}, pasta / "base.parquet")
+    assert "falha ao gravar" in caplog.text
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+# tests/test_indices.py — contagem de visitas: cubo do dashboard x tabela de visitas (salao/indices.py)
+
+import pandas as pd
+import pytest
+
+from salao import base, indices
+from salao.base import Snapshot, _concatenar, montar_df
+from salao.clientes import COL_CHAVE, chave_cliente
+from tests import dados
+
+def _linha(data: str, cliente: str, servico: str = "Escova", valor: str = "30") -> list[str]:
+    r = [""] * len(dados.CABECALHO)
+    for c, v in (("Data", data), ("Cliente", cliente), ("Serviço", servico), ("Valor", valor),
+                 ("Funcionário", "Meire"), ("Conta", "Pix")):
+        r[dados.CABECALHO.index(c)] = v
+    return r
+
+# mesma cliente com grafias diferentes no mesmo dia: 1 visita
+GRAFIAS = [_linha("01/02/2025", "Ana Paula"), _linha("01/02/2025", "ana  paula ", "Unha mão"),
+           _linha("01/02/2025", "Ána Paula", "Unha pé"), _linha("02/02/2025", "ANA PAULA")]
+
+@pytest.fixture
+def snap(monkeypatch):
+    monkeypatch.setattr(base, "_estado", lambda: base._Estado(disco_lido=True))
+    return Snapshot("v1", montar_df(dados.base_sintetica(3000, clientes=200) + GRAFIAS)[0])
+
+def _por_chave_dia(snap) -> int:
+    # regra da 2_Detalhes_Cliente: visitas() filtrada pela chave, dias distintos
+    v = indices.visitas(snap)
+    return sum(v.loc[v[COL_CHAVE] == k, "Dia"].nunique() for k in v[COL_CHAVE].unique())
+
+def test_dashboard_e_detalhes_contam_igual(snap):
+    total_cubo = int(indices.clientes_por(snap=snap)["Visitas"].sum())
+    assert total_cubo == _por_chave_dia(snap) == indices.contar_visitas(snap=snap)
+
+def test_grafias_da_mesma_chave_no_mesmo_dia(snap):
+    cli = indices.clientes_por(snap=snap)
+    chave = chave_cliente("Ana Paula")
+    da_chave = cli[[chave_cliente(c) == chave for c in cli["Cliente"]]]
+    assert int(da_chave["Visitas"].sum()) == 2
+    dia = pd.Timestamp("2025-02-01").date()
+    assert indices.contar_visitas(dia, snap=snap) == len(
+        {(chave_cliente(r[4]), r[0]) for r in dados.base_sintetica(3000, clientes=200)[1:] + GRAFIAS
+         if r[0] == "01/02/2025"})
+
+def test_append_com_outra_grafia_nao_conta_de_novo(snap):
+    indices.cubos(snap)
+    indices.visitas(snap)
+    novas = [_linha("01/02/2025", "ANA PAULA", "Sobrancelha"), _linha("03/02/2025", "ana paula")]
+    novo, _ = montar_df([list(dados.CABECALHO)] + novas, primeira_linha=int(snap.df["SheetRow"].max()) + 1)
+    novo = novo[snap.df.columns]
+    depois = Snapshot("v2", _concatenar(snap.df, novo))
+    for nome, (valor, atualizar) in snap.indices.items():
+        if atualizar:
+            depois.indices[nome] = (atualizar(valor, novo), atualizar)
+    refeito = Snapshot("v3", depois.df)
+    cli = indices.clientes_por(snap=depois)
+    assert int(cli["Visitas"].sum()) == int(indices.clientes_por(snap=refeito)["Visitas"].sum())
+    assert int(cli["Visitas"].sum()) == _por_chave_dia(depois) == indices.contar_visitas(snap=depois)
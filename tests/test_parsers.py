@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+# tests/test_parsers.py — salao/parsers.py contra as funções que ele substituiu (tests/antigos.py)
+
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from salao.parsers import coerce_valor, parse_data_sheets, parse_datas, so_dia
+from tests import antigos, dados
+
+# =========================
+# VALORES
+# =========================
+# onde as versões antigas discordavam entre si, vale a regra do coerce_valor (mensagem do commit user-008)
+DIVERGENCIAS_VALOR = {
+    "r$ 30,00": 30.0,           # app.py e 12: o "r$" minúsculo virava 0
+    "R$ 1\u00a0234,56": 1234.56,   # app.py e 12: espaço duro (NBSP) virava 0
+    "1.234.567": 1234.567,      # 1, 2 e 12: vários pontos viravam 0; app.py já usava o último como decimal
+}
+
+def _antigos_valor(v) -> list[float]:
+    app = float(antigos.coerce_valor_app(pd.Series([v], dtype=object)).iloc[0])
+    return [app, antigos.parse_valor_qualquer(v), antigos.parse_valor_detalhes(v), antigos.parse_valor_por_dia(v)]
+
+@pytest.mark.parametrize("v", dados.VALORES, ids=repr)
+def test_coerce_valor_igual_aos_antigos(v):
+    novo = float(coerce_valor(pd.Series([v], dtype=object)).iloc[0])
+    if isinstance(v, str) and v in DIVERGENCIAS_VALOR:
+        assert novo == pytest.approx(DIVERGENCIAS_VALOR[v])
+        return
+    for antigo in _antigos_valor(v):
+        assert novo == pytest.approx(antigo, nan_ok=True)
+
+def test_coerce_valor_coluna_inteira():
+    # factorize + espalhar: mesma resposta que célula a célula, na ordem e no índice da entrada
+    s = pd.Series(dados.VALORES * 50, dtype=object, index=np.arange(len(dados.VALORES) * 50) * 3)
+    esperado = pd.Series([float(coerce_valor(pd.Series([v], dtype=object)).iloc[0]) for v in s], index=s.index)
+    pd.testing.assert_series_equal(coerce_valor(s), esperado, check_names=False)
+
+def test_coerce_valor_base_sintetica():
+    s = pd.Series([r[2] for r in dados.base_sintetica(5000)[1:]], dtype=object)
+    np.testing.assert_allclose(coerce_valor(s).to_numpy(), antigos.coerce_valor_app(s).to_numpy())
+
+def test_coerce_valor_numerico_e_texto_pyarrow():
+    assert coerce_valor(pd.Series([1.5, np.nan, 3])).tolist() == [1.5, 0.0, 3.0]
+    s = pd.Series(["25,00", "", "R$ 1.234,56"], dtype="str")
+    assert coerce_valor(s).tolist() == [25.0, 0.0, 1234.56]
+
+# =========================
+# DATAS
+# =========================
+def _dia(v):
+    return so_dia(parse_datas(pd.Series([v], dtype=object))).iloc[0]
+
+@pytest.mark.parametrize("v", dados.DATAS, ids=repr)
+def test_parse_datas_igual_ao_parse_data_da_pagina_12(v):
+    serial = (isinstance(v, (int, float)) and not pd.isna(v)) or (isinstance(v, str) and v.strip().isdigit())
+    if serial:
+        assert _dia(v) is not None   # serial do Sheets: a 12 não lia, o novo lê
+        return
+    assert _dia(v) == antigos.parse_data_por_dia(v)
+
+@pytest.mark.parametrize("v", [d for d in dados.DATAS if isinstance(d, str)], ids=repr)
+def test_parse_datas_sem_ano_curto_igual_ao_parse_br_date(v):
+    # 11 Comissões: sem "%d/%m/%y" e sem serial
+    dt = parse_datas(pd.Series([v], dtype=object), formatos=("%d/%m/%Y", "%d-%m-%Y", "%Y-%m-%d"),
+                     serial=False).iloc[0]
+    antigo = antigos.parse_br_date(v)
+    assert (None if pd.isna(dt) else dt.to_pydatetime()) == antigo
+
+@pytest.mark.parametrize("v", dados.DATAS, ids=repr)
+def test_parse_datas_so_formato_br_igual_ao_parse_dt_do_fiado(v):
+    dia = so_dia(parse_datas(pd.Series([v], dtype=object), formatos=(antigos.DATA_FMT,), serial=False)).iloc[0]
+    assert dia == antigos.parse_dt_fiado(v)
+
+# o _parse_data_sheets do app.py (célula a célula) errava estes; o resto tem de bater
+DIVERGENCIAS_DATA = {"2025-02-01": pd.Timestamp("2025-02-01")}   # antigo: dia primeiro -> 2025-01-02
+
+@pytest.mark.parametrize("v", dados.DATAS, ids=repr)
+def test_parse_data_sheets_igual_ao_do_app(v):
+    novo = parse_data_sheets(pd.Series([v], dtype=object)).iloc[0]
+    if isinstance(v, (int, float)) and not pd.isna(v):
+        assert novo == pd.Timestamp("2025-01-01")   # antigo: número virava nanossegundos desde 1970
+        return
+    if v in DIVERGENCIAS_DATA:
+        assert novo == DIVERGENCIAS_DATA[v]
+        return
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        antigo = antigos.parse_data_sheets_app(pd.Series([v], dtype=object)).iloc[0]
+    assert (pd.isna(novo) and pd.isna(antigo)) or novo == antigo
+
+def test_parse_datas_coluna_inteira_base_sintetica():
+    s = pd.Series([r[0] for r in dados.base_sintetica(5000)[1:]], dtype=object)
+    novo = so_dia(parse_datas(s))
+    assert novo.tolist() == s.map(antigos.parse_data_por_dia).tolist()
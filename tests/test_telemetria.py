@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+# tests/test_telemetria.py — orçamento de chamadas por rerun (salao/telemetria.py)
+
+import time
+
+import pytest
+
+from salao import telemetria
+
+@pytest.fixture
+def sessao(monkeypatch):
+    est = telemetria._Estado(instrumentado=True)
+    monkeypatch.setattr(telemetria, "_estado", lambda: est)
+    monkeypatch.setattr(telemetria, "_sessao", lambda: "s1")
+    monkeypatch.setattr(telemetria, "ARQ_LOG", None)
+    monkeypatch.setattr(telemetria, "PAINEL_SEMPRE", False)
+    monkeypatch.setattr(telemetria.st, "query_params", {})
+    return est
+
+def _chamadas(servico: str, n: int) -> list[dict]:
+    for _ in range(n):
+        telemetria.registrar(servico, "GET /x", time.perf_counter())
+    return telemetria._estado().atual["s1"].chamadas
+
+@pytest.mark.parametrize("nome", ["3_Adicionar_Atendimento", "5_Agendamento",
+                                  "11_Comissoes_Daniela", "12_Atendimentos_Por_Dia"])
+def test_paginas_medidas_tem_orcamento(nome):
+    assert telemetria.ORCAMENTOS[nome].get("sheets", 0) > 0
+
+def test_rerun_acima_do_orcamento_e_marcado(sessao):
+    telemetria.pagina("12_Atendimentos_Por_Dia")
+    limite = telemetria.ORCAMENTOS["12_Atendimentos_Por_Dia"]["sheets"]
+    chamadas = _chamadas("sheets", limite + 1)
+    assert not any(c.get("acima_orcamento") for c in chamadas[:limite])
+    assert chamadas[limite].get("acima_orcamento") is True
+
+def test_rerun_dentro_do_orcamento_nao_e_marcado(sessao):
+    telemetria.pagina("11_Comissoes_Daniela")
+    _chamadas("sheets", 3)
+    chamadas = _chamadas("telegram", 2)
+    assert len(chamadas) == 5 and not any(c.get("acima_orcamento") for c in chamadas)
+
+def test_telegram_no_rerun_onde_os_cards_saem_da_fila(sessao):
+    telemetria.pagina("3_Adicionar_Atendimento")
+    assert _chamadas("telegram", 1)[0].get("acima_orcamento") is True
+
+def test_orcamento_vale_so_para_o_proprio_rerun(sessao):
+    telemetria.pagina("12_Atendimentos_Por_Dia")
+    _chamadas("sheets", 5)
+    telemetria.pagina("12_Atendimentos_Por_Dia")   # novo rerun: contagem recomeça
+    assert not _chamadas("sheets", 1)[0].get("acima_orcamento")
+    assert telemetria._estado().anterior["s1"].numero == 1